@@ -1,40 +1,53 @@
 import asyncio
-from asyncio import Semaphore
-from playwright.async_api import async_playwright
 from datetime import datetime
-from dotenv import load_dotenv
 import os
 import json
-from RPA_Ceplan.classes.navegador_observatorio import WriterObs
-
-load_dotenv()
-
-EMAIL = os.getenv("EMAIL")
-PASS = os.getenv("PASS")
+from RPA_Ceplan.classes.navegador_observatorio import WriterObs, ruta_estado_sesion
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+from RPA_Ceplan.classes.navegador_compartido import NavegadorCompartido, rss_procesos_hijos
+from RPA_Ceplan.classes.politica_reintentos import PoliticaReintentos, CircuitoInterruptor
+from RPA_Ceplan.classes.instrumentacion import registro_tiempos, directorio_logs, configurar_logging
 
 # Función para procesar múltiples fichas y aplicar hipervínculos
-async def hipervincular_referencias(sem:Semaphore, codigo_ficha, timeout, headless = True):
-    async with sem:
-        session = WriterObs(timeout=timeout, headless=headless)
-        await session.iniciar_navegador()    
+async def hipervincular_referencias(pool: PoolSesiones, codigo_ficha):
+    async with pool.prestar() as session:
         try:
-            await session.login()
-            await session.identificar_rubro(codigo_ficha)
+            await session.identificar_rubro(codigo_ficha, orden=3)
             await session.agregar_enlace_a_casillas(codigo_ficha) # Verificar si solo los activos
-            await session.volver_a_inicio()
             print(f"Ficha {codigo_ficha} con referencias hipervinculadas")
         except Exception as e:
             print(f"Error al procesar la ficha {codigo_ficha}: {e}")
-        finally:
-            await session.cerrar_navegador()
 
-async def hipervincular_referencias_async(codigos_ficha:list[str], timeout:float, sem:int, headless:bool):
-    sem_limit = Semaphore(sem)
-    tasks = [hipervincular_referencias(sem_limit, codigo_ficha, timeout, headless) for codigo_ficha in codigos_ficha]
-    await asyncio.gather(*tasks)
+async def hipervincular_referencias_async(codigos_ficha:list[str], timeout:float, sem:int, headless:bool,
+                                         pestanas: int | None = None):
+    # Con `pestanas`, las sesiones son pestañas de un solo Chromium en lugar de un navegador cada una
+    navegador = None
+    if pestanas:
+        navegador = NavegadorCompartido(headless=headless, limite_pestanas=pestanas)
+        await navegador.iniciar()
+        sem = pestanas
+
+    # Cada sesión del pool inicia sesión una sola vez y se reutiliza entre fichas
+    try:
+        async with PoolSesiones(WriterObs, tamano=sem, timeout=timeout, headless=headless,
+                                ruta_estado=ruta_estado_sesion, rutas=RutasAdmin(),
+                                perfil_bloqueo="admin-minimal", navegador=navegador,
+                                politica=PoliticaReintentos(interruptor=CircuitoInterruptor())) as pool:
+            tasks = [hipervincular_referencias(pool, codigo_ficha) for codigo_ficha in codigos_ficha]
+            await asyncio.gather(*tasks)
+    finally:
+        if navegador is not None:
+            print(f"Memoria de los navegadores (RSS): {rss_procesos_hijos()} MB")
+            await navegador.cerrar()
+
+    print("Pasos con más tiempo total:")
+    registro_tiempos.imprimir_resumen()
+    registro_tiempos.exportar(os.path.join(directorio_logs, "tiempos_referencias.json"))
 
 #Llamada al flujo principal
 if __name__ == "__main__":
+    configurar_logging()
     # codigos_ficha = [f"t{i}" for i in range(1, 10)]  # Generar códigos dinámicamente
     asyncio.run(hipervincular_referencias_async(
         codigos_ficha= ["t2"],
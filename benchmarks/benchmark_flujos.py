@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+from RPA_Ceplan.benchmarks.servidor_observatorio import ServidorObservatorio, EstadoObservatorio, ruta_info_obs
+from RPA_Ceplan.classes.navegador_observatorio import ReaderObs, WriterObs, dividir_referencias, _normalizar_referencia
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+from RPA_Ceplan.classes.planificador_fichas import PlanificadorFichas
+from RPA_Ceplan.classes.politica_reintentos import PoliticaReintentos, CircuitoInterruptor
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+from RPA_Ceplan.classes.almacen_resultados import AlmacenJSONL
+from RPA_Ceplan.classes.extractor_graficos import ExtractorGraficosHTTP
+from RPA_Ceplan.classes.diario_checkpoint import DiarioCheckpoint
+from RPA_Ceplan.classes.instrumentacion import RegistroTiempos, directorio_logs
+from RPA_Ceplan.scraping.obtener_codigos_graficos import obtener_codigo_gráficos
+
+ruta_reporte = os.path.join(directorio_logs, "benchmark_flujos.json")
+
+
+def _opciones_sesion(servidor: ServidorObservatorio, directorio: str, tiempos: RegistroTiempos) -> dict:
+    """
+    Argumentos de sesión para PoolSesiones, como en los scripts de producción pero
+    apuntando al servidor simulado y con el estado en un directorio temporal.
+    """
+    return {
+        "url_base": servidor.url,
+        # El Observatorio simulado acepta cualquier credencial; no enviar las reales del .env
+        "email": "benchmark@observatorio.local",
+        "password": "benchmark",
+        "ruta_estado": os.path.join(directorio, "estado_sesion.json"),
+        "rutas": RutasAdmin(os.path.join(directorio, "rutas_admin.json")),
+        "perfil_bloqueo": "admin-minimal",
+        "politica": PoliticaReintentos(interruptor=CircuitoInterruptor()),
+        "tiempos": tiempos,
+    }
+
+
+def referencias_deseadas(codigo: str, filas: list[dict]) -> str:
+    """
+    Referencias que el benchmark escribe en una ficha del servidor simulado: la [2] con
+    otro texto, la [3] (inactiva) se mantiene, la última se quita y se agrega una nueva.
+    Así cada ficha ejercita una edición, una activación, una desactivación y una inserción.
+    """
+    contenidos = [fila["content"] for fila in filas[:-1]]
+    contenidos[1] = contenidos[1].replace("Documento", "Informe")
+    nuevo = len(filas) + 1
+    contenidos.append(f"[{nuevo}] Autor {nuevo}, «Documento nuevo sobre {codigo},» 2025. "
+                      f"Disponible en: https://ejemplo.org/{codigo}/{nuevo}")
+    return "\n".join(contenidos)
+
+
+def referencias_aplicadas(filas: list[dict], deseadas: str) -> bool:
+    """
+    Verifica que las filas activas del servidor sean exactamente las referencias deseadas.
+    """
+    activas = sorted((_normalizar_referencia(fila["content"]), fila["urlsource"]) for fila in filas if fila["active"])
+    esperadas = sorted((_normalizar_referencia(ref["content"]), ref["urlsource"]) for ref in dividir_referencias(deseadas))
+    return activas == esperadas
+
+
+async def flujo_scraping(servidor, concurrencia, directorio, tiempos, headless=True) -> dict:
+    """
+    Lectura de metadata: PoolSesiones de ReaderObs con PlanificadorFichas sobre todas las listas.
+    """
+    listas = [(rubro, subrubro, "territorial" in subrubro.lower()) for rubro, subrubro in servidor.estado.listas]
+    almacen = AlmacenJSONL(os.path.join(directorio, "fichas.jsonl"))
+    try:
+        async with PoolSesiones(ReaderObs, tamano=concurrencia, headless=headless, almacen=almacen,
+                                **_opciones_sesion(servidor, directorio, tiempos)) as pool:
+            reporte = await PlanificadorFichas(pool).ejecutar(listas)
+        leidas = almacen.cargar()
+    finally:
+        almacen.cerrar()
+
+    verificadas = sum(1 for codigo, registro in leidas.items()
+                      if registro.get("sumilla") == servidor.estado.fichas[codigo]["summary"])
+    return {"fichas": reporte["leidas"], "fallidas": len(reporte["fallidas"]), "verificadas": verificadas}
+
+
+async def flujo_referencias(servidor, concurrencia, directorio, tiempos, headless=True) -> dict:
+    """
+    Actualización de referencias: WriterObs.aplicar_cambios de cada ficha con las referencias
+    de `referencias_deseadas`, repartidas entre las sesiones del pool.
+    """
+    deseadas = {codigo: referencias_deseadas(codigo, ficha["referencias"])
+                for codigo, ficha in servidor.estado.fichas.items()}
+
+    async with PoolSesiones(WriterObs, tamano=concurrencia, headless=headless,
+                            **_opciones_sesion(servidor, directorio, tiempos)) as pool:
+        async def actualizar(codigo):
+            async with pool.prestar() as sesion:
+                return await sesion.aplicar_cambios(codigo, {"referencias": deseadas[codigo]})
+
+        reportes = await asyncio.gather(*(actualizar(codigo) for codigo in deseadas), return_exceptions=True)
+
+    correctas = sum(1 for reporte in reportes if isinstance(reporte, dict) and not reporte["errores"])
+    verificadas = sum(referencias_aplicadas(servidor.estado.fichas[codigo]["referencias"], texto)
+                      for codigo, texto in deseadas.items())
+    return {"fichas": correctas, "fallidas": len(deseadas) - correctas, "verificadas": verificadas}
+
+
+async def flujo_graficos(servidor, concurrencia, directorio, tiempos, headless=True) -> dict:
+    """
+    Códigos de gráficos como obtener_codigo_gráficos_http: primero por HTTP y, para las
+    fichas que necesitan JavaScript, con el navegador.
+    """
+    codigos = list(servidor.estado.fichas)
+    diario = DiarioCheckpoint(os.path.join(directorio, "figuras_diario.jsonl"))
+    extractor = ExtractorGraficosHTTP(tareas=concurrencia, url_base=servidor.url)
+    try:
+        inicio = time.perf_counter()
+        _, pendientes = await extractor.obtener_muchos(
+            codigos, al_obtener=lambda codigo, ids: diario.registrar(codigo, {"figuras": ids})
+        )
+        tiempos.registrar("graficos_http", (time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        if pendientes:
+            await obtener_codigo_gráficos(tareas=concurrencia, codigos=pendientes, diario=diario, url_base=servidor.url)
+        tiempos.registrar("graficos_navegador", (time.perf_counter() - inicio) * 1000)
+        completados = dict(diario.completados)
+    finally:
+        extractor.cerrar()
+        diario.cerrar()
+
+    verificadas = sum(1 for codigo, datos in completados.items()
+                      if datos["figuras"] == servidor.estado.fichas[codigo]["figuras"])
+    return {"fichas": len(completados), "fallidas": len(codigos) - len(completados), "verificadas": verificadas,
+            "por_navegador": len(pendientes)}
+
+
+flujos = {
+    "scraping": flujo_scraping,
+    "referencias": flujo_referencias,
+    "graficos": flujo_graficos,
+}
+
+
+def medir(nombre: str, concurrencia: int, info_obs: dict, fichas_por_lista: int, opciones_servidor: dict,
+          headless: bool = True) -> dict:
+    """
+    Ejecuta un flujo contra un servidor simulado nuevo (con los datos sin modificar) y
+    calcula las fichas por minuto. El tiempo incluye abrir e iniciar sesión en el pool,
+    como en una ejecución real.
+    """
+    estado = EstadoObservatorio(info_obs, fichas_por_lista=fichas_por_lista)
+    tiempos = RegistroTiempos()
+    with ServidorObservatorio(estado=estado, **opciones_servidor) as servidor, \
+            tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        resultado = asyncio.run(flujos[nombre](servidor, concurrencia, directorio, tiempos, headless=headless))
+        duracion = time.perf_counter() - inicio
+        estadisticas = servidor.estadisticas()
+
+    resultado = {
+        "flujo": nombre,
+        "concurrencia": concurrencia,
+        **resultado,
+        "duracion_s": round(duracion, 2),
+        "fichas_por_minuto": round(resultado["fichas"] * 60 / duracion, 2),
+        "servidor": estadisticas,
+        "pasos": dict(list(tiempos.resumen().items())[:5]),
+    }
+    print(f"{nombre:<12} x{concurrencia:<3} {resultado['fichas']:>4} fichas ({resultado['fallidas']} fallidas, "
+          f"{resultado['verificadas']} verificadas) en {resultado['duracion_s']:.1f} s   "
+          f"{resultado['fichas_por_minuto']:.1f} fichas/min")
+    return resultado
+
+
+def comparar(resultados: list[dict], anteriores: list[dict], tolerancia: float) -> list[str]:
+    """
+    Compara con los resultados de un reporte anterior de este benchmark.
+
+    Returns:
+        list[str]: Regresiones: caídas de fichas por minuto mayores que `tolerancia`
+        (fracción) en el mismo flujo y concurrencia, y fichas escritas o leídas mal.
+    """
+    base = {(r["flujo"], r["concurrencia"]): r for r in anteriores}
+
+    regresiones = []
+    for resultado in resultados:
+        clave = (resultado["flujo"], resultado["concurrencia"])
+        if resultado["verificadas"] < resultado["fichas"]:
+            regresiones.append(f"{clave}: {resultado['fichas'] - resultado['verificadas']} fichas con datos incorrectos")
+        anterior = base.get(clave)
+        if anterior and resultado["fichas_por_minuto"] < anterior["fichas_por_minuto"] * (1 - tolerancia):
+            regresiones.append(f"{clave}: {resultado['fichas_por_minuto']} fichas/min "
+                               f"(antes {anterior['fichas_por_minuto']})")
+    return regresiones
+
+
+def ejecutar(nombres: list[str], concurrencias: list[int], fichas_por_lista: int = 5, opciones_servidor: dict | None = None,
+             headless: bool = True, salida: str = ruta_reporte) -> list[dict]:
+    """
+    Mide cada flujo con cada concurrencia y guarda el reporte en `salida`.
+    """
+    with open(ruta_info_obs, "r", encoding="utf-8") as file:
+        info_obs = json.load(file)
+    opciones_servidor = opciones_servidor or {}
+
+    resultados = [medir(nombre, concurrencia, info_obs, fichas_por_lista, opciones_servidor, headless)
+                  for nombre in nombres for concurrencia in concurrencias]
+
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as file:
+        json.dump({"servidor": opciones_servidor, "fichas_por_lista": fichas_por_lista, "resultados": resultados},
+                  file, ensure_ascii=False, indent=4)
+    print(f"Reporte guardado en {salida}")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los flujos de RPA_Ceplan contra un Observatorio simulado")
+    parser.add_argument("--flujos", nargs="*", default=list(flujos), choices=list(flujos))
+    parser.add_argument("--concurrencia", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--fichas-por-lista", type=int, default=5)
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--tasa-errores", type=float, default=0.0)
+    parser.add_argument("--tasa-cuelgues", type=float, default=0.0)
+    parser.add_argument("--porcentaje-spa", type=int, default=20,
+                        help="Porcentaje de fichas cuyos gráficos solo se leen con el navegador")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--visible", action="store_true", help="Lanzar los navegadores con interfaz gráfica")
+    parser.add_argument("--salida", default=ruta_reporte)
+    parser.add_argument("--base", help="Reporte anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="Caída de fichas/min tolerada (fracción)")
+    args = parser.parse_args()
+
+    # Leer la base antes de medir: puede ser el mismo archivo que la salida
+    anteriores = None
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as file:
+            anteriores = json.load(file)["resultados"]
+
+    opciones = {"latencia_ms": args.latencia_ms, "jitter_ms": args.jitter_ms, "tasa_errores": args.tasa_errores,
+                "tasa_cuelgues": args.tasa_cuelgues, "porcentaje_spa": args.porcentaje_spa, "semilla": args.semilla}
+    resultados = ejecutar(args.flujos, args.concurrencia, args.fichas_por_lista, opciones,
+                          headless=not args.visible, salida=args.salida)
+
+    # Sin --base solo se verifican los datos escritos o leídos
+    regresiones = comparar(resultados, anteriores or [], args.tolerancia)
+    for regresion in regresiones:
+        print(f"REGRESIÓN {regresion}")
+    sys.exit(1 if regresiones else 0)
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import types
+from RPA_Ceplan.classes.text_formatting import TextFormatting, procesar_lote
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+ruta_info_obs = os.path.join(script_dir, "..", "datasets", "info_obs.json")
+
+# Versión de classes/text_formatting.py contra la que se compara: la anterior a los patrones
+# compilados a nivel de módulo y al procesamiento en una sola pasada
+revision_base = "faebf50"
+
+
+def cargar_corpus(ruta: str = ruta_info_obs, repeticiones: int = 1) -> list[tuple[str, str]]:
+    """
+    Arma el corpus de prueba con las sumillas de info_obs.json.
+
+    Args:
+        ruta (str): Archivo con la metadata de las fichas.
+        repeticiones (int): Veces que se repite el catálogo, para simular catálogos más grandes.
+
+    Returns:
+        list[tuple]: Pares (texto, referencias); las sumillas no tienen referencias.
+    """
+    with open(ruta, "r", encoding="utf-8") as file:
+        info_obs = json.load(file)
+    sumillas = [datos["sumilla"] for datos in info_obs.values() if datos.get("sumilla")]
+    return [(sumilla, "") for sumilla in sumillas] * repeticiones
+
+
+def medir(nombre: str, funcion, rondas: int) -> dict:
+    """
+    Ejecuta `funcion` varias veces y devuelve la mediana y el mínimo en segundos.
+    """
+    tiempos = []
+    for _ in range(rondas):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    resultado = {"caso": nombre, "mediana_s": round(statistics.median(tiempos), 4), "minimo_s": round(min(tiempos), 4)}
+    print(f"{nombre:<28} mediana {resultado['mediana_s']:.4f} s   mínimo {resultado['minimo_s']:.4f} s")
+    return resultado
+
+
+def cargar_base(revision: str = revision_base):
+    """
+    Carga la clase TextFormatting de otra revisión del repositorio, leída con `git show`,
+    para medir la versión actual contra ella.
+
+    Returns:
+        type | None: La clase de esa revisión, o None si no se pudo leer (por ejemplo, fuera de git).
+    """
+    try:
+        fuente = subprocess.run(
+            ["git", "show", f"{revision}:classes/text_formatting.py"],
+            cwd=script_dir, capture_output=True, text=True, encoding="utf-8", check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"No se pudo leer text_formatting.py de la revisión {revision}: {e}")
+        return None
+    modulo = types.ModuleType(f"text_formatting_{revision}")
+    exec(compile(fuente, f"{revision}:classes/text_formatting.py", "exec"), modulo.__dict__)
+    return modulo.TextFormatting
+
+
+def ejecutar(repeticiones: int = 1, rondas: int = 5, revision: str = revision_base) -> list[dict]:
+    """
+    Compara la TextFormatting de `revision` con la actual, documento por documento y con
+    procesar_lote, y verifica que den el mismo resultado.
+    """
+    corpus = cargar_corpus(repeticiones=repeticiones)
+    print(f"Corpus: {len(corpus)} sumillas, {sum(len(texto) for texto, _ in corpus)} caracteres")
+
+    referencia = procesar_lote(corpus)
+    resultados = []
+
+    ClaseBase = cargar_base(revision)
+    if ClaseBase is not None:
+        base = [ClaseBase(t, r).procesar_contenido() for t, r in corpus]
+        distintos = sum(1 for a, b in zip(base, referencia) if a != b)
+        if distintos:
+            print(f"Aviso: {distintos} de {len(corpus)} sumillas dan un resultado distinto al de {revision}")
+        resultados.append(medir(f"base ({revision})", lambda: [ClaseBase(t, r).procesar_contenido() for t, r in corpus], rondas))
+
+    resultados += [
+        medir("instancia por documento", lambda: [TextFormatting(t, r).procesar_contenido() for t, r in corpus], rondas),
+        medir("procesar_lote", lambda: procesar_lote(corpus), rondas),
+    ]
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de TextFormatting sobre las sumillas de info_obs.json")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--rondas", type=int, default=5)
+    parser.add_argument("--revision", default=revision_base, help="Revisión de git contra la que se compara")
+    args = parser.parse_args()
+    ejecutar(args.repeticiones, args.rondas, args.revision)
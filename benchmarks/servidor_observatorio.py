@@ -0,0 +1,748 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import secrets
+import argparse
+import threading
+from html import escape
+from collections import Counter
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit, unquote, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from RPA_Ceplan.classes.clasificador_codigos import clasificador_por_defecto, ruta_dict_admin
+from RPA_Ceplan.classes.navegador_observatorio import mapeo_tematica
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+ruta_info_obs = os.path.join(script_dir, "..", "datasets", "info_obs.json")
+
+# Id de temática por nombre (inverso de mapeo_tematica)
+ids_tematica = {nombre: id_tematica for id_tematica, nombre in mapeo_tematica.items()}
+
+# Íconos de cada fila de la lista, en el orden que usan seleccionar_icono y secciones_ficha
+iconos_lista = [
+    ("fa-pencil", "✎"),      # 0: fila
+    ("fa-file-text", "T"),   # 1: texto
+    ("fa-bar-chart", "G"),   # 2: gráficos
+    ("fa-book", "R"),        # 3: referencias
+    ("fa-database", "F"),    # 4: fuentes primarias
+    ("fa-edit", "M"),        # 5: metadata
+]
+secciones_editor = {1: "texto", 2: "graficos", 3: "referencias", 5: "metadata"}
+
+
+def _ids_graficos(codigo: str, cantidad: int) -> list[str]:
+    """
+    Ids de Datawrapper ficticios pero estables para una ficha.
+    """
+    return [hashlib.md5(f"{codigo}-{i}".encode()).hexdigest()[:5] for i in range(1, cantidad + 1)]
+
+
+def _orden_natural(codigo: str) -> list:
+    return [int(parte) if parte.isdigit() else parte for parte in re.split(r'(\d+)', codigo)]
+
+
+class EstadoObservatorio():
+    """
+    Datos del Observatorio simulado: las fichas de info_obs.json repartidas en las listas
+    de rubros_subrubros_admin.json, cada una con gráficos y referencias generados.
+
+    Los guardados del panel modifican este estado, así que un benchmark puede verificar
+    al final que lo escrito es lo que se pidió.
+    """
+
+    def __init__(self, info_obs: dict, fichas_por_lista: int | None = 10, graficos: int = 3,
+                 referencias: int = 6):
+        """
+        Args:
+            info_obs (dict): Metadata de las fichas (formato info_obs.json).
+            fichas_por_lista (int, optional): Máximo de fichas por subrubro. None para usarlas todas.
+            graficos (int): Gráficos generados por ficha.
+            referencias (int): Referencias generadas por ficha; la tercera empieza inactiva.
+        """
+        with open(ruta_dict_admin, "r", encoding="utf-8") as file:
+            self.rubros: dict = json.load(file)
+        self.candado = threading.Lock()
+        self.fichas: dict[str, dict] = {}
+        self.listas: dict[tuple, list[str]] = {
+            (rubro, subrubro): [] for rubro, subrubros in self.rubros.items() for subrubro in subrubros
+        }
+
+        clasificaciones = clasificador_por_defecto().clasificar_muchos(info_obs)
+        for codigo in sorted(info_obs, key=_orden_natural):
+            clasificacion = clasificaciones[codigo]
+            lista = self.listas.get((clasificacion.rubro, clasificacion.subrubro))
+            if lista is None or (fichas_por_lista is not None and len(lista) >= fichas_por_lista):
+                continue
+            lista.append(codigo)
+            datos = info_obs[codigo]
+            self.fichas[codigo] = {
+                "code": codigo,
+                "shorttitle": datos.get("titulo_corto") or "",
+                "longtitle": datos.get("titulo_largo") or "",
+                "summary": datos.get("sumilla") or "",
+                "publication": datos.get("fecha_publicacion") or "",
+                "lastUpdated": datos.get("ultima_actualizacion") or "",
+                "tags": datos.get("tags") or "",
+                "status": (datos.get("estado") or "Activo") == "Activo",
+                "idtematic": ids_tematica.get(datos.get("tematica"), "15"),
+                "territorial": "territorial" in clasificacion.subrubro.lower(),
+                "dpto": clasificacion.departamento or datos.get("departamento") or "Lima",
+                "texto": [],
+                "graficos": [
+                    {"idgraphictype": "12", "order": str(i), "numeration": f"Figura {i}",
+                     "title": f"Evolución del indicador {i} de {codigo}", "note": "Fuente: elaboración propia.",
+                     "active": True}
+                    for i in range(1, graficos + 1)
+                ],
+                "referencias": [
+                    {"content": f"[{i}] Autor {i}, «Documento {i} sobre {codigo},» 2024. "
+                                f"Disponible en: https://ejemplo.org/{codigo}/{i}",
+                     "urlsource": f"https://ejemplo.org/{codigo}/{i}", "active": i != 3}
+                    for i in range(1, referencias + 1)
+                ],
+                "figuras": _ids_graficos(codigo, graficos),
+            }
+        self.departamentos = sorted({ficha["dpto"] for ficha in self.fichas.values()})
+
+    def lista(self, indice_rubro: int, indice_subrubro: int) -> tuple[str, str, list[str]]:
+        rubro = list(self.rubros)[indice_rubro]
+        subrubro = list(self.rubros[rubro])[indice_subrubro]
+        return rubro, subrubro, self.listas[(rubro, subrubro)]
+
+    def detalle(self, codigo: str) -> dict:
+        """
+        Ficha con los nombres de campo de la API del panel (los formcontrolname del formulario).
+        """
+        ficha = self.fichas[codigo]
+        detalle = {campo: ficha[campo] for campo in ("code", "shorttitle", "longtitle", "summary", "publication",
+                                                     "lastUpdated", "tags", "status", "idtematic")}
+        if ficha["territorial"]:
+            detalle["dpto"] = {"id": str(self.departamentos.index(ficha["dpto"]) + 1), "name": ficha["dpto"]}
+        detalle["figuras"] = [f"https://datawrapper.dwcdn.net/{chart_id}/" for chart_id in ficha["figuras"]]
+        return detalle
+
+    def guardar_metadata(self, codigo: str, valores: dict):
+        with self.candado:
+            ficha = self.fichas[codigo]
+            for campo in ("shorttitle", "longtitle", "summary", "publication", "lastUpdated", "tags", "idtematic"):
+                if campo in valores:
+                    ficha[campo] = valores[campo]
+            if "status" in valores:
+                ficha["status"] = bool(valores["status"])
+            if valores.get("iddpto"):
+                ficha["dpto"] = self.departamentos[int(valores["iddpto"]) - 1]
+
+    def guardar_fila(self, codigo: str, seccion: str, fila: int | None, valores: dict, activo: bool) -> list[dict]:
+        """
+        Agrega (fila None) o edita una fila de gráficos o referencias.
+
+        Returns:
+            list[dict]: Filas de la sección después del guardado.
+        """
+        with self.candado:
+            filas = self.fichas[codigo][seccion]
+            if fila is None:
+                filas.append({**valores, "active": activo})
+            else:
+                filas[fila].update(valores)
+                filas[fila]["active"] = activo
+            return [dict(f) for f in filas]
+
+
+# Hoja de estilos mínima: el panel real oculta con CSS los elementos cerrados
+css_panel = ".oculto{display:none} td{padding:2px 6px;border:1px solid #ccc}"
+
+# Comportamiento del panel: menú, login, tablas y formularios con guardado por fetch
+js_panel = r'''(function () {
+    const datos = JSON.parse(document.getElementById("datos").textContent);
+    let filas = datos.filas || [];
+    let editando = null;
+    let dialogoMostrado = false;
+
+    function mostrar(el, visible) {
+        if (el) el.classList.toggle("oculto", !visible);
+    }
+
+    function avisar(texto) {
+        document.getElementById("aviso").textContent = texto;
+    }
+
+    async function enviar(url, cuerpo) {
+        const respuesta = await fetch(url, {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify(cuerpo),
+            credentials: "same-origin"
+        });
+        if (!respuesta.ok) throw new Error("HTTP " + respuesta.status);
+        return respuesta.json();
+    }
+
+    function columnas(fila, i) {
+        if (datos.seccion === "graficos") return [fila.order, fila.numeration, fila.title];
+        return [String(i + 1), fila.content, fila.urlsource];
+    }
+
+    function renderizar() {
+        const cuerpo = document.querySelector("#tabla tbody");
+        cuerpo.replaceChildren();
+        filas.forEach((fila, i) => {
+            const tr = document.createElement("tr");
+            tr.className = "tbody-detail";
+            columnas(fila, i).forEach((valor, j) => {
+                const td = document.createElement("td");
+                if (datos.seccion === "referencias" && j === 2) {
+                    if (valor) {
+                        const a = document.createElement("a");
+                        a.href = valor;
+                        a.textContent = valor;
+                        td.appendChild(a);
+                    }
+                } else {
+                    td.textContent = valor;
+                }
+                tr.appendChild(td);
+            });
+            const estado = document.createElement("td");
+            estado.className = "text-center";
+            estado.innerHTML = fila.active ? '<div class="label-active">ACTIVO</div>' : '<div class="label-inactive">INACTIVO</div>';
+            tr.appendChild(estado);
+            const acciones = document.createElement("td");
+            acciones.innerHTML = '<a class="a-icon"><i class="fa fa-pencil">✎</i></a>';
+            tr.appendChild(acciones);
+            cuerpo.appendChild(tr);
+        });
+    }
+
+    function abrirFormulario(fila) {
+        const formulario = document.getElementById("formulario");
+        formulario.querySelectorAll("[formcontrolname]").forEach(control => {
+            const campo = control.getAttribute("formcontrolname");
+            control.value = fila ? (fila[campo] ?? "") : (control.dataset.defecto || "");
+        });
+        document.getElementById("switch1").checked = fila ? fila.active : datos.activo_por_defecto;
+        mostrar(document.getElementById("tabla"), false);
+        mostrar(formulario, true);
+    }
+
+    async function cargarMetadata() {
+        const respuesta = await fetch("/api/ficha/" + encodeURIComponent(datos.codigo), {credentials: "same-origin"});
+        if (!respuesta.ok) {
+            avisar("No se pudo cargar la ficha: HTTP " + respuesta.status);
+            return;
+        }
+        const ficha = await respuesta.json();
+        const formulario = document.getElementById("formulario");
+        formulario.querySelectorAll("[formcontrolname]").forEach(control => {
+            const campo = control.getAttribute("formcontrolname");
+            if (campo === "iddpto") control.value = ficha.dpto ? ficha.dpto.id : "";
+            else control.value = ficha[campo] ?? "";
+        });
+        document.getElementById("switch1").checked = ficha.status;
+        mostrar(formulario, true);
+    }
+
+    async function iniciarSesion() {
+        try {
+            await enviar("/api/login", {
+                email: document.querySelector('input[name="email"]').value,
+                pass: document.querySelector('input[name="pass"]').value
+            });
+            location.href = "/adm/tendencia";
+        } catch (error) {
+            avisar("No se pudo iniciar sesión: " + error.message);
+        }
+    }
+
+    document.addEventListener("click", evento => {
+        const objetivo = evento.target;
+        if (objetivo.closest(".icon-header")) {
+            mostrar(document.querySelector(".menu-usuario"), true);
+            return;
+        }
+        if (objetivo.closest(".btn-secure")) {
+            iniciarSesion();
+            return;
+        }
+        const rubro = objetivo.closest("li.btn-org");
+        if (rubro) {
+            const grupo = document.querySelector(`template.subrubros[data-rubro="${rubro.dataset.rubro}"]`);
+            document.getElementById("subrubros").replaceChildren(grupo.content.cloneNode(true));
+            return;
+        }
+        if (objetivo.closest("#subsecciones")) {
+            mostrar(document.getElementById("bloques"), true);
+            return;
+        }
+        const agregar = objetivo.closest("a.btn-add");
+        if (agregar) {
+            if (datos.seccion === "texto") {
+                mostrar(document.getElementById("formulario"), true);
+            } else if (agregar.dataset.accion === "nuevo") {
+                editando = null;
+                abrirFormulario(null);
+            }
+            return;
+        }
+        const lapiz = objetivo.closest("tr.tbody-detail a.a-icon");
+        if (lapiz && (datos.seccion === "graficos" || datos.seccion === "referencias")) {
+            const tr = lapiz.closest("tr");
+            editando = Array.from(tr.parentNode.children).indexOf(tr);
+            abrirFormulario(filas[editando]);
+        }
+    });
+
+    document.addEventListener("submit", async evento => {
+        evento.preventDefault();
+        const formulario = evento.target;
+        const valores = {};
+        formulario.querySelectorAll("[formcontrolname]").forEach(control => {
+            valores[control.getAttribute("formcontrolname")] = control.value;
+        });
+        const interruptor = document.getElementById("switch1");
+        const activo = interruptor ? interruptor.checked : true;
+        const base = "/api/ficha/" + encodeURIComponent(datos.codigo);
+        try {
+            if (datos.seccion === "metadata") {
+                await enviar(base, {...valores, status: activo});
+                avisar("Ficha guardada");
+            } else if (datos.seccion === "texto") {
+                await enviar(base + "/texto", {textbox: valores.textbox, activo: activo});
+                if (!dialogoMostrado) {
+                    dialogoMostrado = true;
+                    setTimeout(() => alert("Se guardó el bloque"), 0);
+                }
+            } else {
+                const respuesta = await enviar(base + "/" + datos.seccion, {fila: editando, valores: valores, activo: activo});
+                filas = respuesta.filas;
+                editando = null;
+                renderizar();
+                mostrar(formulario, false);
+                mostrar(document.getElementById("tabla"), true);
+            }
+        } catch (error) {
+            avisar("No se pudo guardar: " + error.message);
+        }
+    });
+
+    if (datos.seccion === "graficos" || datos.seccion === "referencias") renderizar();
+    if (datos.seccion === "metadata") cargarMetadata();
+})();
+'''
+
+# Página pública de una ficha que solo muestra los gráficos con JavaScript
+js_publica = r'''(function () {
+    const raiz = document.querySelector("app-root");
+    fetch("/api/ficha/" + encodeURIComponent(raiz.getAttribute("codigo")))
+        .then(respuesta => respuesta.json())
+        .then(ficha => ficha.figuras.forEach(url => {
+            const iframe = document.createElement("iframe");
+            iframe.id = "datawrapper-chart-" + url.split("/")[3];
+            iframe.src = url;
+            raiz.appendChild(iframe);
+        }));
+})();
+'''
+
+def _pagina(contenido: str, datos: dict | None = None, menu_usuario: str = "", script: str = "/static/panel.js") -> str:
+    datos_json = json.dumps(datos or {}, ensure_ascii=False).replace("</", "<\\/")
+    return f'''<!DOCTYPE html>
+<html lang="es">
+<head><meta charset="utf-8"><title>Observatorio (simulado)</title><style>{css_panel}</style></head>
+<body>
+<header>
+<i class="icon-header fa fa-user fa-3">Usuario</i>
+<div class="menu-usuario oculto">{menu_usuario}</div>
+</header>
+<div id="aviso"></div>
+{contenido}
+<script id="datos" type="application/json">{datos_json}</script>
+<script src="{script}"></script>
+</body>
+</html>'''
+
+
+class ManejadorObservatorio(BaseHTTPRequestHandler):
+    """
+    Rutas del Observatorio simulado. El servidor (ServidorObservatorio) se lee de
+    `self.server.observatorio`.
+    """
+    protocol_version = "HTTP/1.1"
+
+    rutas_get = [
+        (re.compile(r'^/$'), "_inicio"),
+        (re.compile(r'^/login$'), "_login"),
+        (re.compile(r'^/adm/tendencia$'), "_panel"),
+        (re.compile(r'^/adm/lista/(\d+)/(\d+)$'), "_lista"),
+        (re.compile(r'^/adm/ficha/([^/]+)/(\d+)$'), "_editor"),
+        (re.compile(r'^/ficha/([^/]+)$'), "_ficha_publica"),
+        (re.compile(r'^/api/ficha/([^/]+)$'), "_api_detalle"),
+    ]
+    rutas_post = [
+        (re.compile(r'^/api/login$'), "_api_login"),
+        (re.compile(r'^/api/ficha/([^/]+)$'), "_api_metadata"),
+        (re.compile(r'^/api/ficha/([^/]+)/texto$'), "_api_texto"),
+        (re.compile(r'^/api/ficha/([^/]+)/(graficos|referencias)$'), "_api_filas"),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def observatorio(self) -> "ServidorObservatorio":
+        return self.server.observatorio
+
+    @property
+    def estado(self) -> EstadoObservatorio:
+        return self.server.observatorio.estado
+
+    # Respuestas
+    def _responder(self, estado: int, cuerpo: str | bytes, tipo: str = "text/html; charset=utf-8", cabeceras=None):
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(cuerpo)
+
+    def _json(self, datos, estado: int = 200):
+        self._responder(estado, json.dumps(datos, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def _redirigir(self, destino: str):
+        self._responder(302, "", cabeceras={"Location": destino})
+
+    def _autenticado(self) -> bool:
+        cookie = SimpleCookie(self.headers.get("Cookie", "")).get("sesion")
+        return cookie is not None and cookie.value in self.observatorio.sesiones
+
+    def _despachar(self, rutas):
+        ruta = unquote(urlsplit(self.path).path)
+        self.observatorio.contar("solicitudes")
+        if ruta.startswith("/static/"):
+            if ruta == "/static/panel.js":
+                return self._responder(200, js_panel, "application/javascript; charset=utf-8")
+            if ruta == "/static/publica.js":
+                return self._responder(200, js_publica, "application/javascript; charset=utf-8")
+            return self._responder(404, "No encontrado")
+        if ruta == "/estadisticas":
+            return self._json(self.observatorio.estadisticas())
+
+        if not self.observatorio.simular_red():
+            return self._responder(503, "Servicio no disponible")
+        for patron, metodo in rutas:
+            match = patron.match(ruta)
+            if match:
+                try:
+                    return getattr(self, metodo)(*match.groups())
+                except KeyError:
+                    return self._responder(404, "No encontrado")
+        self._responder(404, "No encontrado")
+
+    def do_GET(self):
+        self._despachar(self.rutas_get)
+
+    def do_POST(self):
+        self._despachar(self.rutas_post)
+
+    def _cuerpo(self) -> dict:
+        longitud = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(longitud) or b"{}")
+
+    # Páginas
+    def _menu_admin(self) -> str:
+        return '<a href="/adm/tendencia">Administrador</a>'
+
+    def _inicio(self):
+        self.observatorio.contar("paginas")
+        self._responder(200, _pagina("<h1>Observatorio Nacional de Prospectiva</h1>",
+                                     menu_usuario='<a routerlink="login" href="/login">Iniciar sesión</a>'))
+
+    def _login(self):
+        self.observatorio.contar("paginas")
+        self._responder(200, _pagina(
+            '<input name="email" type="text"><input name="pass" type="password">'
+            '<button type="button" class="btn btn-outline-dark btn-secure">Ingresar</button>'
+        ))
+
+    def _menu_rubros(self) -> str:
+        items = []
+        grupos = []
+        for i, (rubro, subrubros) in enumerate(self.estado.rubros.items()):
+            items.append(f'<li class="btn-org" routerlinkactive="active" data-rubro="{i}">{escape(rubro)}</li>')
+            enlaces = "".join(f'<a class="col-sm-3 btn-org" href="/adm/lista/{i}/{j}">{escape(subrubro)}</a>'
+                              for j, subrubro in enumerate(subrubros))
+            grupos.append(f'<template class="subrubros" data-rubro="{i}">{enlaces}</template>')
+        # Como en el panel real, solo los subrubros del rubro elegido están en el DOM
+        return f'<ul class="menu">{"".join(items)}</ul>{"".join(grupos)}<div id="subrubros"></div>'
+
+    def _panel(self):
+        if not self._autenticado():
+            return self._redirigir("/")
+        self.observatorio.contar("paginas")
+        self._responder(200, _pagina(self._menu_rubros(), menu_usuario=self._menu_admin()))
+
+    def _lista(self, indice_rubro, indice_subrubro):
+        if not self._autenticado():
+            return self._redirigir("/")
+        self.observatorio.contar("paginas")
+        try:
+            rubro, subrubro, codigos = self.estado.lista(int(indice_rubro), int(indice_subrubro))
+        except IndexError:
+            return self._responder(404, "No encontrado")
+
+        filas = []
+        for n, codigo in enumerate(codigos, start=1):
+            ficha = self.estado.fichas[codigo]
+            estado = "Activo" if ficha["status"] else "Inactivo"
+            etiqueta = '<div class="label-active">ACTIVO</div>' if ficha["status"] else '<div class="label-inactive">INACTIVO</div>'
+            iconos = "".join(f'<a class="a-icon" href="/adm/ficha/{quote(codigo)}/{orden}"><i class="fa {clase}">{texto}</i></a>'
+                             for orden, (clase, texto) in enumerate(iconos_lista))
+            filas.append(
+                f'<tr class="tbody-detail"><td>{n}</td><td>{escape(codigo)}</td><td>{escape(ficha["shorttitle"])}</td>'
+                f'<td>{escape(ficha["longtitle"])}</td><td>{escape(mapeo_tematica.get(ficha["idtematic"], ""))}</td>'
+                f'<td>{escape(ficha["lastUpdated"])}</td><td>{estado}</td><td class="text-center">{etiqueta}</td>'
+                f'<td>{iconos}</td></tr>'
+            )
+        contenido = f'{self._menu_rubros()}<h2>{escape(subrubro)}</h2><table><tbody>{"".join(filas)}</tbody></table>'
+        self._responder(200, _pagina(contenido, menu_usuario=self._menu_admin()))
+
+    def _editor(self, codigo, orden):
+        if not self._autenticado():
+            return self._redirigir("/")
+        self.observatorio.contar("paginas")
+        ficha = self.estado.fichas[codigo]
+        seccion = secciones_editor.get(int(orden))
+        datos = {"codigo": codigo, "seccion": seccion}
+        interruptor = '<input type="checkbox" id="switch1"><button type="submit">Guardar</button>'
+
+        if seccion == "metadata":
+            tematicas = "".join(f'<option value="{id_tematica}">{escape(nombre)}</option>'
+                                for id_tematica, nombre in mapeo_tematica.items())
+            departamento = ""
+            if ficha["territorial"]:
+                opciones = "".join(f'<option value="{i}">{escape(nombre)}</option>'
+                                   for i, nombre in enumerate(self.estado.departamentos, start=1))
+                departamento = f'<select formcontrolname="iddpto">{opciones}</select>'
+            contenido = (
+                '<form id="formulario" class="oculto">'
+                '<input formcontrolname="shorttitle"><input formcontrolname="longtitle">'
+                '<textarea formcontrolname="summary"></textarea>'
+                '<input formcontrolname="publication"><input formcontrolname="lastUpdated">'
+                f'<input formcontrolname="tags"><select formcontrolname="idtematic">{tematicas}</select>'
+                f'{departamento}{interruptor}</form>'
+            )
+        elif seccion == "texto":
+            contenido = (
+                '<a class="a-icon" id="subsecciones"><i class="fa fa-list">☰</i></a>'
+                '<div id="bloques" class="oculto"><a class="btn-add">Agregar Bloque</a></div>'
+                f'<form id="formulario" class="oculto"><textarea formcontrolname="textbox"></textarea>{interruptor}</form>'
+            )
+        elif seccion == "graficos":
+            datos.update(filas=ficha["graficos"], activo_por_defecto=False)
+            contenido = (
+                '<a class="btn-add" data-accion="nuevo"><i class="fa fa-plus">+</i> Agregar</a>'
+                '<table id="tabla"><tbody></tbody></table>'
+                '<form id="formulario" class="oculto">'
+                '<select formcontrolname="idgraphictype" data-defecto="11">'
+                '<option value="11">Imagen</option><option value="12">Frame Datawrapper</option></select>'
+                '<input formcontrolname="order"><input formcontrolname="numeration">'
+                f'<input formcontrolname="title"><textarea formcontrolname="note"></textarea>{interruptor}</form>'
+            )
+        elif seccion == "referencias":
+            datos.update(filas=ficha["referencias"], activo_por_defecto=True)
+            contenido = (
+                '<a class="btn-add">Importar</a><a class="btn-add" data-accion="nuevo">Agregar Nuevo</a>'
+                '<table id="tabla"><tbody></tbody></table>'
+                '<form id="formulario" class="oculto">'
+                f'<textarea formcontrolname="content"></textarea><input formcontrolname="urlsource">{interruptor}</form>'
+            )
+        else:
+            contenido = f'<h2>{escape(codigo)}</h2>'
+        self._responder(200, _pagina(contenido, datos, menu_usuario=self._menu_admin()))
+
+    def _ficha_publica(self, codigo):
+        self.observatorio.contar("paginas")
+        ficha = self.estado.fichas[codigo]
+        # Una parte de las fichas solo muestra los gráficos con JavaScript
+        if int(hashlib.md5(codigo.encode()).hexdigest(), 16) % 100 < self.observatorio.porcentaje_spa:
+            cuerpo = f'<app-root codigo="{escape(codigo)}"></app-root><script src="/static/publica.js"></script>'
+        else:
+            iframes = "".join(f'<iframe id="datawrapper-chart-{chart_id}" src="https://datawrapper.dwcdn.net/{chart_id}/"></iframe>'
+                              for chart_id in ficha["figuras"])
+            cuerpo = f'<h1>{escape(ficha["shorttitle"])}</h1><p>{escape(ficha["summary"])}</p>{iframes}'
+        self._responder(200, f'<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"></head><body>{cuerpo}</body></html>')
+
+    # API
+    def _api_detalle(self, codigo):
+        self.observatorio.contar("api")
+        self._json(self.estado.detalle(codigo))
+
+    def _api_login(self):
+        cuerpo = self._cuerpo()
+        if not cuerpo.get("email") or not cuerpo.get("pass"):
+            return self._json({"error": "Credenciales incompletas"}, 401)
+        token = secrets.token_hex(8)
+        self.observatorio.sesiones.add(token)
+        self._responder(200, json.dumps({"ok": True}), "application/json",
+                        cabeceras={"Set-Cookie": f"sesion={token}; Path=/; HttpOnly"})
+
+    def _api_metadata(self, codigo):
+        if not self._autenticado():
+            return self._json({"error": "No autenticado"}, 401)
+        self.observatorio.contar("guardados")
+        self.estado.guardar_metadata(codigo, self._cuerpo())
+        self._json({"ok": True})
+
+    def _api_texto(self, codigo):
+        if not self._autenticado():
+            return self._json({"error": "No autenticado"}, 401)
+        self.observatorio.contar("guardados")
+        cuerpo = self._cuerpo()
+        with self.estado.candado:
+            self.estado.fichas[codigo]["texto"] = [cuerpo.get("textbox", "")]
+        self._json({"ok": True})
+
+    def _api_filas(self, codigo, seccion):
+        if not self._autenticado():
+            return self._json({"error": "No autenticado"}, 401)
+        self.observatorio.contar("guardados")
+        cuerpo = self._cuerpo()
+        filas = self.estado.guardar_fila(codigo, seccion, cuerpo.get("fila"), cuerpo.get("valores", {}),
+                                         bool(cuerpo.get("activo")))
+        self._json({"filas": filas})
+
+
+class ServidorObservatorio():
+    """
+    Servidor HTTP local que reproduce las rutas y el DOM del Observatorio en los que se apoyan
+    NavegadorObs, ReaderObs, WriterObs y el extractor de gráficos: login, menú de rubros
+    (li.btn-org, a.col-sm-3.btn-org), listas con filas 'tr.tbody-detail' e íconos 'a.a-icon',
+    formularios con formcontrolname, '#switch1', guardados por fetch, el diálogo del editor
+    de texto y las páginas públicas con iframes de Datawrapper.
+
+    Cada página y llamada a la API pasa por una latencia configurable y puede fallar con
+    un 503 o quedarse colgada, para medir el comportamiento bajo un sitio degradado.
+
+    Uso:
+        with ServidorObservatorio(latencia_ms=80, tasa_errores=0.02) as servidor:
+            sesion = ReaderObs(timeout=150, headless=True, url_base=servidor.url)
+    """
+
+    def __init__(self, puerto: int = 0, estado: EstadoObservatorio | None = None, latencia_ms: float = 0,
+                 jitter_ms: float = 0, tasa_errores: float = 0.0, tasa_cuelgues: float = 0.0,
+                 cuelgue_s: float = 20, porcentaje_spa: int = 20, semilla: int | None = None):
+        """
+        Args:
+            puerto (int): Puerto local; 0 elige uno libre.
+            estado (EstadoObservatorio, optional): Datos servidos. Por defecto, 10 fichas por lista
+                tomadas de info_obs.json.
+            latencia_ms (float): Latencia fija de cada página y llamada a la API.
+            jitter_ms (float): Latencia adicional aleatoria, entre 0 y este valor.
+            tasa_errores (float): Fracción de solicitudes que responden 503.
+            tasa_cuelgues (float): Fracción de solicitudes que tardan `cuelgue_s` segundos en responder.
+            cuelgue_s (float): Duración de un cuelgue; por defecto supera el timeout de las esperas.
+            porcentaje_spa (int): Porcentaje de páginas públicas que solo muestran los gráficos con JavaScript.
+            semilla (int, optional): Semilla de la inyección de latencia y fallos.
+        """
+        if estado is None:
+            with open(ruta_info_obs, "r", encoding="utf-8") as file:
+                estado = EstadoObservatorio(json.load(file))
+        self.estado = estado
+        self.puerto = puerto
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_errores = tasa_errores
+        self.tasa_cuelgues = tasa_cuelgues
+        self.cuelgue_s = cuelgue_s
+        self.porcentaje_spa = porcentaje_spa
+        self.sesiones: set[str] = set()
+        self._azar = random.Random(semilla)
+        self._contadores = Counter()
+        self._candado = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detener()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def iniciar(self):
+        """
+        Levanta el servidor en un hilo en segundo plano.
+        """
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", self.puerto), ManejadorObservatorio)
+        self._servidor.daemon_threads = True
+        self._servidor.observatorio = self
+        self.puerto = self._servidor.server_address[1]
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        with self._candado:
+            self._contadores[nombre] += cantidad
+
+    def simular_red(self) -> bool:
+        """
+        Aplica la latencia y los fallos configurados a una solicitud.
+
+        Returns:
+            bool: False si la solicitud debe responder con un error.
+        """
+        with self._candado:
+            espera = self.latencia_ms + self._azar.uniform(0, self.jitter_ms)
+            sorteo = self._azar.random()
+        if sorteo < self.tasa_errores:
+            self.contar("errores_inyectados")
+            return False
+        if sorteo < self.tasa_errores + self.tasa_cuelgues:
+            self.contar("cuelgues")
+            espera += self.cuelgue_s * 1000
+        if espera:
+            time.sleep(espera / 1000)
+        return True
+
+    def estadisticas(self) -> dict:
+        with self._candado:
+            return dict(self._contadores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Observatorio simulado para pruebas y benchmarks sin el sitio real")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--fichas-por-lista", type=int, default=10)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--tasa-errores", type=float, default=0.0)
+    parser.add_argument("--tasa-cuelgues", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with open(ruta_info_obs, "r", encoding="utf-8") as file:
+        estado = EstadoObservatorio(json.load(file), fichas_por_lista=args.fichas_por_lista)
+    servidor = ServidorObservatorio(args.puerto, estado, latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+                                    tasa_errores=args.tasa_errores, tasa_cuelgues=args.tasa_cuelgues)
+    servidor.iniciar()
+    print(f"Observatorio simulado en {servidor.url} con {len(estado.fichas)} fichas (Ctrl+C para detener)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from RPA_Ceplan.classes.diario_checkpoint import abrir_para_anexar
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+directorio_salida = os.path.abspath(os.path.join(script_dir, "..", "datasets"))
+
+
+class AlmacenResultados(ABC):
+    """
+    Destino de los registros de fichas que produce ReaderObs.
+
+    Cada registro se escribe en cuanto llega (`guardar`), en lugar de reescribir el
+    catálogo completo. `exportar` regenera un archivo con el formato de info_obs.json.
+    Una instancia debe compartirse entre todas las sesiones del proceso para que haya
+    un solo escritor.
+    """
+
+    @abstractmethod
+    def guardar(self, codigo: str, registro: dict):
+        """
+        Escribe (o reemplaza) el registro de una ficha.
+        """
+
+    @abstractmethod
+    def cargar(self) -> dict[str, dict]:
+        """
+        Returns:
+            dict[str, dict]: Todos los registros guardados, por código.
+        """
+
+    def cerrar(self):
+        pass
+
+    def exportar(self, ruta_salida: str = os.path.join(directorio_salida, "info_obs.json"), combinar: bool = True):
+        """
+        Escribe los registros en un JSON con el formato de info_obs.json.
+
+        Args:
+            ruta_salida (str): Archivo de salida.
+            combinar (bool): Si es True, actualiza el contenido existente del archivo en lugar de reemplazarlo.
+
+        Returns:
+            int: Número de registros exportados desde el almacén.
+        """
+        datos = {}
+        if combinar and os.path.exists(ruta_salida):
+            with open(ruta_salida, "r", encoding="utf-8") as json_file:
+                try:
+                    datos = json.load(json_file)
+                except json.JSONDecodeError:
+                    logging.error(f"El archivo {ruta_salida} está vacío o corrupto. Se sobrescribirá.")
+
+        registros = self.cargar()
+        for codigo, registro in registros.items():
+            datos[codigo] = {"codigo": codigo, **registro}
+
+        ruta_temporal = f"{ruta_salida}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as json_file:
+            json.dump(datos, json_file, indent=4, ensure_ascii=False)
+        os.replace(ruta_temporal, ruta_salida)
+        logging.info(f"{len(registros)} fichas exportadas a {ruta_salida}")
+        return len(registros)
+
+
+class AlmacenJSONL(AlmacenResultados):
+    """
+    Almacén de solo anexado: una línea JSON por registro. Si un código aparece varias
+    veces, gana la última línea. Cada `compactar_cada` registros el archivo se reescribe
+    dejando una sola línea por código.
+
+    Cada registro se escribe al archivo en cuanto llega, así que sobrevive a que el proceso
+    muera. Frente a una caída del sistema operativo solo está asegurado lo sincronizado a
+    disco (fsync), que se hace cada `fsync_cada` registros, al compactar y al cerrar.
+    """
+
+    def __init__(self, ruta: str = os.path.join(directorio_salida, "info_obs_prueba.jsonl"),
+                 compactar_cada: int = 500, fsync_cada: int = 25):
+        self.ruta = ruta
+        self.compactar_cada = compactar_cada
+        self.fsync_cada = fsync_cada
+        self._desde_compactacion = 0
+        self._sin_sincronizar = 0
+        self._archivo = abrir_para_anexar(self.ruta)
+
+    def guardar(self, codigo: str, registro: dict):
+        # Una sola escritura por línea: con O_APPEND no se intercalan registros
+        self._archivo.write(json.dumps({"codigo": codigo, "datos": registro}, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+        self._desde_compactacion += 1
+        self._sin_sincronizar += 1
+        if self._sin_sincronizar >= self.fsync_cada:
+            self.sincronizar()
+        if self.compactar_cada and self._desde_compactacion >= self.compactar_cada:
+            self.compactar()
+
+    def cargar(self) -> dict[str, dict]:
+        registros = {}
+        if not os.path.exists(self.ruta):
+            return registros
+        with open(self.ruta, "r", encoding="utf-8") as file:
+            for numero, linea in enumerate(file, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Una línea truncada por una interrupción no invalida el resto
+                    logging.warning(f"Línea {numero} inválida en {self.ruta}, se omite")
+                    continue
+                registros[entrada["codigo"]] = entrada["datos"]
+        return registros
+
+    def sincronizar(self):
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self._sin_sincronizar = 0
+
+    def compactar(self):
+        """
+        Reescribe el archivo con una sola línea por código.
+        """
+        registros = self.cargar()
+        self._archivo.close()
+        ruta_temporal = f"{self.ruta}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as file:
+            for codigo, registro in registros.items():
+                file.write(json.dumps({"codigo": codigo, "datos": registro}, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(ruta_temporal, self.ruta)
+        self._archivo = abrir_para_anexar(self.ruta)
+        self._desde_compactacion = 0
+        self._sin_sincronizar = 0
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self.sincronizar()
+            self._archivo.close()
+
+
+class AlmacenSQLite(AlmacenResultados):
+    """
+    Almacén en una tabla SQLite con el código de ficha como llave primaria.
+    Cada registro se guarda en su propia transacción.
+    """
+
+    def __init__(self, ruta: str = os.path.join(directorio_salida, "info_obs.sqlite")):
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(self.ruta)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS fichas (
+                codigo TEXT PRIMARY KEY,
+                datos TEXT NOT NULL,
+                actualizado REAL NOT NULL
+            )"""
+        )
+        self._conexion.commit()
+
+    def guardar(self, codigo: str, registro: dict):
+        with self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO fichas (codigo, datos, actualizado) VALUES (?, ?, ?)",
+                (codigo, json.dumps(registro, ensure_ascii=False), time.time())
+            )
+
+    def cargar(self) -> dict[str, dict]:
+        cursor = self._conexion.execute("SELECT codigo, datos FROM fichas ORDER BY rowid")
+        return {codigo: json.loads(datos) for codigo, datos in cursor}
+
+    def cerrar(self):
+        self._conexion.close()
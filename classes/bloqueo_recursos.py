@@ -0,0 +1,133 @@
+import logging
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Dominios de analítica y publicidad que ninguna automatización necesita
+dominios_analitica = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+]
+
+# Dominios de los gráficos Datawrapper embebidos en las fichas
+dominios_datawrapper = [
+    "datawrapper.dwcdn.net",
+    "dwcdn.net",
+    "datawrapper.de",
+]
+
+# Perfiles de bloqueo:
+#   tipos: tipos de recurso de Playwright que se abortan siempre
+#   dominios: dominios cuyas solicitudes se abortan (los scripts se reemplazan por uno vacío)
+perfiles_bloqueo = {
+    # Sin bloqueo, comportamiento original
+    "full": {"tipos": set(), "dominios": []},
+    # Panel de administrador: se conservan hojas de estilo y fuentes porque
+    # los íconos de Font Awesome y los chequeos de visibilidad dependen de ellas
+    "admin-minimal": {
+        "tipos": {"image", "media"},
+        "dominios": dominios_analitica + dominios_datawrapper,
+    },
+    # Páginas públicas de las fichas cuando solo se leen los ids de los iframes
+    "public-ids-only": {
+        "tipos": {"image", "media", "font", "stylesheet"},
+        "dominios": dominios_analitica + dominios_datawrapper,
+    },
+}
+
+# Tamaño promedio aproximado en bytes por tipo de recurso, para estimar el ahorro.
+# Son valores fijos, no medidos: las solicitudes abortadas nunca llegan a descargarse.
+tamano_estimado = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "document": 50_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+
+
+def _coincide_dominio(url: str, dominios: list[str]) -> bool:
+    host = urlsplit(url).hostname or ""
+    return any(host == dominio or host.endswith(f".{dominio}") for dominio in dominios)
+
+
+class BloqueoRecursos():
+    """
+    Capa de enrutamiento de solicitudes que aborta los recursos que la automatización
+    no usa según un perfil con nombre, y lleva la cuenta de lo que se ahorró.
+    """
+
+    def __init__(self, perfil: str = "admin-minimal"):
+        """
+        Args:
+            perfil (str): Nombre del perfil en `perfiles_bloqueo`.
+
+        Raises:
+            ValueError: Si el perfil no existe.
+        """
+        if perfil not in perfiles_bloqueo:
+            raise ValueError(f"Perfil de bloqueo desconocido: {perfil}. Opciones: {list(perfiles_bloqueo)}")
+        self.perfil = perfil
+        self.tipos = perfiles_bloqueo[perfil]["tipos"]
+        self.dominios = perfiles_bloqueo[perfil]["dominios"]
+        self.bloqueadas = Counter()
+        self.permitidas = 0
+
+    async def instalar(self, context):
+        """
+        Instala el enrutamiento en un contexto de Playwright. El perfil "full" no instala nada
+        para no agregar el costo de enrutar cada solicitud.
+        """
+        if not self.tipos and not self.dominios:
+            return
+        await context.route("**/*", self._manejar)
+
+    async def _manejar(self, route):
+        request = route.request
+        tipo = request.resource_type
+
+        if tipo in self.tipos:
+            self.bloqueadas[tipo] += 1
+            await route.abort()
+        elif self.dominios and _coincide_dominio(request.url, self.dominios):
+            self.bloqueadas[tipo] += 1
+            if tipo == "script":
+                # Un script vacío evita errores en la página por el recurso faltante
+                await route.fulfill(status=200, content_type="application/javascript", body="")
+            else:
+                await route.abort()
+        else:
+            self.permitidas += 1
+            await route.continue_()
+
+    def reporte(self) -> dict:
+        """
+        Returns:
+            dict: Perfil, solicitudes bloqueadas (total y por tipo), solicitudes permitidas
+            y bytes ahorrados estimados. El ahorro no se mide: es la cantidad de solicitudes
+            bloqueadas por el tamaño promedio fijo de su tipo (`tamano_estimado`).
+        """
+        return {
+            "perfil": self.perfil,
+            "solicitudes_bloqueadas": sum(self.bloqueadas.values()),
+            "bloqueadas_por_tipo": dict(self.bloqueadas),
+            "solicitudes_permitidas": self.permitidas,
+            "bytes_ahorrados_estimados": sum(
+                tamano_estimado.get(tipo, 10_000) * cantidad for tipo, cantidad in self.bloqueadas.items()
+            ),
+            "metodo_ahorro": "estimado con tamaños promedio fijos por tipo, no medido",
+        }
+
+    def registrar_reporte(self):
+        reporte = self.reporte()
+        if reporte["solicitudes_bloqueadas"]:
+            logging.info(
+                f"Bloqueo '{self.perfil}': {reporte['solicitudes_bloqueadas']} solicitudes bloqueadas "
+                f"(ahorro estimado, no medido: ~{reporte['bytes_ahorrados_estimados'] / 1_000_000:.1f} MB), "
+                f"{reporte['solicitudes_permitidas']} permitidas"
+            )
@@ -0,0 +1,207 @@
+import re
+import json
+import asyncio
+import logging
+
+# Nombres de campo de la API -> llaves de info_fichas.
+# Los nombres de la API coinciden con los formcontrolname del formulario Angular;
+# se aceptan alternativas por si un endpoint usa otra convención.
+mapeo_campos_api = {
+    "codigo": ["code", "codigo", "cod"],
+    "titulo_corto": ["shorttitle", "shortTitle"],
+    "titulo_largo": ["longtitle", "longTitle"],
+    "sumilla": ["summary"],
+    "fecha_publicacion": ["publication"],
+    "ultima_actualizacion": ["lastUpdated", "lastupdated"],
+    "tags": ["tags"],
+    "estado": ["status", "state", "estado"],
+    "tematica": ["idtematic"],
+    "departamento": ["dpto", "departamento", "department"],
+}
+
+# Campos sin los cuales un registro capturado no reemplaza la lectura del formulario
+campos_obligatorios = ["titulo_corto", "titulo_largo", "sumilla", "fecha_publicacion",
+                       "ultima_actualizacion", "tags", "tematica"]
+
+patron_fecha = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+
+def _primer_valor(objeto: dict, llaves: list[str]):
+    for llave in llaves:
+        if llave in objeto:
+            return objeto[llave]
+    return None
+
+
+def _normalizar_estado(valor):
+    if isinstance(valor, bool) or isinstance(valor, int):
+        return "Activo" if valor else "Inactivo"
+    if isinstance(valor, str):
+        return valor.strip().capitalize()
+    return valor
+
+
+def _normalizar_fecha(valor):
+    if isinstance(valor, str):
+        match = patron_fecha.match(valor)
+        return match.group(1) if match else valor
+    return valor
+
+
+def normalizar_registro(objeto: dict, mapeo_tematica: dict) -> dict | None:
+    """
+    Convierte un objeto JSON de la API en un registro con la forma de `info_fichas`.
+
+    Args:
+        objeto (dict): Objeto de la respuesta de la API.
+        mapeo_tematica (dict): Id de temática -> nombre.
+
+    Returns:
+        dict | None: Registro normalizado (incluye la llave 'codigo'), o None si el
+        objeto no parece una ficha.
+    """
+    codigo = _primer_valor(objeto, mapeo_campos_api["codigo"])
+    reconocidos = sum(
+        1 for campo, llaves in mapeo_campos_api.items()
+        if campo != "codigo" and _primer_valor(objeto, llaves) is not None
+    )
+    if not isinstance(codigo, str) or reconocidos < 2:
+        return None
+
+    registro = {"codigo": codigo.strip()}
+    for campo, llaves in mapeo_campos_api.items():
+        if campo == "codigo":
+            continue
+        valor = _primer_valor(objeto, llaves)
+        if valor is None:
+            continue
+        if campo == "estado":
+            valor = _normalizar_estado(valor)
+        elif campo in ("fecha_publicacion", "ultima_actualizacion"):
+            valor = _normalizar_fecha(valor)
+        elif campo == "tematica":
+            valor = mapeo_tematica.get(str(valor), "Desconocido")
+        elif campo == "departamento" and isinstance(valor, dict):
+            valor = _primer_valor(valor, ["name", "nombre", "description", "descripcion"])
+        registro[campo] = valor
+    return registro
+
+
+def _recorrer(payload):
+    """
+    Recorre un JSON anidado y devuelve todos los diccionarios que contiene.
+    """
+    pendientes = [payload]
+    while pendientes:
+        actual = pendientes.pop()
+        if isinstance(actual, dict):
+            yield actual
+            pendientes.extend(actual.values())
+        elif isinstance(actual, list):
+            pendientes.extend(actual)
+
+
+class CapturaRed():
+    """
+    Captura las respuestas JSON (XHR/fetch) que el panel Angular recibe de su API
+    y las normaliza en registros con la forma de `info_fichas`.
+
+    Uso:
+        captura = CapturaRed(mapeo_tematica)
+        captura.instalar(page)
+        ... navegar ...
+        registros = await captura.registros()
+    """
+
+    def __init__(self, mapeo_tematica: dict, filtro_url: str = r"/api/"):
+        """
+        Args:
+            mapeo_tematica (dict): Id de temática -> nombre.
+            filtro_url (str): Expresión regular que deben cumplir las URL capturadas.
+        """
+        self.mapeo_tematica = mapeo_tematica
+        self.filtro_url = re.compile(filtro_url)
+        self.respuestas: list[tuple[str, object]] = []
+        self._registros: dict[str, dict] = {}
+        self._pendientes: set[asyncio.Task] = set()
+        self._nuevo_registro = asyncio.Event()
+
+    def instalar(self, page):
+        """
+        Registra el manejador de respuestas en la página.
+        """
+        page.on("response", self._al_recibir)
+
+    def quitar(self, page):
+        page.remove_listener("response", self._al_recibir)
+
+    def _al_recibir(self, response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        if not self.filtro_url.search(response.url):
+            return
+        # Leer el cuerpo de inmediato: Chromium puede descartarlo al navegar
+        tarea = asyncio.ensure_future(self._leer(response))
+        self._pendientes.add(tarea)
+        tarea.add_done_callback(self._pendientes.discard)
+
+    async def _leer(self, response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            logging.debug(f"No se pudo leer el JSON de {response.url}: {e}")
+            return
+        self.respuestas.append((response.url, payload))
+        for objeto in _recorrer(payload):
+            registro = normalizar_registro(objeto, self.mapeo_tematica)
+            if registro:
+                # Un detalle posterior completa lo que trajo la lista
+                self._registros.setdefault(registro["codigo"], {}).update(registro)
+                self._nuevo_registro.set()
+
+    async def _drenar(self):
+        if self._pendientes:
+            await asyncio.gather(*list(self._pendientes), return_exceptions=True)
+
+    async def registros(self) -> dict[str, dict]:
+        """
+        Espera las respuestas en curso y devuelve los registros capturados por código.
+        """
+        await self._drenar()
+        return self._registros
+
+    def completo(self, codigo: str) -> bool:
+        registro = self._registros.get(codigo, {})
+        return all(registro.get(campo) is not None for campo in campos_obligatorios)
+
+    async def esperar_registro(self, codigo: str, timeout: float = 10) -> dict | None:
+        """
+        Espera a que llegue un registro completo para `codigo`.
+
+        Returns:
+            dict | None: El registro, o None si no llegó a tiempo.
+        """
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + timeout
+        while True:
+            self._nuevo_registro.clear()
+            await self._drenar()
+            if self.completo(codigo):
+                return self._registros[codigo]
+            restante = limite - loop.time()
+            if restante <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._nuevo_registro.wait(), timeout=restante)
+            except asyncio.TimeoutError:
+                pass
+
+    def guardar_respuestas(self, ruta: str):
+        """
+        Guarda las respuestas capturadas en un archivo JSONL (url, payload) para reproducirlas después.
+        """
+        with open(ruta, "w", encoding="utf-8") as file:
+            for url, payload in self.respuestas:
+                file.write(json.dumps({"url": url, "payload": payload}, ensure_ascii=False) + "\n")
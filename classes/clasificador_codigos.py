@@ -0,0 +1,113 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import NamedTuple
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+ruta_dict = os.path.join(script_dir, "..", "datasets", "rubros_subrubros.json")
+ruta_dict_admin = os.path.join(script_dir, "..", "datasets", "rubros_subrubros_admin.json")
+
+
+class Clasificacion(NamedTuple):
+    rubro: str | None
+    subrubro: str | None
+    departamento: str | None
+
+
+def _compilar_alternancia(patrones: list[tuple[tuple, str]]):
+    """
+    Compila una lista de (etiqueta, patrón) en una sola expresión regular con un grupo
+    nombrado por patrón. El orden de la alternancia respeta el orden de la lista, así que
+    el resultado es el mismo que recorrer los patrones uno por uno con `re.match`.
+
+    Returns:
+        tuple: (patrón compilado, diccionario nombre de grupo -> etiqueta)
+    """
+    grupos = {}
+    alternativas = []
+    for indice, (etiqueta, patron) in enumerate(patrones):
+        nombre = f"p{indice}"
+        grupos[nombre] = etiqueta
+        alternativas.append(f"(?P<{nombre}>{patron})")
+    return re.compile("|".join(alternativas)), grupos
+
+
+class ClasificadorCodigos():
+    """
+    Clasifica códigos de ficha en (rubro, subrubro, departamento) con una sola
+    expresión regular compilada por diccionario.
+
+    - El rubro y subrubro salen de `rubros_subrubros_admin.json`, que son los nombres
+      usados para navegar el panel de administrador.
+    - El departamento sale de las tablas territoriales de `rubros_subrubros.json`.
+      Si un código no está en el diccionario admin, el rubro y subrubro se toman de este.
+    """
+
+    def __init__(self, rubros_subrubros_admin: dict, rubros_subrubros: dict):
+        patrones_admin = [
+            ((rubro, subrubro), patron)
+            for rubro, subrubros in rubros_subrubros_admin.items()
+            for subrubro, patron in subrubros.items()
+        ]
+
+        patrones = []
+        for rubro, subrubros in rubros_subrubros.items():
+            for subrubro, valor in subrubros.items():
+                if isinstance(valor, dict):
+                    patrones.extend(((rubro, subrubro, departamento), patron) for departamento, patron in valor.items())
+                else:
+                    patrones.append(((rubro, subrubro, None), valor))
+
+        self._patron_admin, self._grupos_admin = _compilar_alternancia(patrones_admin)
+        self._patron, self._grupos = _compilar_alternancia(patrones)
+        self.clasificar = lru_cache(maxsize=None)(self._clasificar)
+
+    def _clasificar(self, codigo: str) -> Clasificacion:
+        """
+        Clasifica un código de ficha.
+
+        Args:
+            codigo (str): Código de la ficha (por ejemplo, 't12_ama').
+
+        Returns:
+            Clasificacion: (rubro, subrubro, departamento). Los campos que no se
+            puedan determinar son None.
+        """
+        rubro = subrubro = departamento = None
+
+        match = self._patron.match(codigo)
+        if match:
+            rubro, subrubro, departamento = self._grupos[match.lastgroup]
+
+        match_admin = self._patron_admin.match(codigo)
+        if match_admin:
+            rubro, subrubro = self._grupos_admin[match_admin.lastgroup]
+
+        return Clasificacion(rubro, subrubro, departamento)
+
+    def clasificar_muchos(self, codigos) -> dict[str, Clasificacion]:
+        """
+        Clasifica una colección de códigos de una sola vez.
+
+        Args:
+            codigos (Iterable[str]): Códigos de ficha, por ejemplo las llaves de `info_obs.json`.
+
+        Returns:
+            dict: Código -> Clasificacion.
+        """
+        clasificar = self.clasificar
+        return {codigo: clasificar(codigo) for codigo in codigos}
+
+
+@lru_cache(maxsize=1)
+def clasificador_por_defecto() -> ClasificadorCodigos:
+    """
+    Devuelve el clasificador construido con los diccionarios de la carpeta 'datasets'.
+    Se compila una sola vez por proceso.
+    """
+    with open(ruta_dict_admin, "r", encoding="utf-8") as file:
+        rubros_subrubros_admin = json.load(file)
+    with open(ruta_dict, "r", encoding="utf-8") as file:
+        rubros_subrubros = json.load(file)
+    return ClasificadorCodigos(rubros_subrubros_admin, rubros_subrubros)
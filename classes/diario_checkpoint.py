@@ -0,0 +1,138 @@
+import os
+import json
+import logging
+
+
+def abrir_para_anexar(ruta: str):
+    """
+    Abre un archivo JSONL en modo anexado. Si el proceso anterior se interrumpió a mitad de
+    una línea, primero recorta esa línea incompleta; si no, el siguiente registro quedaría
+    pegado a ella y se perdería al leer.
+
+    Returns:
+        El archivo abierto en modo "a" (UTF-8).
+    """
+    if os.path.exists(ruta):
+        with open(ruta, "rb+") as file:
+            file.seek(0, os.SEEK_END)
+            tamano = file.tell()
+            fin = tamano
+            # Buscar el último salto de línea leyendo desde el final
+            while fin > 0:
+                inicio = max(0, fin - 4096)
+                file.seek(inicio)
+                bloque = file.read(fin - inicio)
+                posicion = bloque.rfind(b"\n")
+                if posicion != -1:
+                    fin = inicio + posicion + 1
+                    break
+                fin = inicio
+            if fin < tamano:
+                logging.warning(f"Se descartan {tamano - fin} bytes de una línea incompleta al final de {ruta}")
+                file.truncate(fin)
+    return open(ruta, "a", encoding="utf-8")
+
+
+class DiarioCheckpoint():
+    """
+    Diario de solo anexado para crawls largos que se pueden reanudar.
+
+    Cada ficha terminada se escribe como una línea JSON {"codigo": ..., "datos": ...}.
+    Las escrituras se sincronizan a disco (fsync) por lotes. Al reiniciar, `completados`
+    devuelve lo que ya se procesó para poder saltarlo, y `consolidar` genera el archivo
+    final con todo el contenido del diario.
+    """
+
+    def __init__(self, ruta: str, fsync_cada: int = 25):
+        """
+        Args:
+            ruta (str): Archivo JSONL del diario.
+            fsync_cada (int): Número de registros entre cada fsync.
+        """
+        self.ruta = ruta
+        self.fsync_cada = fsync_cada
+        self._completados = self._leer()
+        self._sin_sincronizar = 0
+        self._archivo = abrir_para_anexar(self.ruta)
+
+    def _leer(self) -> dict:
+        completados = {}
+        if not os.path.exists(self.ruta):
+            return completados
+        with open(self.ruta, "r", encoding="utf-8") as file:
+            for numero, linea in enumerate(file, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    # La última línea puede quedar truncada si el proceso se interrumpió
+                    logging.warning(f"Línea {numero} inválida en {self.ruta}, se omite")
+                    continue
+                completados[entrada["codigo"]] = entrada["datos"]
+        return completados
+
+    @property
+    def completados(self) -> dict:
+        """
+        Registros ya terminados, por código.
+        """
+        return self._completados
+
+    def pendientes(self, codigos) -> list[str]:
+        """
+        Filtra los códigos que todavía no están en el diario.
+        """
+        return [codigo for codigo in codigos if codigo not in self._completados]
+
+    def registrar(self, codigo: str, datos):
+        """
+        Anexa el resultado de una ficha terminada.
+        """
+        self._archivo.write(json.dumps({"codigo": codigo, "datos": datos}, ensure_ascii=False) + "\n")
+        self._completados[codigo] = datos
+        self._sin_sincronizar += 1
+        if self._sin_sincronizar >= self.fsync_cada:
+            self.sincronizar()
+
+    def sincronizar(self):
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self._sin_sincronizar = 0
+
+    def consolidar(self, ruta_salida: str) -> int:
+        """
+        Escribe el contenido del diario en un archivo JSON {codigo: datos}.
+
+        Returns:
+            int: Número de registros consolidados.
+        """
+        self.sincronizar()
+        ruta_temporal = f"{ruta_salida}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as file:
+            json.dump(self._completados, file, ensure_ascii=False, indent=4)
+        os.replace(ruta_temporal, ruta_salida)
+        return len(self._completados)
+
+    def rotar(self) -> str:
+        """
+        Cierra el ciclo de un crawl ya consolidado: mueve el diario a `<ruta>.anterior`
+        (reemplazando el de la rotación previa) y sigue con uno vacío. Sin esto, la siguiente
+        ejecución vería todas las fichas como terminadas y volvería a consolidar datos viejos.
+
+        Returns:
+            str: Ruta del diario rotado.
+        """
+        self.sincronizar()
+        self._archivo.close()
+        ruta_anterior = f"{self.ruta}.anterior"
+        os.replace(self.ruta, ruta_anterior)
+        self._completados = {}
+        self._sin_sincronizar = 0
+        self._archivo = abrir_para_anexar(self.ruta)
+        return ruta_anterior
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self.sincronizar()
+            self._archivo.close()
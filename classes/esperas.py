@@ -0,0 +1,121 @@
+import time
+import logging
+from contextlib import asynccontextmanager
+
+# Métodos HTTP que corresponden a un guardado en la API del panel
+metodos_guardado = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class EstrategiaEspera():
+    """
+    Capa de esperas para las acciones sobre el panel de administrador.
+
+    Perfiles:
+        "eventos": espera las señales reales de fin de acción (respuesta XHR del guardado,
+            re-render de la tabla, diálogos) y no agrega pausas fijas.
+        "fijo": conserva las pausas fijas de `timeout` milisegundos después de cada acción,
+            como respaldo para cuando la página no emite las señales esperadas.
+
+    En ambos perfiles registra cuánto tardó realmente cada espera.
+    """
+
+    def __init__(self, perfil: str = "eventos", timeout: int = 150, timeout_maximo: int = 15000):
+        """
+        Args:
+            perfil (str): "eventos" o "fijo".
+            timeout (int): Pausa en milisegundos del perfil "fijo".
+            timeout_maximo (int): Tiempo máximo en milisegundos para esperar una señal.
+        """
+        if perfil not in ("eventos", "fijo"):
+            raise ValueError(f"Perfil de espera no válido: {perfil}")
+        self.perfil = perfil
+        self.timeout = timeout
+        self.timeout_maximo = timeout_maximo
+        self.tiempos: dict[str, list[float]] = {}
+
+    def _registrar(self, nombre: str, inicio: float):
+        self.tiempos.setdefault(nombre, []).append((time.perf_counter() - inicio) * 1000)
+
+    async def pausa(self, page, nombre: str = "pausa"):
+        """
+        Pausa fija solo en el perfil "fijo"; en el perfil "eventos" no hace nada.
+        """
+        if self.perfil != "fijo":
+            return
+        inicio = time.perf_counter()
+        await page.wait_for_timeout(self.timeout)
+        self._registrar(nombre, inicio)
+
+    async def tabla(self, page, nombre: str = "tabla"):
+        """
+        Espera a que la tabla 'tr.tbody-detail' vuelva a estar visible.
+        """
+        inicio = time.perf_counter()
+        await page.wait_for_selector('tr.tbody-detail', state='visible', timeout=self.timeout_maximo)
+        self._registrar(nombre, inicio)
+
+    @asynccontextmanager
+    async def guardado(self, page, nombre: str = "guardado", tabla: bool = True):
+        """
+        Envuelve la acción que dispara un guardado (normalmente el clic en 'Guardar').
+        En el perfil "eventos" espera la respuesta XHR del guardado y, si `tabla` es True,
+        el re-render de la tabla. En el perfil "fijo" hace una pausa fija.
+
+        Uso:
+            async with esperas.guardado(page):
+                await page.click('button[type="submit"]')
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        inicio = time.perf_counter()
+        if self.perfil == "fijo":
+            yield
+            await page.wait_for_timeout(self.timeout)
+        else:
+            accion_terminada = False
+            try:
+                async with page.expect_response(
+                    lambda r: r.request.method in metodos_guardado and r.request.resource_type in ("xhr", "fetch"),
+                    timeout=self.timeout_maximo
+                ) as respuesta:
+                    yield
+                    accion_terminada = True
+                respuesta = await respuesta.value
+                if not respuesta.ok:
+                    logging.warning(f"El guardado respondió {respuesta.status}: {respuesta.url}")
+            except PlaywrightTimeoutError:
+                # Un timeout de la propia acción se propaga; solo se tolera la falta de respuesta
+                if not accion_terminada:
+                    raise
+                logging.warning(f"No se recibió la respuesta del guardado en {self.timeout_maximo} ms")
+        if tabla:
+            await page.wait_for_selector('tr.tbody-detail', state='visible', timeout=self.timeout_maximo)
+        self._registrar(nombre, inicio)
+
+    @asynccontextmanager
+    async def dialogo(self, page, nombre: str = "dialogo"):
+        """
+        Envuelve la acción que abre un diálogo y lo acepta cuando aparece.
+        """
+        inicio = time.perf_counter()
+        async with page.expect_event("dialog", timeout=self.timeout_maximo) as evento:
+            yield
+        dialog = await evento.value
+        print(f"Mensaje del diálogo: {dialog.message}")
+        await dialog.accept()
+        self._registrar(nombre, inicio)
+
+    def reporte(self) -> dict:
+        """
+        Returns:
+            dict: Por nombre de espera: cantidad, total, promedio y máximo en milisegundos.
+        """
+        return {
+            nombre: {
+                "cantidad": len(valores),
+                "total_ms": round(sum(valores), 1),
+                "promedio_ms": round(sum(valores) / len(valores), 1),
+                "maximo_ms": round(max(valores), 1),
+            }
+            for nombre, valores in self.tiempos.items() if valores
+        }
@@ -0,0 +1,122 @@
+import re
+import asyncio
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+url_observatorio = 'https://observatorio.ceplan.gob.pe'
+
+# Ids de Datawrapper tal como aparecen en el HTML o en el JSON de la API
+patrones_ids = [
+    re.compile(r'datawrapper-chart-([a-zA-Z0-9]+)'),
+    re.compile(r'datawrapper\.dwcdn\.net/([a-zA-Z0-9]+)'),
+]
+
+# Raíz vacía de la aplicación Angular: la página necesita JavaScript para mostrar los gráficos
+patron_shell_spa = re.compile(r'<app-root[^>]*>\s*</app-root>', re.IGNORECASE)
+
+
+def extraer_ids(texto: str) -> list[str]:
+    """
+    Extrae los ids de los gráficos Datawrapper de un HTML o JSON, sin duplicados y en orden de aparición.
+    """
+    encontrados = []
+    for match in sorted(
+        (m for patron in patrones_ids for m in patron.finditer(texto)),
+        key=lambda m: m.start()
+    ):
+        chart_id = match.group(1)
+        if chart_id not in encontrados:
+            encontrados.append(chart_id)
+    return encontrados
+
+
+class ExtractorGraficosHTTP():
+    """
+    Obtiene los códigos de los gráficos Datawrapper de las fichas por HTTP, sin navegador.
+
+    Usa una sesión de `requests` con un pool de conexiones y reintentos. Para cada ficha
+    consulta primero la API JSON (si se configuró `url_api`) y luego la página pública.
+    Cuando la respuesta es solo la raíz vacía de la aplicación Angular, devuelve None para
+    que esa ficha se procese con el navegador.
+    """
+
+    def __init__(self, tareas: int = 20, url_api: str | None = None, timeout: float = 15,
+                 url_base: str = url_observatorio):
+        """
+        Args:
+            tareas (int): Número máximo de solicitudes simultáneas (y tamaño del pool de conexiones).
+            url_api (str, optional): Plantilla de la URL de la API con `{codigo}`, por ejemplo
+                'https://observatorio.ceplan.gob.pe/api/ficha/{codigo}'.
+            timeout (float): Timeout en segundos de cada solicitud.
+            url_base (str): Raíz del sitio de las páginas públicas de las fichas.
+        """
+        self.tareas = tareas
+        self.url_api = url_api
+        self.timeout = timeout
+        self.url_base = url_base.rstrip('/')
+        self.session = requests.Session()
+        reintentos = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adaptador = HTTPAdapter(pool_connections=tareas, pool_maxsize=tareas, max_retries=reintentos)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def obtener(self, codigo: str) -> list[str] | None:
+        """
+        Obtiene los ids de los gráficos de una ficha.
+
+        Returns:
+            list[str] | None: Ids encontrados (puede ser una lista vacía), o None si la
+            página necesita JavaScript para mostrarlos.
+        """
+        if self.url_api:
+            respuesta = self.session.get(self.url_api.format(codigo=codigo), timeout=self.timeout)
+            if respuesta.ok:
+                ids = extraer_ids(respuesta.text)
+                if ids:
+                    return ids
+
+        respuesta = self.session.get(f'{self.url_base}/ficha/{codigo}', timeout=self.timeout)
+        respuesta.raise_for_status()
+        ids = extraer_ids(respuesta.text)
+        if not ids and patron_shell_spa.search(respuesta.text):
+            return None
+        return ids
+
+    async def obtener_muchos(self, codigos: list[str], al_obtener=None) -> tuple[dict[str, dict], list[str]]:
+        """
+        Consulta varias fichas en paralelo.
+
+        Args:
+            codigos (list[str]): Fichas a consultar.
+            al_obtener (callable, optional): Función (codigo, ids) que se llama en cuanto
+                termina cada ficha, por ejemplo para anexarla a un diario.
+
+        Returns:
+            tuple: (figuras, pendientes). `figuras` tiene el formato {codigo: {"figuras": [...]}}
+            y `pendientes` son los códigos que necesitan el navegador (o que fallaron).
+        """
+        sem = asyncio.Semaphore(self.tareas)
+        figuras = {}
+        pendientes = []
+
+        async def procesar(codigo):
+            async with sem:
+                try:
+                    ids = await asyncio.to_thread(self.obtener, codigo)
+                except Exception as e:
+                    logging.warning(f"Error HTTP con el código {codigo}: {e}")
+                    ids = None
+            if ids is None:
+                pendientes.append(codigo)
+            else:
+                figuras[codigo] = {"figuras": ids}
+                if al_obtener:
+                    al_obtener(codigo, ids)
+
+        await asyncio.gather(*(procesar(codigo) for codigo in codigos))
+        return figuras, pendientes
+
+    def cerrar(self):
+        self.session.close()
@@ -0,0 +1,183 @@
+import os
+import csv
+import math
+import json
+import time
+import inspect
+import logging
+import functools
+from contextlib import contextmanager
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+directorio_logs = os.path.abspath(os.path.join(script_dir, "..", "logs"))
+ruta_log = os.path.join(directorio_logs, "obtener_metadata.log")
+
+
+def configurar_logging(ruta: str = ruta_log, nivel: int = logging.INFO):
+    """
+    Configura el logging de un script: archivo en UTF-8 (modo append) y consola.
+    Las clases no configuran el logging; cada script lo hace al ejecutarse.
+
+    Args:
+        ruta (str): Archivo de log.
+        nivel (int): Nivel de registro (INFO, DEBUG, WARNING, ERROR, CRITICAL).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    logging.basicConfig(
+        level=nivel,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(ruta, mode='a', encoding='utf-8'),
+            logging.StreamHandler()  # También mostrar logs en la consola
+        ]
+    )
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    """
+    Percentil por rango más cercano de una lista ya ordenada.
+    """
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+class RegistroTiempos():
+    """
+    Registro de tramos (spans) de tiempo: una entrada por paso ejecutado, con el código de la
+    ficha, el nombre del paso, la duración y si terminó bien. `resumen` agrega p50/p95/máximo
+    por paso y `exportar` escribe el detalle en JSON o CSV.
+    """
+
+    def __init__(self):
+        self.tramos: list[dict] = []
+
+    def registrar(self, paso: str, duracion_ms: float, codigo: str | None = None, ok: bool = True):
+        self.tramos.append({
+            "inicio": round(time.time() - duracion_ms / 1000, 3),
+            "codigo": codigo,
+            "paso": paso,
+            "duracion_ms": round(duracion_ms, 1),
+            "ok": ok,
+        })
+
+    @contextmanager
+    def tramo(self, paso: str, codigo: str | None = None):
+        """
+        Mide el bloque `with` como un tramo.
+
+        Uso:
+            with registro_tiempos.tramo("login"):
+                await sesion.login()
+        """
+        inicio = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.registrar(paso, (time.perf_counter() - inicio) * 1000, codigo, ok)
+
+    def resumen(self) -> dict:
+        """
+        Returns:
+            dict: Por paso (ordenado por tiempo total): cantidad, fallos, total, p50, p95 y máximo en ms.
+        """
+        por_paso: dict[str, list[dict]] = {}
+        for tramo in self.tramos:
+            por_paso.setdefault(tramo["paso"], []).append(tramo)
+
+        resumen = {}
+        for paso, tramos in por_paso.items():
+            duraciones = sorted(t["duracion_ms"] for t in tramos)
+            resumen[paso] = {
+                "cantidad": len(duraciones),
+                "fallos": sum(not t["ok"] for t in tramos),
+                "total_ms": round(sum(duraciones), 1),
+                "p50_ms": _percentil(duraciones, 50),
+                "p95_ms": _percentil(duraciones, 95),
+                "max_ms": duraciones[-1],
+            }
+        return dict(sorted(resumen.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def exportar(self, ruta: str) -> str:
+        """
+        Escribe el reporte. Con extensión .csv, una fila por tramo; si no, un JSON con
+        el resumen por paso y todos los tramos.
+
+        Returns:
+            str: Ruta escrita.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        if ruta.endswith(".csv"):
+            with open(ruta, "w", encoding="utf-8", newline="") as file:
+                escritor = csv.DictWriter(file, fieldnames=["inicio", "codigo", "paso", "duracion_ms", "ok"])
+                escritor.writeheader()
+                escritor.writerows(self.tramos)
+        else:
+            with open(ruta, "w", encoding="utf-8") as file:
+                json.dump({"resumen": self.resumen(), "tramos": self.tramos}, file, ensure_ascii=False, indent=4)
+        return ruta
+
+    def imprimir_resumen(self, limite: int = 8):
+        """
+        Imprime los `limite` pasos con más tiempo total.
+        """
+        for paso, datos in list(self.resumen().items())[:limite]:
+            print(f"  {paso}: {datos['cantidad']} llamadas, {datos['fallos']} fallos, "
+                  f"p50 {datos['p50_ms']} ms, p95 {datos['p95_ms']} ms, máx {datos['max_ms']} ms")
+
+    def limpiar(self):
+        self.tramos = []
+
+
+# Registro compartido por todas las sesiones del proceso
+registro_tiempos = RegistroTiempos()
+
+
+def medir(paso: str | None = None, trazar: bool = False):
+    """
+    Decorador para métodos asíncronos de NavegadorObs y sus subclases: registra un tramo en
+    `self.tiempos` con la duración de cada llamada.
+
+    El código de la ficha se toma del argumento `codigo` o `codigo_ficha` del método; los
+    métodos sin ese argumento (llenar_campo, guardar_formulario, ...) heredan el código de la
+    llamada que los contiene.
+
+    Args:
+        paso (str, optional): Nombre del paso. Por defecto, el nombre del método.
+        trazar (bool): Si es True y la sesión tiene `trazar_lentos`, la llamada se graba con
+            Playwright tracing y la traza se guarda solo si supera ese umbral.
+    """
+    def decorador(funcion):
+        nombre = paso or funcion.__name__
+        parametros = list(inspect.signature(funcion).parameters)
+        nombre_codigo = next((p for p in parametros if p in ("codigo", "codigo_ficha")), None)
+        posicion_codigo = parametros.index(nombre_codigo) - 1 if nombre_codigo else None
+
+        @functools.wraps(funcion)
+        async def envoltura(self, *args, **kwargs):
+            registro = getattr(self, "tiempos", None)
+            if registro is None:
+                return await funcion(self, *args, **kwargs)
+
+            anterior = getattr(self, "_codigo_actual", None)
+            codigo = kwargs.get(nombre_codigo) if nombre_codigo in kwargs else (
+                args[posicion_codigo] if posicion_codigo is not None and len(args) > posicion_codigo else None)
+            self._codigo_actual = codigo or anterior
+
+            traza = trazar and await self._iniciar_traza()
+            inicio = time.perf_counter()
+            ok = False
+            try:
+                resultado = await funcion(self, *args, **kwargs)
+                ok = True
+                return resultado
+            finally:
+                duracion = (time.perf_counter() - inicio) * 1000
+                registro.registrar(nombre, duracion, self._codigo_actual, ok)
+                if traza:
+                    await self._terminar_traza(nombre, self._codigo_actual, duracion)
+                self._codigo_actual = anterior
+
+        return envoltura
+    return decorador
@@ -0,0 +1,154 @@
+import os
+import asyncio
+from RPA_Ceplan.classes.bloqueo_recursos import BloqueoRecursos
+
+
+def rss_procesos_hijos() -> float | None:
+    """
+    Suma la memoria residente (RSS) de todos los procesos descendientes del proceso actual
+    (el driver de Playwright y los procesos de Chromium).
+
+    Returns:
+        float | None: RSS total en MB, o None si el sistema no tiene /proc.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    padres = {}
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "r") as file:
+                # El nombre del proceso va entre paréntesis y puede tener espacios
+                campos = file.read().rsplit(")", 1)[1].split()
+            padres[int(pid)] = int(campos[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    descendientes = set()
+    pendientes = [os.getpid()]
+    while pendientes:
+        actual = pendientes.pop()
+        for pid, padre in padres.items():
+            if padre == actual and pid not in descendientes:
+                descendientes.add(pid)
+                pendientes.append(pid)
+
+    total_kb = 0
+    for pid in descendientes:
+        try:
+            with open(f"/proc/{pid}/status", "r") as file:
+                for linea in file:
+                    if linea.startswith("VmRSS:"):
+                        total_kb += int(linea.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1)
+
+
+class NavegadorCompartido():
+    """
+    Un solo proceso de Chromium para varias sesiones NavegadorObs.
+
+    Cada sesión abre una pestaña en lugar de lanzar su propio navegador. Por defecto todas
+    las pestañas comparten un contexto (y por lo tanto las cookies del login); con
+    `aislado=True` cada sesión tiene su propio contexto, creado a partir del estado
+    autenticado de la primera sesión que inicia sesión. El número de pestañas abiertas
+    a la vez está limitado por `limite_pestanas`.
+
+    Uso:
+        async with NavegadorCompartido(limite_pestanas=16) as navegador:
+            async with PoolSesiones(ReaderObs, tamano=16, navegador=navegador) as pool:
+                ...
+    """
+
+    def __init__(self, headless: bool = True, limite_pestanas: int = 16, aislado: bool = False,
+                 perfil_bloqueo: str = "admin-minimal", slow_mo: int = 0):
+        """
+        Args:
+            headless (bool): Si es True, el navegador se lanza sin interfaz gráfica.
+            limite_pestanas (int): Máximo de pestañas abiertas a la vez en este proceso. Las sesiones
+                que pidan una pestaña por encima del límite esperan a que otra se cierre.
+            aislado (bool): Si es True, cada pestaña va en su propio contexto.
+            perfil_bloqueo (str): Perfil de `bloqueo_recursos.perfiles_bloqueo` para todos los contextos.
+            slow_mo (int): `slow_mo` del navegador en milisegundos.
+        """
+        self.headless = headless
+        self.limite_pestanas = limite_pestanas
+        self.aislado = aislado
+        self.slow_mo = slow_mo
+        self.bloqueo = BloqueoRecursos(perfil_bloqueo)
+        self.playwright = None
+        self.browser = None
+        self.estado = None  # storage_state de la primera sesión autenticada
+        self.candado_login = asyncio.Lock()
+        self._cupos = asyncio.Semaphore(limite_pestanas)
+        self._contexto = None
+        self._contextos: dict = {}  # página -> contexto propio (solo en modo aislado)
+        self.pestanas_abiertas = 0
+
+    async def __aenter__(self):
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cerrar()
+
+    async def iniciar(self):
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, slow_mo=self.slow_mo)
+
+    async def _nuevo_contexto(self, estado):
+        context = await self.browser.new_context(viewport={"width": 1920, "height": 1080}, storage_state=estado)
+        await self.bloqueo.instalar(context)
+        return context
+
+    async def abrir_pagina(self, estado=None):
+        """
+        Abre una pestaña; espera si ya hay `limite_pestanas` abiertas.
+
+        Args:
+            estado (dict, optional): storage_state para el contexto nuevo. Si es None, se usa el
+                estado autenticado ya conocido. En modo compartido solo se usa al crear el contexto.
+        """
+        await self._cupos.acquire()
+        try:
+            if self.aislado:
+                context = await self._nuevo_contexto(estado or self.estado)
+                page = await context.new_page()
+                self._contextos[page] = context
+            else:
+                if self._contexto is None:
+                    self._contexto = await self._nuevo_contexto(estado or self.estado)
+                page = await self._contexto.new_page()
+        except Exception:
+            self._cupos.release()
+            raise
+        self.pestanas_abiertas += 1
+        return page
+
+    async def cerrar_pagina(self, page):
+        """
+        Cierra una pestaña (y su contexto en modo aislado) y libera su cupo.
+        """
+        try:
+            context = self._contextos.pop(page, None)
+            if context is not None:
+                await context.close()
+            elif not page.is_closed():
+                await page.close()
+        finally:
+            self.pestanas_abiertas -= 1
+            self._cupos.release()
+
+    async def cerrar(self):
+        self.bloqueo.registrar_reporte()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
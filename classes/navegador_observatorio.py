@@ -1,40 +1,50 @@
-from tqdm.asyncio import tqdm_asyncio
-from playwright.async_api import async_playwright
 import re
 from datetime import datetime
-from dotenv import load_dotenv
+from functools import lru_cache
 import os
 import json
 import logging
 import random
-from tqdm import tqdm
-
-# Credenciales
-load_dotenv()
-EMAIL = os.getenv("EMAIL")
-PASS = os.getenv("PASS")
+import time
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+from RPA_Ceplan.classes.clasificador_codigos import clasificador_por_defecto
+from RPA_Ceplan.classes.captura_red import CapturaRed
+from RPA_Ceplan.classes.bloqueo_recursos import BloqueoRecursos
+from RPA_Ceplan.classes.esperas import EstrategiaEspera
+from RPA_Ceplan.classes.almacen_resultados import AlmacenResultados
+from RPA_Ceplan.classes.navegador_compartido import rss_procesos_hijos
+from RPA_Ceplan.classes.politica_reintentos import PoliticaReintentos
+from RPA_Ceplan.classes.instrumentacion import RegistroTiempos, registro_tiempos, medir, directorio_logs
 
 # Variables globales
+# Este módulo no lee archivos ni configura el logging al importarse: las credenciales, los
+# diccionarios y Playwright se cargan la primera vez que se necesitan, y el logging lo
+# configura el script que se ejecuta (ver instrumentacion.configurar_logging).
 script_dir = os.path.abspath(os.path.dirname(__file__))
 ruta_dict = os.path.join(script_dir, "..", "datasets", "rubros_subrubros.json")
+ruta_dict_2 = os.path.join(script_dir, "..", "datasets", "rubros_subrubros_admin.json")
 directorio_salida = os.path.abspath(os.path.join(script_dir, "..", "datasets"))  # Subcarpeta 'datasets'
-log_path = os.path.join(script_dir, "..", "logs", "obtener_metadata.log")
+ruta_estado_sesion = os.path.join(script_dir, "..", ".sesion", "estado_sesion.json")  # Caché de login entre ejecuciones
+url_observatorio = 'https://observatorio.ceplan.gob.pe'
 
-# Configuración básica del logging
-logging.basicConfig(
-    level=logging.INFO,  # Nivel de registro (INFO, DEBUG, WARNING, ERROR, CRITICAL)
-    format='%(asctime)s - %(levelname)s - %(message)s',  
-    handlers=[
-    logging.FileHandler(log_path, mode='a', encoding='utf-8'),  # Archivo en UTF-8
-    logging.StreamHandler()  # También mostrar logs en la consola
-    ]
-)
 
-#logging.ERROR("=" * 90) 
+def cargar_credenciales() -> tuple[str | None, str | None]:
+    """
+    Lee EMAIL y PASS del entorno, cargando antes el archivo .env si existe.
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("EMAIL"), os.getenv("PASS")
 
-ruta_dict_2 = os.path.join(script_dir, "..", "datasets", "rubros_subrubros_admin.json")
-with open(ruta_dict_2, "r", encoding = 'utf-8') as file:
-    rubros_subrubros_admin: dict = json.load(file)
+
+@lru_cache(maxsize=1)
+def cargar_rubros_subrubros_admin() -> dict:
+    """
+    Devuelve el diccionario de rubros y subrubros del panel de administrador.
+    Se lee una sola vez por proceso.
+    """
+    with open(ruta_dict_2, "r", encoding = 'utf-8') as file:
+        return json.load(file)
 
 
 mapeo_tematica = {
@@ -47,32 +57,520 @@ mapeo_tematica = {
         "15": "General"
     }
 
+# Especificación declarativa de los campos del formulario de metadata de una ficha.
+# tipo "valor": valor del control; tipo "opcion": texto de la opción seleccionada.
+# "mapeo" traduce el valor leído y "faltante" es el valor si el control no existe.
+campos_ficha = {
+    "titulo_corto": {"selector": 'input[formcontrolname="shorttitle"]', "tipo": "valor"},
+    "titulo_largo": {"selector": 'input[formcontrolname="longtitle"]', "tipo": "valor"},
+    "sumilla": {"selector": 'textarea[formcontrolname="summary"]', "tipo": "valor"},
+    "fecha_publicacion": {"selector": 'input[formcontrolname="publication"]', "tipo": "valor"},
+    "ultima_actualizacion": {"selector": 'input[formcontrolname="lastUpdated"]', "tipo": "valor"},
+    "tags": {"selector": 'input[formcontrolname="tags"]', "tipo": "valor"},
+    "tematica": {"selector": 'select[formcontrolname="idtematic"]', "tipo": "valor",
+                 "mapeo": mapeo_tematica, "defecto": "Desconocido", "faltante": "No disponible"},
+    "departamento": {"selector": 'select[formcontrolname="iddpto"]', "tipo": "opcion",
+                     "territorial": True, "faltante": "No disponible"},
+}
+
+# Orden de llaves de cada ficha en info_obs.json
+orden_campos_ficha = ["titulo_corto", "titulo_largo", "sumilla", "fecha_publicacion",
+                      "ultima_actualizacion", "tags", "estado", "tematica", "departamento"]
+
+# Secciones del editor de una ficha (orden del ícono en la fila) en el orden en que las visita
+# WriterObs.aplicar_cambios: el contenido primero y la sumilla al final, para que la fecha de
+# actualización solo cambie si lo demás se guardó
+secciones_ficha = [("texto", 1), ("graficos", 2), ("referencias", 3), ("sumilla", 5)]
+
+# Enlace de una referencia: desde "http" hasta espacio, fin de línea o punto
+patron_url_referencia = re.compile(r'https?://[^\s]+(?:\s|$|\.)')
+patron_numero_referencia = re.compile(r'^\[(\d+)\]')
+
+
+def dividir_referencias(referencias_limpias: str) -> list[dict]:
+    """
+    Divide las referencias limpias (refs_clean de TextFormatting) en una entrada por referencia.
+
+    Returns:
+        list[dict]: {"content": texto de la referencia, "urlsource": su enlace o ""}.
+    """
+    referencias = []
+    for referencia in re.split(r'\n(?=\[\d+\])', referencias_limpias.strip()):
+        if not referencia.strip():
+            continue
+        match = patron_url_referencia.search(referencia)
+        referencias.append({
+            "content": referencia.strip(),
+            "urlsource": match.group(0).strip().rstrip('.') if match else "",
+        })
+    return referencias
+
+
+def _normalizar_referencia(texto: str) -> str:
+    return " ".join((texto or "").split())
+
+
+def _misma_referencia(existente: str, deseada: str) -> bool:
+    """
+    Compara el contenido mostrado en la tabla con el deseado. La tabla puede recortar
+    textos largos con puntos suspensivos; en ese caso basta con que coincida el inicio.
+    """
+    existente = _normalizar_referencia(existente)
+    deseada = _normalizar_referencia(deseada)
+    for sufijo in ("...", "…"):
+        if existente.endswith(sufijo):
+            return deseada.startswith(existente[:-len(sufijo)].rstrip())
+    return existente == deseada
+
+
+def planificar_referencias(existentes: list[dict], deseadas: list[dict]) -> list[dict]:
+    """
+    Calcula las operaciones mínimas para que la tabla de referencias coincida con las deseadas.
+
+    Args:
+        existentes (list[dict]): Filas actuales con orden, content, urlsource y activo.
+            Si urlsource es None (la tabla no muestra el enlace), no se compara.
+        deseadas (list[dict]): Salida de dividir_referencias.
+
+    Returns:
+        list[dict]: Operaciones {"accion", "orden", "content", "urlsource", "activar"} con
+        accion "editar" (cambia contenido, enlace y/o estado de una fila), "desactivar" o
+        "agregar". Las filas que ya coinciden no generan operaciones. Las inserciones van al
+        final para que los índices de las filas existentes no cambien.
+    """
+    # Las filas activas primero: una copia inactiva de una referencia que ya está activa
+    # no debe ganarle el emparejamiento
+    libres = sorted(existentes, key=lambda f: not f["activo"])
+    operaciones = []
+    pendientes = []
+
+    # 1. Misma referencia ya presente: solo corregir enlace o estado
+    for deseada in deseadas:
+        fila = next((f for f in libres if _misma_referencia(f["content"], deseada["content"])), None)
+        if fila is None:
+            pendientes.append(deseada)
+            continue
+        libres.remove(fila)
+        cambia_url = fila["urlsource"] is not None and fila["urlsource"] != deseada["urlsource"]
+        if cambia_url or not fila["activo"]:
+            operaciones.append({"accion": "editar", "orden": fila["orden"], "content": None,
+                                "urlsource": deseada["urlsource"] if cambia_url else None,
+                                "activar": not fila["activo"]})
+
+    # 2. Referencia modificada: reutilizar la fila con el mismo número [n]
+    agregar = []
+    for deseada in pendientes:
+        numero = patron_numero_referencia.match(deseada["content"])
+        fila = None
+        if numero:
+            fila = next((f for f in libres
+                         if (m := patron_numero_referencia.match(_normalizar_referencia(f["content"])))
+                         and m.group(1) == numero.group(1)), None)
+        if fila is None:
+            agregar.append(deseada)
+            continue
+        libres.remove(fila)
+        operaciones.append({"accion": "editar", "orden": fila["orden"], "content": deseada["content"],
+                            "urlsource": deseada["urlsource"], "activar": not fila["activo"]})
+
+    # 3. Filas activas que ya no corresponden a ninguna referencia
+    for fila in libres:
+        if fila["activo"]:
+            operaciones.append({"accion": "desactivar", "orden": fila["orden"], "content": None,
+                                "urlsource": None, "activar": False})
+
+    for deseada in agregar:
+        operaciones.append({"accion": "agregar", "orden": None, "content": deseada["content"],
+                            "urlsource": deseada["urlsource"], "activar": False})
+    return operaciones
+
+# Numeración de un gráfico en la tabla ('Figura 1', 'Tabla 2.')
+patron_numeracion_grafico = re.compile(r'^(Figura|Tabla)\s+\d+\.?$', re.IGNORECASE)
+
+
+def _normalizar_numeracion(numeracion: str) -> str:
+    return " ".join((numeracion or "").split()).rstrip('.').lower()
+
+
+def fila_grafico(fila: dict) -> dict:
+    """
+    Interpreta una fila de la tabla de gráficos (salida de capturar_filas).
+    La tabla no muestra la nota, así que "note" queda en None; el orden y el título se
+    reconocen por su forma y también quedan en None si no se encuentran.
+
+    Returns:
+        dict: orden (índice de la fila), activo, lapiz_visible, y los valores mostrados de
+        "order", "numeration", "title" y "note".
+    """
+    celdas = fila["celdas"]
+    numeracion = next((c for c in celdas if patron_numeracion_grafico.match(c)), None)
+    orden = next((c for c in celdas if c.isdigit()), None)
+    resto = [c for c in celdas if c not in (numeracion, orden, fila["estado"]) and c]
+    titulo = max(resto, key=len) if resto else None
+    return {
+        "orden": fila["orden"],
+        "activo": fila["activo"],
+        "lapiz_visible": fila["lapiz_visible"],
+        "order": orden,
+        "numeration": numeracion,
+        "title": titulo,
+        "note": None,
+    }
+
+
+def planificar_graficos(existentes: list[dict], items: list) -> list[dict]:
+    """
+    Calcula las operaciones mínimas para que la tabla de gráficos coincida con `items`.
+
+    Cada item [orden, numeración, título, nota] se empareja con la fila de la misma numeración
+    (de preferencia activa) y, si no la hay, con la fila activa del mismo orden.
+
+    Los campos que fila_grafico no pudo leer (siempre la nota) no se pueden comparar, así que
+    se escriben en cada fila emparejada: un cambio solo en la nota también se guarda.
+
+    Args:
+        existentes (list[dict]): Salida de fila_grafico para cada fila.
+        items (list): items_clean de TextFormatting.
+
+    Returns:
+        list[dict]: Operaciones {"accion", "orden", "campos", "activar"} con accion "editar"
+        (solo los campos distintos y/o activar la fila), "desactivar" o "agregar".
+    """
+    libres = sorted(existentes, key=lambda f: not f["activo"])
+    operaciones = []
+    agregar = []
+
+    for item in items:
+        orden, numeracion, titulo, nota = item
+        deseado = {"order": str(orden), "numeration": numeracion, "title": titulo, "note": nota}
+        fila = next((f for f in libres if f["numeration"] is not None
+                     and _normalizar_numeracion(f["numeration"]) == _normalizar_numeracion(numeracion)), None)
+        if fila is None:
+            fila = next((f for f in libres if f["activo"] and f["order"] == str(orden)), None)
+        if fila is None:
+            agregar.append(deseado)
+            continue
+        libres.remove(fila)
+        campos = {campo: valor for campo, valor in deseado.items()
+                  if fila[campo] is None or not _misma_referencia(fila[campo], valor)}
+        # La numeración se compara sin el punto final
+        if "numeration" in campos and _normalizar_numeracion(fila["numeration"]) == _normalizar_numeracion(numeracion):
+            del campos["numeration"]
+        if campos or not fila["activo"]:
+            operaciones.append({"accion": "editar", "orden": fila["orden"], "campos": campos,
+                                "activar": not fila["activo"]})
+
+    for fila in libres:
+        if fila["activo"]:
+            operaciones.append({"accion": "desactivar", "orden": fila["orden"], "campos": {}, "activar": False})
+
+    for deseado in agregar:
+        operaciones.append({"accion": "agregar", "orden": None, "campos": deseado, "activar": False})
+    return operaciones
+
+# Fechas que pueden aparecer en las columnas de la lista (YYYY-MM-DD o DD/MM/YYYY)
+patron_fecha_lista = re.compile(r'^(?:(\d{4})-(\d{2})-(\d{2})|(\d{2})/(\d{2})/(\d{4}))')
+
+
+def fecha_de_celdas(celdas: list[str]) -> str | None:
+    """
+    Devuelve la primera fecha encontrada en las celdas de una fila, en formato YYYY-MM-DD.
+    """
+    for celda in celdas:
+        match = patron_fecha_lista.match(celda)
+        if match:
+            if match.group(1):
+                return f"{match.group(1)}-{match.group(2)}-{match.group(3)}"
+            return f"{match.group(6)}-{match.group(5)}-{match.group(4)}"
+    return None
+
+
+def comparar_con_snapshot(fichas: list[dict], snapshot: dict) -> dict:
+    """
+    Compara las filas de una lista con la metadata ya guardada (formato info_obs.json).
+
+    Args:
+        fichas (list[dict]): Salida de ReaderObs.listar_fichas.
+        snapshot (dict): Metadata guardada por código.
+
+    Returns:
+        dict: Listas de fichas "nuevas", "cambio_estado" y "actualizadas" (con fecha en la
+        lista posterior a 'ultima_actualizacion'), y "omitidas" con los códigos sin cambios.
+    """
+    resultado = {"nuevas": [], "cambio_estado": [], "actualizadas": [], "omitidas": []}
+    for ficha in fichas:
+        guardada = snapshot.get(ficha["codigo"])
+        if guardada is None:
+            resultado["nuevas"].append(ficha)
+        elif (ficha["estado"] or "").strip().lower() != (guardada.get("estado") or "").strip().lower():
+            resultado["cambio_estado"].append(ficha)
+        elif ficha.get("fecha") and ficha["fecha"] > (guardada.get("ultima_actualizacion") or ""):
+            resultado["actualizadas"].append(ficha)
+        else:
+            resultado["omitidas"].append(ficha["codigo"])
+    return resultado
+
+# Foto de una tabla 'tr.tbody-detail' en un solo viaje: una entrada por fila
+js_capturar_filas = '''rows => {
+    const visible = el => !!el && el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+    return rows.map((row, orden) => {
+        const celdas = Array.from(row.querySelectorAll("td")).map(td => td.innerText.trim());
+        const label = row.querySelector("td.text-center div.label-inactive, td.text-center div.label-active");
+        const estado = visible(label) ? label.innerText.trim() : null;
+        return {
+            orden: orden,
+            codigo: celdas.length > 1 ? celdas[1] : "",
+            estado: estado,
+            activo: estado === "ACTIVO",
+            lapiz_visible: visible(row.querySelector("a.a-icon i.fa-pencil")),
+            celdas: celdas,
+            enlaces: Array.from(row.querySelectorAll("a.a-icon")).map(a => a.getAttribute("href") ? a.href : "")
+        };
+    });
+}'''
+
+# Filas de la tabla de referencias: contenido (la celda más larga), enlace (null si la tabla
+# no lo muestra) y estado
+js_capturar_referencias = '''rows => rows.map((row, orden) => {
+    const visible = el => !!el && el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+    const celdas = Array.from(row.querySelectorAll("td")).map(td => td.innerText.trim());
+    const label = row.querySelector("td.text-center div.label-inactive, td.text-center div.label-active");
+    const enlace = Array.from(row.querySelectorAll("td a[href]")).find(a => !a.classList.contains("a-icon"));
+    // El atributo tal cual se guardó: enlace.href lo convertiría en absoluto y lo recodificaría
+    const url = enlace ? enlace.getAttribute("href") : (celdas.find(c => /^https?:\\/\\//.test(c)) || null);
+    return {
+        orden: orden,
+        content: celdas.filter(c => c !== url).reduce((a, b) => b.length > a.length ? b : a, ""),
+        urlsource: url,
+        activo: visible(label) && label.innerText.trim() === "ACTIVO",
+        lapiz_visible: visible(row.querySelector("a.a-icon i.fa-pencil"))
+    };
+})'''
+
+# Lee todos los controles de una vez; devuelve {valores, errores}
+js_extraer_formulario = '''(campos) => {
+    const valores = {};
+    const errores = {};
+    for (const [campo, selector, tipo] of campos) {
+        const el = document.querySelector(selector);
+        if (!el) {
+            errores[campo] = `No se encontró el selector ${selector}`;
+            continue;
+        }
+        if (tipo === "opcion") {
+            const opcion = el.querySelector("option:checked");
+            if (opcion) {
+                valores[campo] = opcion.textContent.trim();
+            } else {
+                errores[campo] = "Sin opción seleccionada";
+            }
+        } else {
+            valores[campo] = el.value;
+        }
+    }
+    return {valores, errores};
+}'''
+
 
 class NavegadorObs():
-    def __init__(self, timeout, headless=False):
-        self.email = EMAIL
-        self.password = PASS
+    def __init__(self, timeout, headless=False, ruta_estado=None, vigencia_estado=8 * 3600,
+                 rutas: RutasAdmin | None = None, perfil_bloqueo: str = "full", perfil_espera: str = "eventos",
+                 navegador=None, politica: PoliticaReintentos | None = None,
+                 tiempos: RegistroTiempos | None = registro_tiempos, trazar_lentos: float | None = None,
+                 url_base: str | None = None, email: str | None = None, password: str | None = None):
+        """
+        Args:
+            timeout (int): Tiempo de espera en milisegundos entre acciones.
+            headless (bool): Si es True, el navegador se lanza sin interfaz gráfica.
+            ruta_estado (str, optional): Archivo donde se guarda el estado de sesión (cookies y localStorage)
+                para reutilizarlo entre ejecuciones. Si es None, siempre se hace el login completo.
+            vigencia_estado (int): Segundos durante los cuales el estado guardado se considera válido.
+            rutas (RutasAdmin, optional): Mapa de rutas del panel de administrador. Si se proporciona,
+                las listas y los editores de las fichas se abren directamente por URL.
+            perfil_bloqueo (str): Perfil de `bloqueo_recursos.perfiles_bloqueo` con los recursos que no
+                se descargan ("full", "admin-minimal" o "public-ids-only").
+            perfil_espera (str): "eventos" espera las señales reales de cada acción; "fijo" conserva
+                las pausas de `timeout` ms después de cada acción y el `slow_mo` del navegador.
+            navegador (NavegadorCompartido, optional): Navegador ya lanzado en el que la sesión abre
+                una pestaña en lugar de lanzar su propio Chromium. El bloqueo de recursos lo define
+                el navegador compartido.
+            politica (PoliticaReintentos, optional): Reintentos de la navegación. Para que varias
+                sesiones se detengan juntas cuando el sitio falla, todas deben compartir una política
+                con el mismo CircuitoInterruptor.
+            tiempos (RegistroTiempos, optional): Dónde se registra la duración de cada paso. Por defecto,
+                el registro compartido del proceso; None desactiva la medición.
+            trazar_lentos (float, optional): Umbral en milisegundos. Si se indica, cada lectura o
+                actualización de ficha se graba con Playwright tracing y la traza se guarda en
+                logs/trazas solo si tarda más que el umbral. No se usa con un navegador compartido.
+            url_base (str, optional): Raíz del sitio. Por defecto, `url_observatorio`; se cambia para
+                apuntar a otra instancia, por ejemplo el servidor simulado de benchmarks/.
+            email (str, optional): Correo para el login. Si falta, se lee de EMAIL (o del .env) al iniciar sesión.
+            password (str, optional): Contraseña para el login. Si falta, se lee de PASS (o del .env).
+        """
+        self.email = email
+        self.password = password
         self.headless = headless
         self.timeout = timeout
+        self.ruta_estado = ruta_estado
+        self.vigencia_estado = vigencia_estado
+        self.rutas = rutas
+        self.url_base = (url_base or url_observatorio).rstrip('/')
+        self.bloqueo = BloqueoRecursos(perfil_bloqueo)
+        self.esperas = EstrategiaEspera(perfil_espera, timeout=timeout)
         self.playwright = None
         self.browser = None
         self.page = None
+        self.navegador = navegador
+        self.politica = politica or PoliticaReintentos()
+        self.tiempos = tiempos
+        self.trazar_lentos = trazar_lentos if navegador is None else None
+        self._codigo_actual = None
+        self._estado_cargado = False
+        self._turno_login = False
+
+    def _cargar_estado_sesion(self):
+        """
+        Lee el estado de sesión guardado si existe y no ha expirado.
+
+        Returns:
+            dict | None: Estado en el formato de `storage_state` de Playwright, o None si no es utilizable.
+        """
+        if not self.ruta_estado or not os.path.exists(self.ruta_estado):
+            return None
+        try:
+            with open(self.ruta_estado, "r", encoding="utf-8") as file:
+                datos = json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"No se pudo leer el estado de sesión {self.ruta_estado}: {e}")
+            return None
+
+        ahora = time.time()
+        if ahora - datos.get("guardado", 0) > self.vigencia_estado:
+            return None
+
+        # Si alguna cookie con expiración ya venció, la sesión no sirve
+        estado = datos.get("estado", {})
+        for cookie in estado.get("cookies", []):
+            expira = cookie.get("expires", -1)
+            if 0 < expira < ahora:
+                return None
+        return estado
+
+    async def guardar_estado_sesion(self):
+        """
+        Guarda las cookies y el localStorage de la sesión actual en `ruta_estado`.
+        """
+        if not self.ruta_estado or self.page is None:
+            return
+        estado = await self.page.context.storage_state()
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta_estado)), exist_ok=True)
+        ruta_temporal = f"{self.ruta_estado}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as file:
+            json.dump({"guardado": time.time(), "estado": estado}, file, ensure_ascii=False)
+        os.replace(ruta_temporal, self.ruta_estado)
+
+    @medir()
+    async def sesion_activa(self):
+        """
+        Verifica de forma rápida si la sesión sigue autenticada abriendo el panel de administrador.
+
+        Returns:
+            bool: True si el panel de administrador carga, False si la sesión expiró.
+        """
+        try:
+            await self.page.goto(f'{self.url_base}/adm/tendencia')
+            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]', timeout=5000)
+            return True
+        except Exception:
+            return False
 
     async def iniciar_navegador(self):
         """
         Inicia el navegador y configura la página.
+        Si hay un estado de sesión guardado y vigente, el contexto parte de él.
+        Con un navegador compartido solo se abre una pestaña.
         """
+        if self.navegador is not None:
+            await self._abrir_pestana_compartida()
+            return
+
+        from playwright.async_api import async_playwright
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=self.headless, slow_mo=self.timeout)
-        context = await self.browser.new_context(viewport={"width": 1920, "height": 1080})
+        # El slow_mo solo se usa como respaldo en el perfil de esperas fijas
+        slow_mo = self.timeout if self.esperas.perfil == "fijo" else 0
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, slow_mo=slow_mo)
+        estado = self._cargar_estado_sesion()
+        self._estado_cargado = estado is not None
+        context = await self.browser.new_context(viewport={"width": 1920, "height": 1080}, storage_state=estado)
+        await self.bloqueo.instalar(context)
+        if self.trazar_lentos:
+            await context.tracing.start(screenshots=True, snapshots=True)
         self.page = await context.new_page()
 
         
+    async def _abrir_pestana_compartida(self):
+        """
+        Abre la pestaña de la sesión en el navegador compartido.
+
+        La primera sesión toma el turno de login (candado_login) y lo conserva hasta que
+        termina `login`; las demás esperan y parten del estado ya autenticado.
+        """
+        await self.navegador.candado_login.acquire()
+        if self.navegador.estado is not None:
+            self.navegador.candado_login.release()
+            self.page = await self.navegador.abrir_pagina()
+            return
+
+        self._turno_login = True
+        try:
+            estado = self._cargar_estado_sesion()
+            self._estado_cargado = estado is not None
+            self.page = await self.navegador.abrir_pagina(estado)
+        except Exception:
+            self._liberar_turno_login()
+            raise
+
+    def _liberar_turno_login(self):
+        if self._turno_login:
+            self._turno_login = False
+            self.navegador.candado_login.release()
+
+    @medir()
     async def login(self):
         """
         Realiza el inicio de sesión en la página.
+        Si el estado de sesión guardado sigue vigente, se omite el formulario de login.
+        Con un navegador compartido, solo la primera sesión inicia sesión; las demás abren el
+        panel de administrador con las cookies ya autenticadas, porque su pestaña parte en blanco.
         """
-        await self.page.goto('https://observatorio.ceplan.gob.pe/')
+        if self.navegador is None:
+            await self._login()
+            return
+
+        if not self._turno_login:
+            await self.page.goto(f'{self.url_base}/adm/tendencia')
+            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]')
+            await self.page.evaluate("document.body.style.zoom='90%'")
+            return
+        try:
+            await self._login()
+            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]')
+            self.navegador.estado = await self.page.context.storage_state()
+        finally:
+            self._liberar_turno_login()
+
+    async def _login(self):
+        if self._estado_cargado and await self.sesion_activa():
+            await self.page.evaluate("document.body.style.zoom='90%'")
+            logging.info("Sesión restaurada desde el estado guardado")
+            return
+
+        if self.email is None or self.password is None:
+            email, password = cargar_credenciales()
+            self.email = self.email or email
+            self.password = self.password or password
+
+        await self.page.goto(f'{self.url_base}/')
         await self.page.evaluate("document.body.style.zoom='90%'")
 
         await self.page.click('.icon-header.fa.fa-user.fa-3')
@@ -82,6 +580,11 @@ class NavegadorObs():
         await self.page.fill('input[name="pass"]', self.password)
         await self.page.click('.btn.btn-outline-dark.btn-secure')
 
+        if self.ruta_estado:
+            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]')
+            await self.guardar_estado_sesion()
+
+    @medir()
     async def volver_a_inicio(self):
         """
         Navega de vuelta al panel de administrador
@@ -94,35 +597,128 @@ class NavegadorObs():
         """
         Cierra el navegador y libera los recursos.
         """
+        if self.rutas:
+            self.rutas.guardar()
+        if self.esperas.tiempos:
+            logging.info(f"Tiempos de espera: {self.esperas.reporte()}")
+        if self.navegador is not None:
+            # Solo se cierra la pestaña; el navegador lo cierra quien lo creó
+            self._liberar_turno_login()
+            if self.page is not None:
+                await self.navegador.cerrar_pagina(self.page)
+                self.page = None
+            return
+        self.bloqueo.registrar_reporte()
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
 
 
-    async def identificar_rubro(self, codigo_ficha):
+    async def memoria(self) -> dict:
+        """
+        Memoria usada por la sesión.
+
+        Returns:
+            dict: "js_heap_mb" de la pestaña (Chromium) y "rss_mb" de todos los procesos del
+            navegador del proceso actual (compartidos entre las pestañas de un NavegadorCompartido).
+        """
+        js_heap = None
+        if self.page is not None and not self.page.is_closed():
+            try:
+                js_heap = await self.page.evaluate("performance.memory ? performance.memory.usedJSHeapSize : null")
+            except Exception:
+                pass
+        return {
+            "js_heap_mb": round(js_heap / 1024 / 1024, 1) if js_heap else None,
+            "rss_mb": rss_procesos_hijos(),
+        }
+
+    async def _iniciar_traza(self) -> bool:
+        """
+        Abre un fragmento de traza de Playwright si la sesión graba las llamadas lentas.
+        """
+        if not self.trazar_lentos or self.page is None:
+            return False
+        try:
+            await self.page.context.tracing.start_chunk()
+            return True
+        except Exception as e:
+            logging.warning(f"No se pudo iniciar la traza: {e}")
+            return False
+
+    async def _terminar_traza(self, paso, codigo, duracion_ms):
+        """
+        Cierra el fragmento de traza y lo guarda solo si la llamada superó `trazar_lentos`.
+        """
+        ruta = None
+        if duracion_ms >= self.trazar_lentos:
+            ruta = os.path.join(directorio_logs, "trazas", f"{paso}_{codigo}_{int(duracion_ms)}ms.zip")
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        try:
+            await self.page.context.tracing.stop_chunk(path=ruta)
+            if ruta:
+                logging.info(f"{paso} de {codigo} tardó {duracion_ms:.0f} ms; traza en {ruta}")
+        except Exception as e:
+            logging.warning(f"No se pudo guardar la traza: {e}")
+
+    @medir()
+    async def ir_a_ruta(self, ruta):
+        """
+        Navega directamente a una ruta del Observatorio (por ejemplo, '/adm/tendencia').
+        """
+        await self.page.goto(f'{self.url_base}{ruta}')
+
+    async def _esperar_cambio_url(self, url_anterior):
+        """
+        Espera a que el router de Angular cambie la URL y la devuelve.
+        Si no cambia a tiempo, devuelve None.
+        """
+        try:
+            await self.page.wait_for_url(lambda url: url != url_anterior, timeout=5000)
+            return self.page.url
+        except Exception:
+            return None
+
+    @medir("navegar_subrubro")
+    async def _navegar_a_subrubro(self, rubro, subrubro):
+        """
+        Abre la lista de fichas de un rubro y subrubro haciendo clic en el menú.
+        Los timeouts se reintentan según `self.politica`, recargando la página antes de cada reintento.
+        """
+        async def navegar():
+            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]', timeout=10000)
+            await self.page.click(f'li.btn-org:has-text("{rubro}")', timeout=10000)
+
+            # Seleccionar el subrubro
+            await self.page.wait_for_selector('a.col-sm-3.btn-org', timeout=10000)
+            await self.page.click(f'a.col-sm-3.btn-org:has-text("{subrubro}")', timeout=10000)
+
+        async def recargar():
+            await self.page.reload(wait_until="networkidle")
+
+        await self.politica.ejecutar(navegar, al_reintentar=recargar)
+
+    @medir()
+    async def identificar_rubro(self, codigo_ficha, forzar_lista=False, orden: int | None = None):
         """
         Selecciona automáticamente el rubro y subrubro basándose en el código de ficha,
         y abre la ficha deseada.
+        Si hay un mapa de rutas con la lista del subrubro, se abre directamente por URL.
         
         Args:
             codigo_ficha (str): Código de la ficha que se desea abrir.
+            forzar_lista (bool): Si es True, abre la lista aunque la ficha ya tenga rutas directas.
+            orden (int, optional): Ícono que se va a abrir después con seleccionar_icono. Si su
+                ruta ya está en el mapa, no hace falta abrir la lista.
         
         Raises:
             ValueError: Si no se encuentra un rubro o subrubro correspondiente al código.
         """
-        # Detección automática de rubro y subrubro usando regex
-        rubro_encontrado = None
-        subrubro_encontrado = None
-        
-        for rubro, subrubros in rubros_subrubros_admin.items():
-            for subrubro, patron in subrubros.items():
-                if re.match(patron, codigo_ficha):  # Compara el código de ficha con el patrón
-                    rubro_encontrado = rubro
-                    subrubro_encontrado = subrubro
-                    break
-            if rubro_encontrado and subrubro_encontrado:
-                break
+        # Detección automática de rubro y subrubro con el clasificador compilado
+        clasificacion = clasificador_por_defecto().clasificar(codigo_ficha)
+        rubro_encontrado = clasificacion.rubro
+        subrubro_encontrado = clasificacion.subrubro
 
         # Validar detección
         if not rubro_encontrado or not subrubro_encontrado:
@@ -131,42 +727,32 @@ class NavegadorObs():
         # Imprimir el rubro y subrubro encontrados
         print(f"Rubro encontrado: {rubro_encontrado}, Subrubro encontrado: {subrubro_encontrado}")
 
-        # Seleccionar el rubro
-        try:
-            await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]', timeout=10000)
-            await self.page.click(f'li.btn-org:has-text("{rubro_encontrado}")')
-
-            # Seleccionar el subrubro
-            await self.page.wait_for_selector('a.col-sm-3.btn-org', timeout=10000)
-            await self.page.click(f'a.col-sm-3.btn-org:has-text("{subrubro_encontrado}")')
-        except TimeoutError:
-            try:
-                await self.page.reload(wait_until="networkidle")
-
-                await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]', timeout=10000)
-                await self.page.click(f'li.btn-org:has-text("{rubro_encontrado}")')
-
-                # Seleccionar el subrubro
-                await self.page.wait_for_selector('a.col-sm-3.btn-org')
-                await self.page.click(f'a.col-sm-3.btn-org:has-text("{subrubro_encontrado}")', timeout=10000)
-            except TimeoutError:
-                print("⚠️ Error persistente, limpiando caché y cookies...")
-                await self.page.context.clear_cookies()
-                await self.page.evaluate("caches.keys().then(keys => keys.forEach(key => caches.delete(key)))")
+        # Si se conoce la ruta del ícono que se va a abrir, seleccionar_icono no necesita la lista.
+        # Tener la ruta de otro ícono no basta: listar_fichas solo registra la de la metadata.
+        if (self.rutas and orden is not None and self.rutas.ruta_ficha(codigo_ficha, orden)
+                and not forzar_lista):
+            return
 
-                await self.page.reload(wait_until="networkidle")
+        ruta = self.rutas.ruta_lista(rubro_encontrado, subrubro_encontrado) if self.rutas else None
+        if ruta:
+            await self.ir_a_ruta(ruta)
+            return
 
-                await self.page.wait_for_selector('li.btn-org[routerlinkactive="active"]', timeout=10000)
-                await self.page.click(f'li.btn-org:has-text("{rubro_encontrado}")')
-
-                await self.page.wait_for_selector('a.col-sm-3.btn-org', timeout=10000)
-                await self.page.click(f'a.col-sm-3.btn-org:has-text("{subrubro_encontrado}")')
+        url_anterior = self.page.url
+        await self._navegar_a_subrubro(rubro_encontrado, subrubro_encontrado)
+        if self.rutas:
+            url = await self._esperar_cambio_url(url_anterior)
+            if url:
+                self.rutas.registrar_lista(rubro_encontrado, subrubro_encontrado, url)
 
         
 
+    @medir()
     async def seleccionar_icono(self, codigo_ficha, orden):
         """
         Selecciona un ícono dentro de una fila específica basada en el código de la ficha y el índice.
+        Si el mapa de rutas conoce el destino, navega directamente a él; si no, hace clic
+        y registra la ruta resultante para las siguientes veces.
 
         Args:
             self.page: Página de Playwright.
@@ -181,6 +767,11 @@ class NavegadorObs():
         Raises:
             ValueError: Si no se encuentra la ficha con el código proporcionado.
         """
+        ruta = self.rutas.ruta_ficha(codigo_ficha, orden) if self.rutas else None
+        if ruta:
+            await self.ir_a_ruta(ruta)
+            return
+
         # Esperar a que la tabla esté visible
         await self.page.wait_for_selector('tr.tbody-detail')  
 
@@ -194,9 +785,69 @@ class NavegadorObs():
             raise ValueError(f"No se encontró la ficha con código: {codigo_ficha}")
     
         # Hacer clic en el ícono
+        url_anterior = self.page.url
         await ficha_element.click()
 
-    
+        if self.rutas:
+            url = await self._esperar_cambio_url(url_anterior)
+            if url:
+                self.rutas.registrar_ficha(codigo_ficha, orden, url)
+
+    async def capturar_rutas(self, rubros_subrubros: dict | None = None):
+        """
+        Recorre una vez todos los rubros y subrubros del panel de administrador y
+        registra en `self.rutas` la ruta de cada lista y los enlaces de los íconos de cada ficha.
+        Las rutas que no se puedan leer del DOM se aprenden después al hacer clic.
+
+        Args:
+            rubros_subrubros (dict, optional): Rubros y subrubros a recorrer. Por defecto,
+                los de rubros_subrubros_admin.json.
+        """
+        if self.rutas is None:
+            self.rutas = RutasAdmin()
+
+        for rubro, subrubros in (rubros_subrubros or cargar_rubros_subrubros_admin()).items():
+            for subrubro in subrubros:
+                try:
+                    await self.volver_a_inicio()
+                    url_anterior = self.page.url
+                    await self._navegar_a_subrubro(rubro, subrubro)
+                    url = await self._esperar_cambio_url(url_anterior)
+                    if url:
+                        self.rutas.registrar_lista(rubro, subrubro, url)
+
+                    await self.page.wait_for_selector('tr.tbody-detail')
+                    filas = await self.capturar_filas(self.page.locator('tr.tbody-detail'))
+                    for fila in filas:
+                        for orden, enlace in enumerate(fila["enlaces"]):
+                            if fila["codigo"] and enlace:
+                                self.rutas.registrar_ficha(fila["codigo"], orden, enlace)
+                    logging.info(f"Rutas capturadas para {subrubro}: {len(filas)} fichas")
+                except Exception as e:
+                    logging.error(f"No se pudieron capturar las rutas de {rubro} / {subrubro}: {e}")
+
+        self.rutas.guardar()
+
+    @medir()
+    async def capturar_filas(self, rows):
+        """
+        Toma una foto de todas las filas de una tabla con un solo `evaluate_all`.
+
+        Args:
+            rows (Locator): El locator de las filas de la tabla (normalmente 'tr.tbody-detail').
+
+        Returns:
+            list[dict]: Una entrada por fila con las llaves:
+                orden (int): Posición de la fila en la tabla.
+                codigo (str): Texto de la segunda columna (código de la ficha en las listas).
+                estado (str | None): Texto de la etiqueta de estado, o None si no es visible.
+                activo (bool): True si la etiqueta dice "ACTIVO".
+                lapiz_visible (bool): Si el ícono de edición de la fila es visible.
+                celdas (list[str]): Texto de todas las columnas.
+                enlaces (list[str]): URL de cada ícono 'a.a-icon' de la fila ('' si no tiene href).
+        """
+        return await rows.evaluate_all(js_capturar_filas)
+
     async def recopilar_estado_filas(self, rows):
         """
         Recopila el estado de las filas en la tabla de acuerdo a si están activas o inactivas.
@@ -207,45 +858,53 @@ class NavegadorObs():
         Returns:
             list: Lista de booleanos donde True significa que la casilla está activa y False que está inactiva.
         """
-        row_count = await rows.count()
-        row_status = []
-
-        # Paso 1: Recopilar el estado de cada fila
-        for index in range(row_count):
-            label_locator = rows.nth(index).locator('td.text-center div.label-inactive, td.text-center div.label-active')
-            if await label_locator.is_visible():
-                label = await label_locator.inner_text()
-                row_status.append(label.strip() == "ACTIVO")
-            else:
-                row_status.append(False)
-
-        return row_status
+        filas = await self.capturar_filas(rows)
+        return [fila["activo"] for fila in filas]
 
 
 
 class WriterObs(NavegadorObs):
-    def __init__(self, timeout, headless):
-        super().__init__(timeout, headless)
+    def __init__(self, timeout, headless, **kwargs):
+        super().__init__(timeout, headless, **kwargs)
 
+    @medir()
     async def llenar_campo(self, selector, valor, click=False):
         await self.page.wait_for_selector(selector, state='visible')
         await self.page.locator(selector).scroll_into_view_if_needed()
         # Si se debe hacer clic en el campo antes de llenarlo
         if click:
             await self.page.locator(selector).click()
-            await self.page.wait_for_timeout(self.timeout)
+            await self.esperas.pausa(self.page, "llenar_campo")
         await self.page.fill(selector, str(valor))
-        await self.page.wait_for_timeout(self.timeout)
+        await self.esperas.pausa(self.page, "llenar_campo")
 
+    @medir()
     async def click_selector(self, selector):
         await self.page.wait_for_selector(selector)
         await self.page.locator(selector).scroll_into_view_if_needed()
         await self.page.locator(selector).click()
-        await self.page.wait_for_timeout(self.timeout)
+        await self.esperas.pausa(self.page, "click_selector")
+
+    @medir()
+    async def guardar_formulario(self, tabla=True, hover=False):
+        """
+        Hace clic en 'Guardar' y espera a que el guardado termine según la estrategia de esperas.
+
+        Args:
+            tabla (bool): Si es True, además espera a que la tabla se vuelva a mostrar.
+            hover (bool): Si es True, hace hover sobre el botón antes del clic.
+        """
+        save_button = self.page.locator('button[type="submit"]')
+        if hover:
+            await save_button.hover()
+        async with self.esperas.guardado(self.page, tabla=tabla):
+            await save_button.click()
 
+    @medir()
     async def desactivar_casillas_activadas(self, rows, desactivar=True):
         """
         Desactiva las casillas activadas según el parámetro 'desactivar'.
+        El estado de todas las filas se lee de una sola vez con `capturar_filas`.
 
         Args:
             rows (Locator): El locator de las filas de la tabla donde están las casillas.
@@ -254,53 +913,42 @@ class WriterObs(NavegadorObs):
         Returns:
             None
         """
-        row_status = await self.recopilar_estado_filas(rows)
+        filas = await self.capturar_filas(rows)
 
         # Paso 2: Desactivar las casillas según el parámetro 'desactivar'
-        for index, is_active in enumerate(row_status):
+        for fila in filas:
+            index = fila["orden"]
+            is_active = fila["activo"]
             if (desactivar and is_active) or (not desactivar and not is_active):
-                action = "Desactivando" if desactivar else "Activando"
-                pencil_icon = rows.nth(index).locator('a.a-icon i.fa-pencil')
-                await pencil_icon.scroll_into_view_if_needed()
-                await self.page.wait_for_timeout(self.timeout / 3)
-
-                if await pencil_icon.is_visible():
+                if fila["lapiz_visible"]:
                     try:
-                        await pencil_icon.click()  # Aquí se hace clic en el lápiz
+                        await rows.nth(index).locator('a.a-icon i.fa-pencil').click()  # Aquí se hace clic en el lápiz
                         await self.page.evaluate('document.querySelector("#switch1").click()')
 
-                        # Hacer hover sobre el botón y luego clic (mejora la consistencia)
-                        save_button = self.page.locator('button[type="submit"]')
-                        await save_button.hover()  # Hover sobre el botón
-                        await self.page.click('button[type="submit"]')
-                        await self.page.wait_for_timeout(self.timeout / 3)
-
-                        # Esperar a que la tabla se recargue completamente antes de continuar
-                        await self.page.wait_for_selector('tr.tbody-detail', state='visible')
+                        # Hacer hover sobre el botón y luego clic (mejora la consistencia),
+                        # esperando el guardado y la recarga de la tabla antes de continuar
+                        await self.guardar_formulario(hover=True)
                     except Exception as e:
                         print(f"Error al procesar la fila {index + 1}: {e}")
                 else:
                     try:
                         print(f"Lápiz de la fila {index + 1} no es visible, intentando alternativa")
-                        await self.page.wait_for_timeout(30)
 
-                        # Hacer click en el lápiz con js
-                        await self.page.evaluate('''var pencil = document.querySelector('a.a-icon i.fa-pencil');
+                        # Hacer click en el lápiz de esta fila con js
+                        await self.page.evaluate('''(index) => {
+                                            var row = document.querySelectorAll('tr.tbody-detail')[index];
+                                            var pencil = row ? row.querySelector('a.a-icon i.fa-pencil') : null;
                                             if (pencil) {
                                                 pencil.scrollIntoView({ behavior: 'smooth', block: 'center' });
                                                 pencil.click();
-                                            }''')
+                                            }
+                                        }''', index)
 
                         # Cambiar el estado del switch usando JavaScript
                         await self.page.evaluate('document.querySelector("#switch1").click()')
 
-                        # Hacer hover sobre el botón y luego clic
-                        save_button = self.page.locator('button[type="submit"]')
-                        await save_button.hover()  # Hover sobre el botón
-                        await self.page.click('button[type="submit"]')
-
-                        # Esperar a que la tabla se recargue completamente antes de continuar
-                        await self.page.wait_for_selector('tr.tbody-detail', state='visible')
+                        # Hacer hover sobre el botón y luego clic, esperando la recarga de la tabla
+                        await self.guardar_formulario(hover=True)
                         print(f"Fila {index + 1} ha sido procesada por el método alternativo.")
                     except Exception as e:
                         print(f"No se pudo hacer clic en el lápiz de la fila {index + 1}")
@@ -308,7 +956,8 @@ class WriterObs(NavegadorObs):
     
         
          ################ INSERTAR TEXTO ACTUALIZADO ##################
-    async def actualizar_sumilla(self, codigo_ficha, texto_con_hipervínculos, timeout=50):
+    @medir()
+    async def actualizar_sumilla(self, codigo_ficha, texto_con_hipervínculos, timeout=50, omitir_inicio=False):
         """
         Actualiza la sumilla de una ficha y modifica la fecha de actualización en la interfaz.
 
@@ -318,12 +967,14 @@ class WriterObs(NavegadorObs):
             texto_con_hipervínculos (str): Texto procesado con hipervínculos para la sumilla.
             timeout (int, optional): Tiempo de espera en milisegundos para las operaciones 
                 (por defecto: 50).
+            omitir_inicio (bool, optional): Si es True, asume que ya se encuentra en el editor de la ficha (default: False).
 
         Raises:
             Exception: Si ocurre algún problema al insertar la fecha de actualización.
         """
         # Seleccionar el ícono del lápiz (orden 5) para editar toda la ficha
-        await self.seleccionar_icono(codigo_ficha, 5)
+        if not omitir_inicio:
+            await self.seleccionar_icono(codigo_ficha, 5)
 
         # Obtener el primer párrafo del texto
         primer_parrafo = texto_con_hipervínculos.split('\n')[0]
@@ -343,12 +994,13 @@ class WriterObs(NavegadorObs):
 
         # Guardar los cambios
         #self.page.evaluate('document.querySelector("#switch1").click()')
-        await self.page.click('button[type="submit"]')
+        await self.guardar_formulario(tabla=False)
         print("Se actualizó la sumilla y fecha de actualización")
 
 
 
-    async def actualizar_texto(self, codigo_ficha, texto_con_hipervínculos):
+    @medir()
+    async def actualizar_texto(self, codigo_ficha, texto_con_hipervínculos, omitir_inicio=False):
         """
         Actualiza el texto asociado a una ficha, eliminando el contenido previo y 
         guardando el nuevo contenido procesado.
@@ -357,14 +1009,17 @@ class WriterObs(NavegadorObs):
             self.page (self.page): Página de Playwright.
             codigo_ficha (str): Código de la ficha a procesar.
             texto_con_hipervínculos (str): Texto procesado que reemplazará el contenido existente.
-            timeout (int, optional): Tiempo de espera en milisegundos para las operaciones 
-                (por defecto: 50).
+            omitir_inicio (bool, optional): Si es True, asume que ya se encuentra en la pestaña de texto (default: False).
+
+        Returns:
+            bool: True si el texto se guardó; False si falló el llenado o el guardado del bloque.
 
         Raises:
-            Exception: Si ocurre algún error al interactuar con los elementos de la página.
+            Exception: Si ocurre algún error al abrir las subsecciones de la ficha.
         """
         # Seleccionar el ícono de texto (orden 1)
-        await self.seleccionar_icono(codigo_ficha, 1)
+        if not omitir_inicio:
+            await self.seleccionar_icono(codigo_ficha, 1)
 
         ### Paso 1: Reemplazar sección anterior
         # Darle click al lápiz
@@ -400,24 +1055,18 @@ class WriterObs(NavegadorObs):
         try:
             await self.llenar_campo('textarea[formcontrolname="textbox"]', texto_sin_primer_parrafo)
 
-            # Configurar el manejador de diálogo ANTES de hacer clic
-            async with self.page.expect_event("dialog") as event_info:
+            # Configurar el manejador de diálogo ANTES de hacer clic; se acepta al aparecer
+            async with self.esperas.dialogo(self.page):
                 await self.page.click('button[type="submit"]')
-            
-            # Obtener y manejar el diálogo
-            dialog = await event_info.value
-            print(f"Mensaje del diálogo: {dialog.message}")
-            await dialog.accept()  # Aceptar el diálogo
 
-            # Hacer clic en el botón
-            await self.click_selector('button[type="submit"]')
-                    
-            # Esperar un poco para asegurar que el diálogo sea manejado
-            await self.page.wait_for_timeout(self.timeout*3)
+            # Hacer clic en el botón y esperar la respuesta del guardado
+            await self.guardar_formulario(tabla=False)
             print("Se actualizó el texto de la ficha")
+            return True
 
         except Exception as e:
             print(f"Ocurrió un error actualizando el texto de la ficha: {str(e)}")
+            return False
         
         
         # # Paso 3: Desactivar la primera fila
@@ -436,59 +1085,99 @@ class WriterObs(NavegadorObs):
 
 
         ################## MANEJO DE GRÁFICOS ####################
-    async def actualizar_gráficos(self, codigo_ficha, resultado, desactivar=True):
+    @medir("actualizar_graficos")
+    async def actualizar_gráficos(self, codigo_ficha, resultado, desactivar=True, omitir_inicio=False, reconstruir=False):
         """
-        Desactiva los gráficos existentes, crea nuevas casillas con los datos proporcionados,
-        y guarda los cambios.
+        Sincroniza los gráficos de la ficha con `resultado`: empareja las filas existentes con
+        cada item por numeración y orden, edita en su lugar lo que cambió (la nota, que la tabla
+        no muestra, se escribe siempre), agrega los gráficos nuevos y desactiva los que ya no están.
 
         Args:
             codigo_ficha (str): Código de la ficha a procesar.
             resultado (list): Lista de listas con los detalles de cada gráfico. Contiene [orden, numeración, título, nota].
-            desactivar (bool, optional): Si es True, desactiva los gráficos. Si es False, los sobreescribe (default: True).
+            desactivar (bool, optional): Solo con reconstruir=True. Si es True, desactiva los gráficos. Si es False, los sobreescribe (default: True).
+            omitir_inicio (bool, optional): Si es True, asume que ya se encuentra en la pestaña de gráficos (default: False).
+            reconstruir (bool, optional): Si es True, desactiva todas las filas y vuelve a crear cada gráfico (default: False).
+
+        Returns:
+            dict: Número de filas previas y de gráficos "sin_cambios", "editados", "agregados",
+            "desactivados" y "fallidos".
 
         Raises:
             Exception: Si ocurre un error al procesar las filas o al guardar los cambios de los gráficos.
         """
 
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
         # Seleccionar el ícono de gráficos (orden 2)
-        await self.seleccionar_icono(codigo_ficha, 2)
+        if not omitir_inicio:
+            await self.seleccionar_icono(codigo_ficha, 2)
 
-        # Obtener número de gráficos
-        await self.page.wait_for_selector('tr.tbody-detail')
+        # Foto de los gráficos actuales
         rows = self.page.locator('tr.tbody-detail')
-        row_count = rows.count()
-        
-        # Paso 1: Usar la función desactivar_casillas 
-        await self.desactivar_casillas_activadas(rows, desactivar)
-
-        # Paso 2: Procesar cada entrada en resultado
-        for item in resultado:
-            # Crear nueva casilla
-            await self.page.wait_for_selector('a.btn-add i.fa-plus', state='visible')
-            await self.page.locator('a.btn-add').click()
+        try:
+            await self.page.wait_for_selector('tr.tbody-detail', timeout=5000)
+            filas = await self.capturar_filas(rows)
+        except PlaywrightTimeoutError:
+            # Ficha sin gráficos todavía
+            filas = []
+        row_count = len(filas)
+
+        if reconstruir:
+            # Desactivar todo y crear cada gráfico de nuevo
+            if row_count:
+                await self.desactivar_casillas_activadas(rows, desactivar)
+            operaciones = [{"accion": "agregar", "orden": None, "activar": False,
+                            "campos": {"order": str(orden), "numeration": numeracion, "title": titulo, "note": nota}}
+                           for orden, numeracion, titulo, nota in resultado]
+        else:
+            operaciones = planificar_graficos([fila_grafico(fila) for fila in filas], resultado)
+
+        filas_por_orden = {fila["orden"]: fila for fila in filas}
+        reporte = {"filas_previas": row_count,
+                   "sin_cambios": len(resultado) - sum(op["accion"] != "desactivar" for op in operaciones),
+                   "editados": 0, "agregados": 0, "desactivados": 0, "fallidos": 0}
+
+        for op in operaciones:
+            try:
+                if op["accion"] == "agregar":
+                    await self._agregar_grafico(op["campos"])
+                    reporte["agregados"] += 1
+                elif op["accion"] == "desactivar":
+                    await self._editar_fila(rows, filas_por_orden[op["orden"]], cambiar_estado=True)
+                    reporte["desactivados"] += 1
+                else:
+                    await self._editar_fila(rows, filas_por_orden[op["orden"]], campos=op["campos"],
+                                            cambiar_estado=op["activar"])
+                    reporte["editados"] += 1
+            except Exception as e:
+                print(f"Error al sincronizar el gráfico {op['campos'].get('numeration') or op['orden']}: {e}")
+                reporte["fallidos"] += 1
 
-            # Seleccionar Frame Datawrapper
-            await self.page.wait_for_selector('select[formcontrolname="idgraphictype"]', state='visible')
-            await self.page.select_option('select[formcontrolname="idgraphictype"]', value="12")
+        print(f"Se actualizaron los datos de los gráficos: {reporte}")
+        return reporte
 
-            # Desempaquetar los elementos de la lista
-            orden, numeracion, titulo, nota = item
+    @medir("agregar_grafico")
+    async def _agregar_grafico(self, campos):
+        # Crear nueva casilla
+        await self.page.wait_for_selector('a.btn-add i.fa-plus', state='visible')
+        await self.page.locator('a.btn-add').click()
 
-            # Llenar los campos
-            await self.llenar_campo('input[formcontrolname="order"]', str(orden))
-            await self.llenar_campo('input[formcontrolname="numeration"]', numeracion)
-            await self.llenar_campo('input[formcontrolname="title"]', titulo)
-            await self.llenar_campo('textarea[formcontrolname="note"]', nota)
+        # Seleccionar Frame Datawrapper
+        await self.page.wait_for_selector('select[formcontrolname="idgraphictype"]', state='visible')
+        await self.page.select_option('select[formcontrolname="idgraphictype"]', value="12")
 
-            # Activar el switch usando JavaScript
-            await self.page.evaluate('document.querySelector("#switch1").click()')
+        # Llenar los campos
+        await self.llenar_campo('input[formcontrolname="order"]', campos["order"])
+        await self.llenar_campo('input[formcontrolname="numeration"]', campos["numeration"])
+        await self.llenar_campo('input[formcontrolname="title"]', campos["title"])
+        await self.llenar_campo('textarea[formcontrolname="note"]', campos["note"])
 
-            # Guardar la casilla
-            await self.click_selector('button[type="submit"]')
+        # Activar el switch usando JavaScript
+        await self.page.evaluate('document.querySelector("#switch1").click()')
 
-            # Esperar a que se recargue la tabla antes de procesar la siguiente entrada
-            await self.page.wait_for_selector('tr.tbody-detail', state='visible')
-        print("Se actualizaron los datos de los gráficos")
+        # Guardar la casilla y esperar a que se recargue la tabla antes de procesar la siguiente entrada
+        await self.guardar_formulario()
 
 
 
@@ -533,33 +1222,214 @@ class WriterObs(NavegadorObs):
         if not omitir_inicio:
             await self.seleccionar_icono(codigo_ficha, 3)  # Seleccionar el ícono de referencias (orden 2)
 
-        referencias = re.split(r'\n(?=\[\d+\])', referencias_limpias.strip())  # Dividir las referencias por líneas
-        pattern = r'https?://[^\s]+(?:\s|$|\.)'  # Captura enlaces desde "http" hasta espacio, fin de línea o punto
+        for referencia in dividir_referencias(referencias_limpias):
+            try:
+                await self._agregar_referencia(referencia["content"], referencia["urlsource"])
+            except Exception as e:
+                print(f"Error al agregar referencia: {referencia['content'][:30]}... -> {str(e)}")
+
+        print("Se agregaron todas las referencias")
+
+    @medir("agregar_referencia")
+    async def _agregar_referencia(self, content, urlsource):
+        # Hacer clic en "Agregar Nuevo"
+        await self.page.wait_for_selector('a.btn-add')
+        await self.page.locator("a.btn-add").nth(1).click()
+
+        # Llenar el contenido y la URL de la referencia
+        await self.llenar_campo('textarea[formcontrolname="content"]', content)
+        await self.llenar_campo('input[formcontrolname="urlsource"]', urlsource)
+
+        # Guardar cambios y esperar la recarga de la tabla
+        await self.guardar_formulario()
+
+    @medir("editar_fila")
+    async def _editar_fila(self, rows, fila, content=None, urlsource=None, cambiar_estado=False, campos=None):
+        """
+        Abre el formulario de una fila, cambia solo los campos indicados y guarda.
+
+        Args:
+            campos (dict, optional): Otros campos a cambiar, {formcontrolname: valor}.
+        """
+        index = fila["orden"]
+        if fila["lapiz_visible"]:
+            await rows.nth(index).locator('a.a-icon i.fa-pencil').click()
+        else:
+            await self.page.evaluate('''(index) => {
+                var row = document.querySelectorAll('tr.tbody-detail')[index];
+                var pencil = row ? row.querySelector('a.a-icon i.fa-pencil') : null;
+                if (pencil) {
+                    pencil.scrollIntoView({ behavior: 'smooth', block: 'center' });
+                    pencil.click();
+                }
+            }''', index)
+
+        if content is not None:
+            await self.llenar_campo('textarea[formcontrolname="content"]', content)
+        if urlsource is not None:
+            await self.llenar_campo('input[formcontrolname="urlsource"]', urlsource)
+        for campo, valor in (campos or {}).items():
+            etiqueta = "textarea" if campo == "note" else "input"
+            await self.llenar_campo(f'{etiqueta}[formcontrolname="{campo}"]', valor)
+        if cambiar_estado:
+            await self.page.evaluate('document.querySelector("#switch1").click()')
+
+        await self.guardar_formulario(hover=True)
+
+    @medir()
+    async def sincronizar_referencias(self, codigo_ficha, referencias_limpias, omitir_inicio=False):
+        """
+        Reconcilia la tabla de referencias con `referencias_limpias`: lee las filas existentes
+        (contenido, enlace y estado) y solo agrega, edita, activa o desactiva lo que cambió,
+        en lugar de desactivar todo y volver a agregar cada referencia.
+
+        Args:
+            codigo_ficha (str): Código de la ficha a procesar.
+            referencias_limpias (str): Referencias procesadas (refs_clean de TextFormatting).
+            omitir_inicio (bool, optional): Si es True, asume que ya se encuentra en la pestaña de referencias (default: False).
+
+        Returns:
+            dict: Número de referencias "sin_cambios", "editadas", "desactivadas", "agregadas" y "fallidas".
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
-        for referencia in referencias:
+        if not omitir_inicio:
+            await self.seleccionar_icono(codigo_ficha, 3)
+
+        deseadas = dividir_referencias(referencias_limpias)
+        rows = self.page.locator('tr.tbody-detail')
+        try:
+            await self.page.wait_for_selector('tr.tbody-detail', timeout=5000)
+            existentes = await rows.evaluate_all(js_capturar_referencias)
+        except PlaywrightTimeoutError:
+            # Ficha sin referencias todavía
+            existentes = []
+
+        operaciones = planificar_referencias(existentes, deseadas)
+        filas = {fila["orden"]: fila for fila in existentes}
+        reporte = {"sin_cambios": len(deseadas) - sum(op["accion"] != "desactivar" for op in operaciones),
+                   "editadas": 0, "desactivadas": 0, "agregadas": 0, "fallidas": 0}
+
+        for op in operaciones:
             try:
-                # Hacer clic en "Agregar Nuevo"
-                await self.page.wait_for_selector('a.btn-add')
-                await self.page.locator("a.btn-add").nth(1).click()
+                if op["accion"] == "agregar":
+                    await self._agregar_referencia(op["content"], op["urlsource"])
+                    reporte["agregadas"] += 1
+                elif op["accion"] == "desactivar":
+                    await self._editar_fila(rows, filas[op["orden"]], cambiar_estado=True)
+                    reporte["desactivadas"] += 1
+                else:
+                    await self._editar_fila(rows, filas[op["orden"]], content=op["content"],
+                                            urlsource=op["urlsource"], cambiar_estado=op["activar"])
+                    reporte["editadas"] += 1
+            except Exception as e:
+                print(f"Error al sincronizar la referencia de la fila {op['orden']}: {e}")
+                reporte["fallidas"] += 1
 
-                # Llenar el campo de contenido con la referencia
-                await self.llenar_campo('textarea[formcontrolname="content"]', referencia.strip())
+        print(f"Referencias de {codigo_ficha} sincronizadas: {reporte}")
+        return reporte
 
-                # Obtener URL de la referencia
-                match = re.search(pattern, referencia)
-                url_value = match.group(0).rstrip('.') if match else ""  # Capturar URL limpia
+       
 
-                # Insertar URL en el campo correspondiente
-                await self.llenar_campo('input[formcontrolname="urlsource"]', url_value)
+    ################## ACTUALIZACIÓN COMPLETA ####################
+    async def _registrar_enlaces_lista(self):
+        """
+        Registra en `self.rutas` los enlaces de los íconos de todas las filas de la lista abierta,
+        para que las secciones de cada ficha se abran por URL sin volver a la lista.
+        """
+        await self.page.wait_for_selector('tr.tbody-detail')
+        filas = await self.capturar_filas(self.page.locator('tr.tbody-detail'))
+        for fila in filas:
+            for orden, enlace in enumerate(fila["enlaces"]):
+                if fila["codigo"] and enlace:
+                    self.rutas.registrar_ficha(fila["codigo"], orden, enlace)
+
+    @medir(trazar=True)
+    async def aplicar_cambios(self, codigo_ficha, plan, vaciar=False):
+        """
+        Aplica todos los cambios de una ficha en una sola visita.
 
-                # Guardar cambios
-                await self.click_selector('button[type="submit"]')
-                await self.page.wait_for_selector('tr.tbody-detail', state='visible')  # Esperar recarga
+        La lista del subrubro se abre a lo más una vez: de ella se leen los enlaces de los íconos
+        de la ficha y cada sección (texto, gráficos, referencias, sumilla) se abre por URL. Si
+        algún enlace no se puede leer, se vuelve a la lista por URL y se hace clic en el ícono.
 
+        Args:
+            codigo_ficha (str): Código de la ficha a actualizar.
+            plan (tuple | dict): Salida de TextFormatting.procesar_contenido
+                (text_clean, refs_clean, items_clean), o un dict con las llaves "texto",
+                "referencias" y "items". Las secciones con valor None se omiten.
+            vaciar (bool, optional): Si es True, una lista vacía de referencias o de gráficos
+                desactiva todas las filas de esa sección. Por defecto (False) se omite, igual que None.
+
+        Returns:
+            dict: Tiempo en milisegundos de cada paso ("pasos"), pasos fallidos ("errores"),
+            reporte de cada sección sincronizada ("secciones"), número de navegaciones y tiempo total.
+        """
+        if isinstance(plan, dict):
+            texto, referencias, items = plan.get("texto"), plan.get("referencias"), plan.get("items")
+        else:
+            texto, referencias, items = plan
+
+        # procesar_contenido devuelve "" y [] cuando la ficha no tiene referencias o gráficos
+        if not vaciar:
+            referencias = referencias or None
+            items = items or None
+
+        # La sumilla es el primer párrafo del texto
+        contenido = {"texto": texto, "graficos": items, "referencias": referencias, "sumilla": texto}
+        pasos = [(nombre, orden) for nombre, orden in secciones_ficha if contenido[nombre] is not None]
+        reporte = {"codigo": codigo_ficha, "pasos": {}, "errores": {}, "secciones": {}, "navegaciones": 0}
+        inicio_total = time.perf_counter()
+
+        if self.rutas is None:
+            self.rutas = RutasAdmin()
+
+        # Abrir la lista solo si falta el enlace de alguna sección
+        inicio = time.perf_counter()
+        url_lista = None
+        if any(not self.rutas.ruta_ficha(codigo_ficha, orden) for _, orden in pasos):
+            await self.identificar_rubro(codigo_ficha, forzar_lista=True)
+            await self._registrar_enlaces_lista()
+            url_lista = self.page.url
+            reporte["navegaciones"] += 1
+        reporte["pasos"]["lista"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        for nombre, orden in pasos:
+            if nombre == "sumilla" and reporte["errores"]:
+                logging.warning(f"No se actualiza la sumilla de {codigo_ficha} porque fallaron otros pasos")
+                continue
+            inicio = time.perf_counter()
+            try:
+                if not self.rutas.ruta_ficha(codigo_ficha, orden) and self.page.url != url_lista:
+                    await self.page.goto(url_lista)
+                    reporte["navegaciones"] += 1
+                await self.seleccionar_icono(codigo_ficha, orden)
+                reporte["navegaciones"] += 1
+
+                if nombre == "texto":
+                    if not await self.actualizar_texto(codigo_ficha, texto, omitir_inicio=True):
+                        reporte["errores"][nombre] = "No se guardó el bloque de texto"
+                elif nombre in ("graficos", "referencias"):
+                    if nombre == "graficos":
+                        seccion = await self.actualizar_gráficos(codigo_ficha, items, omitir_inicio=True)
+                        fallidas = seccion["fallidos"]
+                    else:
+                        seccion = await self.sincronizar_referencias(codigo_ficha, referencias, omitir_inicio=True)
+                        fallidas = seccion["fallidas"]
+                    reporte["secciones"][nombre] = seccion
+                    if fallidas:
+                        reporte["errores"][nombre] = f"{fallidas} filas no se pudieron sincronizar"
+                else:
+                    await self.actualizar_sumilla(codigo_ficha, texto, omitir_inicio=True)
             except Exception as e:
-                print(f"Error al agregar referencia: {referencia[:30]}... -> {str(e)}")
+                logging.error(f"Error en el paso '{nombre}' de la ficha {codigo_ficha}: {e}")
+                reporte["errores"][nombre] = str(e)
+            reporte["pasos"][nombre] = round((time.perf_counter() - inicio) * 1000, 1)
 
-        print("Se agregaron todas las referencias")
+        reporte["total_ms"] = round((time.perf_counter() - inicio_total) * 1000, 1)
+        logging.info(f"Ficha {codigo_ficha} actualizada en {reporte['total_ms']} ms "
+                     f"({reporte['navegaciones']} navegaciones): {reporte['pasos']}")
+        return reporte
 
        
 
@@ -631,24 +1501,41 @@ class WriterObs(NavegadorObs):
                     # Insertar el contenido extraído en el campo de URL
                     await self.llenar_campo('input[formcontrolname="urlsource"]', url_value)
 
-                    # Hacer hover sobre el botón y luego clic
-                    save_button = self.page.locator('button[type="submit"]')
-                    await save_button.hover()  # Hover sobre el botón
-                    await self.page.click('button[type="submit"]')
-
-                    # Esperar a que la tabla se recargue antes de continuar
-                    await self.page.wait_for_selector('tr.tbody-detail', state='visible')
+                    # Hacer hover sobre el botón y luego clic, esperando la recarga de la tabla
+                    await self.guardar_formulario(hover=True)
                 except Exception as e:
                     print(f"Error al procesar la fila, pero el lápiz sí era visible {index + 1}: {e}")
         print("Se hipervincularon todas las referencias")
 
 
 class ReaderObs(NavegadorObs):
-    def __init__(self, timeout, headless):
-        super().__init__(timeout, headless)
+    def __init__(self, timeout, headless, modo: str = "dom", almacen: AlmacenResultados | None = None, **kwargs):
+        """
+        Args:
+            modo (str): "dom" lee los formularios campo por campo; "red" captura las respuestas
+                JSON de la API del panel y solo lee el formulario si la respuesta no trae la ficha completa.
+            almacen (AlmacenResultados, optional): Destino donde se escribe cada ficha en cuanto se lee.
+                Si es None, los resultados se acumulan y guardar_resultados los combina en info_obs_prueba.json.
+        """
+        super().__init__(timeout, headless, **kwargs)
+        if modo not in ("dom", "red"):
+            raise ValueError(f"Modo de lectura no válido: {modo}")
+        self.modo = modo
+        self.almacen = almacen
+        self.captura: CapturaRed | None = None
         self.info_fichas: dict[dict] = {}  # Lista de diccionarios para almacenar la información de las fichas
         self.fichas_con_problemas = []  # Lista para almacenar fichas con problemas
 
+    async def iniciar_navegador(self):
+        """
+        Inicia el navegador y, en modo "red", instala la captura de respuestas JSON.
+        """
+        await super().iniciar_navegador()
+        if self.modo == "red":
+            self.captura = CapturaRed(mapeo_tematica)
+            self.captura.instalar(self.page)
+
+    @medir()
     async def seleccionar_rubro_y_subrubro(self, rubro, subrubro):
         """
         Selecciona el rubro y subrubro en la interfaz.
@@ -661,6 +1548,39 @@ class ReaderObs(NavegadorObs):
 
 
     # FUNCIONES PRINCIPALES
+    @medir()
+    async def extraer_formulario(self, territorial=False):
+        """
+        Lee todos los campos de `campos_ficha` del formulario abierto con un solo `page.evaluate`.
+
+        Args:
+            territorial (bool): Si es True, incluye los campos marcados como territoriales.
+
+        Returns:
+            tuple: (registro, errores). `registro` tiene un valor por campo (None o el valor
+            'faltante' si no se pudo leer) y `errores` mapea cada campo fallido a su mensaje.
+        """
+        campos = {
+            campo: spec for campo, spec in campos_ficha.items()
+            if territorial or not spec.get("territorial")
+        }
+        resultado = await self.page.evaluate(
+            js_extraer_formulario,
+            [[campo, spec["selector"], spec["tipo"]] for campo, spec in campos.items()]
+        )
+
+        registro = {}
+        for campo, spec in campos.items():
+            if campo in resultado["valores"]:
+                valor = resultado["valores"][campo]
+                if "mapeo" in spec:
+                    valor = spec["mapeo"].get(valor, spec.get("defecto"))
+                registro[campo] = valor
+            else:
+                registro[campo] = spec.get("faltante")
+        return registro, resultado["errores"]
+
+    @medir()
     async def scrapear_ficha(self, codigo: str, territorial=False, estado: str = ""):
         """
         Extrae información de una ficha abierta.
@@ -668,136 +1588,228 @@ class ReaderObs(NavegadorObs):
         Args:
             codigo (str): Código de la ficha.
             territorial (bool): Indica si se debe extraer información territorial.
+            estado (str): Estado de la ficha leído de la lista.
 
         Returns:
-            dict: Información de la ficha.
+            dict: Errores por campo (vacío si la ficha se leyó completa).
         """
-        campos = {
-            "titulo_corto": 'input[formcontrolname="shorttitle"]',
-            "titulo_largo": 'input[formcontrolname="longtitle"]',
-            "sumilla": 'textarea[formcontrolname="summary"]',
-            "fecha_publicacion": 'input[formcontrolname="publication"]',
-            "ultima_actualizacion": 'input[formcontrolname="lastUpdated"]',
-            "tags": 'input[formcontrolname="tags"]'
-        }
+        # Esperar a que el formulario esté renderizado y leerlo en un solo viaje
+        await self.page.wait_for_selector(campos_ficha["sumilla"]["selector"])
+        registro, errores = await self.extraer_formulario(territorial=territorial)
 
-        temp_dict = {}
-        for campo, selector in campos.items():
-            try:
-                await self.page.wait_for_selector(selector)
-                await self.page.locator(selector).scroll_into_view_if_needed()
-                temp_dict[campo] = await self.page.locator(selector).input_value()
-            except Exception as e:
-                logging.error(f"Error al extraer '{campo}' de la ficha {codigo}: {e}")
-                temp_dict[campo] = None
-                await self.page.context.clear_cookies()
-                await self.page.evaluate("caches.keys().then(keys => keys.forEach(key => caches.delete(key)))")
-                await self.page.reload(wait_until="networkidle")
-            self.info_fichas[codigo] = temp_dict
+        for campo, error in errores.items():
+            logging.error(f"Error al extraer '{campo}' de la ficha {codigo}: {error}")
+
+        registro["estado"] = estado
+        # Mantener el orden de llaves de info_obs.json
+        self.info_fichas[codigo] = {campo: registro[campo] for campo in orden_campos_ficha if campo in registro}
+        self._emitir(codigo)
+        return errores
 
-        # Extraer "Estado"
-        self.info_fichas[codigo]["estado"] = estado
+    def _emitir(self, codigo: str):
+        """
+        Escribe la ficha en el almacén en cuanto se termina de leer.
+        """
+        if self.almacen is not None:
+            self.almacen.guardar(codigo, self.info_fichas[codigo])
 
-        # Extraer "Temática"
+    def _guardar_registro_capturado(self, codigo: str, registro: dict, territorial=False, estado: str = ""):
+        """
+        Guarda en info_fichas un registro obtenido de la red con la misma forma que scrapear_ficha.
+        """
+        registro = dict(registro)
+        if estado:
+            registro["estado"] = estado
+        if not territorial:
+            registro.pop("departamento", None)
+        elif "departamento" not in registro:
+            registro["departamento"] = "No disponible"
+        self.info_fichas[codigo] = {campo: registro.get(campo) for campo in orden_campos_ficha if campo in registro}
+        self._emitir(codigo)
+
+
+    @medir(trazar=True)
+    async def obtener_datos(self, codigo_ficha: str, territorial=False, estado: str="", enlace: str | None = None):
+        """
+        Procesa una ficha individualmente.
+
+        Args:
+            enlace (str, optional): URL del editor de la ficha. Si se conoce, se abre
+                directamente; si no, se hace clic en el ícono desde la lista actual.
+
+        Raises:
+            Exception: Si no se pudo leer la ficha (la página se recarga antes de propagar el error).
+        """
         try:
-            tematica_selector = 'select[formcontrolname="idtematic"]'
-            await self.page.wait_for_selector(tematica_selector)
-            numero = await self.page.locator(tematica_selector).input_value()
-            tematica = mapeo_tematica.get(numero, "Desconocido")
-            self.info_fichas[codigo]["tematica"] = tematica
+            if enlace:
+                await self.page.goto(enlace)
+            else:
+                await self.seleccionar_icono(codigo_ficha, 5)
+
+            # En modo red, el detalle de la ficha llega por XHR al abrir el editor
+            if self.captura:
+                registro = await self.captura.esperar_registro(codigo_ficha, timeout=10)
+                if registro:
+                    self._guardar_registro_capturado(codigo_ficha, registro, territorial=territorial, estado=estado)
+                    return
+            await self.scrapear_ficha(codigo_ficha, territorial=territorial, estado=estado)
         except Exception as e:
-            print(f"No se pudo extraer la temática: {e}")
-            self.info_fichas[codigo]["tematica"] = "No disponible"
+            logging.error(f"Error al obtener los datos de la ficha {codigo_ficha}: {e}")
+            try:
+                await self.page.reload(wait_until="networkidle")
+            except Exception:
+                # Si la página ya no responde se propaga el error original
+                pass
+            raise
+
+
+    @medir()
+    async def listar_fichas(self, rubro, subrubro=None):
+        """
+        Abre la lista de un rubro/subrubro y lee todas sus filas en una sola pasada.
+
+        Returns:
+            tuple: (url de la lista, lista de dicts con codigo, estado, fecha, orden y enlace al editor).
+            'fecha' es la primera fecha que aparezca en la fila, o None.
+        """
+        await self.seleccionar_rubro_y_subrubro(rubro, subrubro)
+        await self.page.wait_for_selector('tr.tbody-detail')
+        url_lista = self.page.url
+        if self.rutas:
+            self.rutas.registrar_lista(rubro, subrubro, url_lista)
+
+        fichas = []
+        for fila in await self.capturar_filas(self.page.locator('tr.tbody-detail')):
+            enlaces = fila["enlaces"]
+            enlace = enlaces[5] if len(enlaces) > 5 and enlaces[5] else None
+            if enlace and self.rutas:
+                self.rutas.registrar_ficha(fila["codigo"], 5, enlace)
+            fichas.append({
+                "codigo": fila["codigo"],
+                "estado": fila["celdas"][6] if len(fila["celdas"]) > 6 else "",
+                "fecha": fecha_de_celdas(fila["celdas"]),
+                "orden": fila["orden"],
+                "enlace": enlace,
+            })
+        return url_lista, fichas
+
+
+    async def leer_capturadas(self, fichas, territorial, descripcion=""):
+        """
+        En modo red, guarda las fichas que ya llegaron completas en la respuesta de la lista.
+
+        Returns:
+            list[dict]: Fichas que todavía hay que abrir.
+        """
+        if not self.captura:
+            return fichas
+        registros = await self.captura.registros()
+        pendientes = []
+        for ficha in fichas:
+            if self.captura.completo(ficha["codigo"]):
+                self._guardar_registro_capturado(ficha["codigo"], registros[ficha["codigo"]],
+                                                 territorial=territorial, estado=ficha["estado"])
+            else:
+                pendientes.append(ficha)
+        logging.info(f"{len(fichas) - len(pendientes)} fichas de {descripcion} leídas de la respuesta de la lista")
+        return pendientes
+
+    async def leer_ficha(self, ficha, url_lista, territorial):
+        """
+        Lee una ficha obtenida con listar_fichas. Si la ficha no tiene enlace directo,
+        se vuelve a la lista por URL para hacer clic en su ícono.
+
+        Raises:
+            Exception: Si no se pudo leer la ficha.
+        """
+        if not ficha["enlace"] and self.page.url != url_lista:
+            await self.page.goto(url_lista)
+            await self.page.wait_for_selector('tr.tbody-detail')
+
+        await self.obtener_datos(ficha["codigo"], territorial=territorial, estado=ficha["estado"],
+                                 enlace=ficha["enlace"])
+
+
+    async def _procesar_cola(self, fichas, url_lista, territorial, descripcion):
+        """
+        Lee cada ficha de una cola obtenida con listar_fichas.
+
+        Returns:
+            tuple: (procesadas, fallidas)
+        """
+        # En modo red, la respuesta de la lista puede traer fichas completas
+        fichas = await self.leer_capturadas(fichas, territorial, descripcion)
+
+        from tqdm.asyncio import tqdm_asyncio
 
-        # Extraer "Departamentos" si es territorial
-        if territorial:
+        # Procesar en orden aleatorio
+        random.shuffle(fichas)
+        
+        # Procesar fichas con barra de progreso
+        procesadas = 0
+        fallidas = 0
+        
+        # Usar tqdm para mostrar el progreso
+        for ficha in tqdm_asyncio(fichas, desc=f"Procesando fichas de {descripcion}"):
             try:
-                departamento_value = await self.page.evaluate(
-                    '''() => {
-                        const selected = document.querySelector('select[formcontrolname="iddpto"] option:checked');
-                        return selected ? selected.textContent.trim() : "No disponible";
-                    }'''
-                )
-                self.info_fichas[codigo]["departamento"] = departamento_value
+                # Los errores transitorios se reintentan con espera exponencial
+                await self.politica.ejecutar(self.leer_ficha, ficha, url_lista, territorial)
+                procesadas += 1
+                
             except Exception as e:
-                print(f"Error al extraer 'Departamento': {e}")
-                self.info_fichas[codigo]["departamento"] = "No disponible"
+                logging.error(f"Error procesando fila {ficha['orden']} (código {ficha['codigo']}): {str(e)}")
+                fallidas += 1
+        
+        return procesadas, fallidas
 
 
-    async def obtener_datos(self, codigo_ficha: str, territorial=False, estado: str=""):
+    async def sincronizar_fichas(self, rubro, subrubro=None, territorial=False, snapshot: dict | None = None):
         """
-        Procesa una ficha individualmente.
+        Sincronización incremental: lee la lista, la compara con la metadata guardada y solo abre
+        las fichas nuevas, con cambio de estado o con una fecha en la lista posterior a la guardada.
+
+        Args:
+            snapshot (dict): Metadata guardada por código (formato info_obs.json).
+
+        Returns:
+            dict: Reporte con los códigos "nuevas", "cambio_estado", "actualizadas" y "omitidas",
+            y los totales "procesadas" y "fallidas".
         """
-        try:
-            await self.seleccionar_icono(codigo_ficha, 5) 
-            await self.scrapear_ficha(codigo_ficha, territorial=territorial, estado=estado)
-        except Exception as e:
-            await self.page.reload(wait_until="networkidle")
-        finally:
-            await self.volver_a_inicio()
+        url_lista, fichas = await self.listar_fichas(rubro, subrubro)
+        comparacion = comparar_con_snapshot(fichas, snapshot or {})
+        cola = comparacion["nuevas"] + comparacion["cambio_estado"] + comparacion["actualizadas"]
+
+        logging.info(
+            f"Sincronización de {subrubro or rubro}: {len(comparacion['nuevas'])} nuevas, "
+            f"{len(comparacion['cambio_estado'])} con cambio de estado, "
+            f"{len(comparacion['actualizadas'])} actualizadas, {len(comparacion['omitidas'])} omitidas"
+        )
+
+        procesadas, fallidas = await self._procesar_cola(cola, url_lista, territorial, subrubro or rubro)
+        reporte = {clave: [ficha["codigo"] for ficha in valor] for clave, valor in comparacion.items() if clave != "omitidas"}
+        reporte["omitidas"] = comparacion["omitidas"]
+        reporte["procesadas"] = procesadas
+        reporte["fallidas"] = fallidas
+        return reporte
 
 
     async def scrapear_fichas(self, rubro, subrubro=None, territorial=False):
         """
         Procesa todas las fichas dentro de un rubro con barra de progreso tqdm.
         Thanks Claude for the progress bar
+
+        La lista se lee una sola vez; cada ficha se abre directamente por su enlace
+        y, si no lo tiene, se vuelve a la URL de la lista en lugar de navegar por el menú.
         """
         try:
-            # Seleccionar rubro y subrubro
-            await self.seleccionar_rubro_y_subrubro(rubro, subrubro)
-            
-            # Esperar a que las fichas aparezcan
-            await self.page.wait_for_selector('tr.tbody-detail')
-            
-            # Obtener todas las filas
-            filas = self.page.locator('tr.tbody-detail')
-            total_filas = await filas.count()
+            # Leer la lista completa en una sola pasada
+            url_lista, fichas = await self.listar_fichas(rubro, subrubro)
+            total_filas = len(fichas)
             
             if not rubro in ["Megatendencias", "Fuerzas primarias"]:
                 print(f"Se extraerá información de {total_filas} fichas de {subrubro}")
             
-            # Generar índices aleatorios
-            indices_aleatorios = list(range(total_filas))
-            random.shuffle(indices_aleatorios)
-            
-            # Procesar fichas con barra de progreso
-            procesadas = 0
-            fallidas = 0
-            
-            # Usar tqdm para mostrar el progreso
-            for i in tqdm_asyncio(indices_aleatorios, desc=f"Procesando fichas de {subrubro or rubro}"):
-                try:
-                    # Reseleccionar rubro y subrubro para cada ficha
-                    await self.seleccionar_rubro_y_subrubro(rubro, subrubro)
-                    
-                    # Esperar a que las fichas se carguen después de la navegación
-                    await self.page.wait_for_selector('tr.tbody-detail')
-                    
-                    # Obtener filas actualizadas
-                    filas_actuales = self.page.locator('tr.tbody-detail')
-                    total_actual = await filas_actuales.count()
-                    
-                    if i >= total_actual:
-                        logging.warning(f"Índice {i} fuera de rango. Hay {total_actual} filas disponibles")
-                        fallidas += 1
-                        continue
-                    
-                    # Seleccionar la fila específica
-                    fila = filas_actuales.nth(i)
-                    
-                    # Obtener el código de la ficha de manera más robusta
-                    codigo_ficha = await fila.locator('td').nth(1).evaluate('node => node.innerText.trim()')
-                    estado = await fila.locator('td').nth(6).evaluate('node => node.innerText.trim()')
-                
-                    # Procesar la ficha
-                    await self.obtener_datos(codigo_ficha, territorial=territorial, estado=estado)
-                    procesadas += 1
-                    
-                except Exception as e:
-                    codigo = codigo_ficha if 'codigo_ficha' in locals() else "desconocido"
-                    logging.error(f"Error procesando fila {i} (código {codigo}): {str(e)}")
-                    fallidas += 1
-                    await self.page.wait_for_timeout(3000)  # Esperar un poco antes de continuar
+            procesadas, fallidas = await self._procesar_cola(fichas, url_lista, territorial, subrubro or rubro)
             
             # Resumen final
             logging.info(f"Procesamiento completado para {subrubro or rubro}: {procesadas} fichas procesadas, {fallidas} fallidas")
@@ -812,7 +1824,12 @@ class ReaderObs(NavegadorObs):
     async def guardar_resultados(self):
         """
         Actualiza los resultados en archivos JSON y TXT sin sobrescribirlos.
+        Si la sesión tiene un almacén, las fichas ya se escribieron al leerse y solo se limpia la sesión.
         """
+        if self.almacen is not None:
+            self.info_fichas = {}
+            return
+
         # Construye las rutas completas para los archivos
         archivo_info = os.path.join(directorio_salida, 'info_obs_prueba.json')
 
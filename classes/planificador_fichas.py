@@ -0,0 +1,202 @@
+import time
+import random
+import asyncio
+import logging
+from RPA_Ceplan.classes.navegador_observatorio import comparar_con_snapshot
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+from RPA_Ceplan.classes.navegador_compartido import rss_procesos_hijos
+from RPA_Ceplan.classes.politica_reintentos import clasificar_error
+
+
+class PlanificadorFichas():
+    """
+    Reparte la lectura de fichas entre las sesiones de un PoolSesiones de ReaderObs.
+
+    Primero se leen todas las listas y se arma una cola global con las fichas. Después cada
+    trabajador toma la siguiente ficha disponible, sin importar a qué subrubro pertenece, de
+    modo que un subrubro grande no deja a las demás sesiones esperando. Las fichas que fallan
+    por un error transitorio vuelven al final de la cola hasta `intentos_maximos` veces; cada
+    intento pasa por la política de la sesión (y su interruptor, si lo tiene).
+    """
+
+    def __init__(self, pool: PoolSesiones, trabajadores: int | None = None, intentos_maximos: int = 3,
+                 fichas_por_prestamo: int = 25, snapshot: dict | None = None):
+        """
+        Args:
+            pool (PoolSesiones): Pool de sesiones ReaderObs ya iniciado.
+            trabajadores (int, optional): Número de trabajadores. Por defecto, el tamaño del pool.
+            intentos_maximos (int): Intentos por ficha antes de darla por fallida.
+            fichas_por_prestamo (int): Fichas que un trabajador lee antes de devolver su sesión
+                al pool, para que el pool pueda reciclarla.
+            snapshot (dict, optional): Metadata guardada (formato info_obs.json). Si se pasa,
+                solo se encolan las fichas nuevas o modificadas (ver comparar_con_snapshot).
+        """
+        self.pool = pool
+        self.trabajadores = trabajadores or pool.tamano
+        self.intentos_maximos = intentos_maximos
+        self.fichas_por_prestamo = fichas_por_prestamo
+        self.snapshot = snapshot
+        self.cola: asyncio.Queue = asyncio.Queue()
+        self.fallidas: list[str] = []
+        self.omitidas = 0
+        self.estadisticas: dict[int, dict] = {}
+        self._progreso = None
+
+    async def _listar(self, rubro, subrubro, territorial) -> list[dict]:
+        """
+        Lee una lista y devuelve sus fichas como elementos de la cola.
+        """
+        async with self.pool.prestar() as sesion:
+            url_lista, fichas = await sesion.listar_fichas(rubro, subrubro)
+            if self.snapshot is not None:
+                comparacion = comparar_con_snapshot(fichas, self.snapshot)
+                fichas = comparacion["nuevas"] + comparacion["cambio_estado"] + comparacion["actualizadas"]
+                self.omitidas += len(comparacion["omitidas"])
+            fichas = await sesion.leer_capturadas(fichas, territorial, subrubro or rubro)
+        return [{"ficha": ficha, "url_lista": url_lista, "territorial": territorial, "intentos": 0}
+                for ficha in fichas]
+
+    async def armar_cola(self, listas: list[tuple]) -> int:
+        """
+        Lee todas las listas en paralelo y arma la cola global.
+
+        Args:
+            listas (list[tuple]): Tuplas (rubro, subrubro, territorial).
+
+        Returns:
+            int: Número de fichas encoladas.
+        """
+        resultados = await asyncio.gather(
+            *(self._listar(rubro, subrubro, territorial) for rubro, subrubro, territorial in listas),
+            return_exceptions=True
+        )
+        elementos = []
+        for (rubro, subrubro, _), resultado in zip(listas, resultados):
+            if isinstance(resultado, Exception):
+                logging.error(f"No se pudo leer la lista de {subrubro or rubro}: {resultado}")
+            else:
+                elementos.extend(resultado)
+
+        # Orden aleatorio para no concentrar un subrubro en el mismo momento
+        random.shuffle(elementos)
+        for elemento in elementos:
+            self.cola.put_nowait(elemento)
+        logging.info(f"Cola global con {len(elementos)} fichas de {len(listas)} listas")
+        return len(elementos)
+
+    async def _trabajador(self, numero: int):
+        """
+        Toma fichas de la cola hasta recibir la señal de fin (None).
+        """
+        stats = self.estadisticas.setdefault(numero, {"fichas": 0, "fallos": 0, "segundos": 0.0, "js_heap_mb": None})
+        terminar = False
+        elemento = await self.cola.get()
+        while elemento is not None:
+            try:
+                async with self.pool.prestar() as sesion:
+                    leidas = 0
+                    while elemento is not None:
+                        inicio = time.perf_counter()
+                        try:
+                            # Un intento por turno: los reintentos son los reencolados
+                            await sesion.politica.ejecutar(sesion.leer_ficha, elemento["ficha"], elemento["url_lista"],
+                                                           elemento["territorial"], intentos=1)
+                        except Exception as e:
+                            stats["segundos"] += time.perf_counter() - inicio
+                            stats["fallos"] += 1
+                            self._reencolar(elemento, e)
+                            # Devolver la sesión: el pool la revisa antes del siguiente préstamo
+                            elemento = None
+                            break
+                        stats["segundos"] += time.perf_counter() - inicio
+                        stats["fichas"] += 1
+                        self.cola.task_done()
+                        if self._progreso is not None:
+                            self._progreso.update(1)
+
+                        leidas += 1
+                        elemento = None
+                        # Seguir con la misma sesión solo si ya hay una ficha esperando: esperar
+                        # con la sesión prestada dejaría sin sesión a los demás trabajadores
+                        if leidas < self.fichas_por_prestamo and not self.cola.empty():
+                            elemento = self.cola.get_nowait()
+                            terminar = elemento is None
+                    stats["js_heap_mb"] = (await sesion.memoria())["js_heap_mb"]
+            except Exception as e:
+                # No se pudo obtener una sesión; la ficha en mano vuelve a la cola
+                logging.error(f"Trabajador {numero} sin sesión: {e}")
+                if elemento is not None:
+                    self._reencolar(elemento, e)
+            if terminar:
+                break
+            # La siguiente ficha se espera sin sesión prestada
+            elemento = await self.cola.get()
+        self.cola.task_done()
+
+    def _reencolar(self, elemento: dict, error: Exception):
+        codigo = elemento["ficha"]["codigo"]
+        elemento["intentos"] += 1
+        # Los errores permanentes (por ejemplo, una ficha que no existe) no se reintentan
+        if elemento["intentos"] < self.intentos_maximos and clasificar_error(error) != "permanente":
+            logging.warning(f"Ficha {codigo} falló (intento {elemento['intentos']}), se vuelve a encolar: {error}")
+            self.cola.put_nowait(elemento)
+        else:
+            logging.error(f"Ficha {codigo} descartada tras {elemento['intentos']} intentos: {error}")
+            self.fallidas.append(codigo)
+            if self._progreso is not None:
+                self._progreso.update(1)
+        self.cola.task_done()
+
+    async def ejecutar(self, listas: list[tuple]) -> dict:
+        """
+        Arma la cola global con `listas` y la procesa con todos los trabajadores.
+
+        Returns:
+            dict: Reporte (ver `reporte`).
+        """
+        from tqdm import tqdm
+
+        inicio = time.perf_counter()
+        total = await self.armar_cola(listas)
+
+        self._progreso = tqdm(total=total, desc="Procesando fichas")
+        tareas = [asyncio.create_task(self._trabajador(numero)) for numero in range(self.trabajadores)]
+        try:
+            await self.cola.join()
+            # Señal de fin para cada trabajador
+            for _ in tareas:
+                self.cola.put_nowait(None)
+            await asyncio.gather(*tareas)
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            self._progreso.close()
+            self._progreso = None
+
+        reporte = self.reporte(time.perf_counter() - inicio)
+        logging.info(f"Crawl terminado: {reporte}")
+        return reporte
+
+    def reporte(self, duracion: float | None = None) -> dict:
+        """
+        Returns:
+            dict: Fichas leídas, fallidas y omitidas, duración total, RSS de los navegadores del
+            proceso y, por trabajador, fichas, fallos, segundos de trabajo, fichas por minuto y
+            memoria JS de su pestaña.
+        """
+        trabajadores = {
+            numero: {
+                **stats,
+                "segundos": round(stats["segundos"], 1),
+                "fichas_por_minuto": round(stats["fichas"] * 60 / stats["segundos"], 2) if stats["segundos"] else 0.0,
+            }
+            for numero, stats in self.estadisticas.items()
+        }
+        return {
+            "leidas": sum(stats["fichas"] for stats in self.estadisticas.values()),
+            "fallidas": list(self.fallidas),
+            "omitidas": self.omitidas,
+            "duracion_s": round(duracion, 1) if duracion is not None else None,
+            "rss_mb": rss_procesos_hijos(),
+            "trabajadores": trabajadores,
+        }
@@ -0,0 +1,178 @@
+import sys
+import time
+import random
+import asyncio
+import logging
+
+# Mensajes de Playwright que indican que la página o el navegador ya no sirven
+mensajes_sesion = ("Target page, context or browser has been closed", "Target closed", "Browser has been closed")
+# Mensajes de errores de red (DNS, conexión, respuesta vacía)
+mensajes_red = ("net::ERR_", "NS_ERROR_", "Navigation failed", "ECONNRESET", "ECONNREFUSED")
+
+
+def clasificar_error(error: BaseException) -> str:
+    """
+    Clasifica un error de navegación.
+
+    Returns:
+        str: "timeout" o "red" (transitorios: vale la pena reintentar), "sesion" (la página o
+        el navegador se cerró: hay que cambiar de sesión), o "permanente" (reintentar no sirve,
+        por ejemplo una ficha que no existe).
+    """
+    # Si Playwright no se ha importado, el error no puede venir de él
+    playwright = sys.modules.get("playwright.async_api")
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or (
+            playwright is not None and isinstance(error, playwright.TimeoutError)):
+        return "timeout"
+    if playwright is not None and isinstance(error, playwright.Error):
+        mensaje = str(error)
+        if any(texto in mensaje for texto in mensajes_sesion):
+            return "sesion"
+        if any(texto in mensaje for texto in mensajes_red):
+            return "red"
+        return "timeout" if "Timeout" in mensaje else "red"
+    if isinstance(error, ConnectionError):
+        return "red"
+    return "permanente"
+
+
+def es_transitorio(error: BaseException) -> bool:
+    return clasificar_error(error) in ("timeout", "red")
+
+
+class CircuitoInterruptor():
+    """
+    Interruptor compartido por todas las sesiones de una ejecución.
+
+    Después de `umbral` fallos transitorios seguidos (de cualquier sesión) se abre durante
+    `pausa` segundos: las sesiones que llamen a `esperar` se detienen en lugar de gastar
+    timeouts contra un sitio degradado. Al cerrarse deja pasar una sola prueba; si falla,
+    se vuelve a abrir con el doble de pausa (hasta `pausa_maxima`).
+    """
+
+    def __init__(self, umbral: int = 5, pausa: float = 30, pausa_maxima: float = 300):
+        self.umbral = umbral
+        self.pausa_base = pausa
+        self.pausa = pausa
+        self.pausa_maxima = pausa_maxima
+        self.fallos_seguidos = 0
+        self.abierto_hasta = 0.0
+        self.aperturas = 0
+        self._probando = False
+
+    @property
+    def abierto(self) -> bool:
+        return time.monotonic() < self.abierto_hasta
+
+    async def esperar(self):
+        """
+        Espera mientras el interruptor está abierto o mientras otra sesión hace la prueba.
+        """
+        while True:
+            restante = self.abierto_hasta - time.monotonic()
+            if restante > 0:
+                await asyncio.sleep(restante)
+                continue
+            if self.aperturas and self.fallos_seguidos >= self.umbral:
+                # Semiabierto: una sola sesión prueba si el sitio se recuperó
+                if self._probando:
+                    await asyncio.sleep(1)
+                    continue
+                self._probando = True
+            return
+
+    def registrar_exito(self):
+        self.fallos_seguidos = 0
+        self.pausa = self.pausa_base
+        self._probando = False
+
+    def registrar_neutral(self):
+        """
+        Resultado que no dice nada sobre el sitio (por ejemplo, una sesión cerrada):
+        solo libera la prueba en curso.
+        """
+        self._probando = False
+
+    def registrar_fallo(self):
+        self.fallos_seguidos += 1
+        if self.fallos_seguidos >= self.umbral and not self.abierto:
+            if self._probando:
+                self.pausa = min(self.pausa * 2, self.pausa_maxima)
+            self._probando = False
+            self.abierto_hasta = time.monotonic() + self.pausa
+            self.aperturas += 1
+            logging.warning(f"Interruptor abierto por {self.pausa:.0f} s tras {self.fallos_seguidos} fallos seguidos")
+
+
+class PoliticaReintentos():
+    """
+    Reintentos con espera exponencial y jitter para las acciones de navegación.
+
+    Solo se reintentan los errores transitorios (ver `clasificar_error`); los demás se
+    propagan de inmediato. Si se pasa un CircuitoInterruptor, cada intento espera a que
+    esté cerrado y le informa el resultado.
+    """
+
+    def __init__(self, intentos: int = 3, base: float = 0.5, maximo: float = 8.0,
+                 interruptor: CircuitoInterruptor | None = None):
+        """
+        Args:
+            intentos (int): Intentos totales por acción.
+            base (float): Espera base en segundos; el intento n espera hasta base * 2**n.
+            maximo (float): Espera máxima en segundos entre intentos.
+            interruptor (CircuitoInterruptor, optional): Interruptor compartido entre sesiones.
+        """
+        self.intentos = intentos
+        self.base = base
+        self.maximo = maximo
+        self.interruptor = interruptor
+
+    def espera(self, intento: int) -> float:
+        """
+        Espera antes del reintento número `intento` (desde 1), con jitter completo.
+        """
+        return random.uniform(0, min(self.maximo, self.base * 2 ** intento))
+
+    async def ejecutar(self, accion, *args, al_reintentar=None, intentos: int | None = None, **kwargs):
+        """
+        Ejecuta `await accion(*args, **kwargs)` con la política de reintentos.
+
+        Args:
+            al_reintentar (callable, optional): Corrutina sin argumentos que se ejecuta antes de
+                cada reintento (por ejemplo, recargar la página). Sus errores se ignoran.
+            intentos (int, optional): Reemplaza el número de intentos de la política.
+
+        Raises:
+            Exception: El último error si se agotan los intentos, o el primero que no sea transitorio.
+        """
+        intentos = intentos or self.intentos
+        for intento in range(1, intentos + 1):
+            if self.interruptor is not None:
+                await self.interruptor.esperar()
+            try:
+                resultado = await accion(*args, **kwargs)
+            except Exception as e:
+                tipo = clasificar_error(e)
+                if self.interruptor is not None:
+                    if tipo in ("timeout", "red"):
+                        self.interruptor.registrar_fallo()
+                    elif tipo == "permanente":
+                        # El sitio respondió; el error es de la acción
+                        self.interruptor.registrar_exito()
+                    else:
+                        self.interruptor.registrar_neutral()
+                if tipo not in ("timeout", "red") or intento == intentos:
+                    raise
+                espera = self.espera(intento)
+                logging.warning(f"Error {tipo} en {getattr(accion, '__name__', 'acción')} "
+                                f"(intento {intento}/{intentos}), reintento en {espera:.1f} s: {e}")
+                await asyncio.sleep(espera)
+                if al_reintentar is not None:
+                    try:
+                        await al_reintentar()
+                    except Exception as error_recuperacion:
+                        logging.warning(f"No se pudo preparar el reintento: {error_recuperacion}")
+                continue
+            if self.interruptor is not None:
+                self.interruptor.registrar_exito()
+            return resultado
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from RPA_Ceplan.classes.navegador_observatorio import NavegadorObs
+
+
+class PoolSesiones():
+    """
+    Pool de sesiones autenticadas del Observatorio.
+
+    Lanza un número fijo de navegadores, inicia sesión una sola vez en cada uno
+    y los presta a las tareas. Las sesiones que fallan el chequeo de salud o que
+    superan el número máximo de usos se cierran y se reemplazan por una nueva.
+
+    Si una sesión no se puede reemplazar tras `intentos_reposicion` intentos, su lugar se
+    pierde y la capacidad del pool baja. Cuando llega a cero, las tareas que esperan una
+    sesión reciben un RuntimeError en lugar de esperar para siempre.
+    """
+
+    def __init__(self, clase_sesion=NavegadorObs, tamano: int = 4, timeout: int = 150,
+                 headless: bool = True, usos_maximos: int = 50, intentos_reposicion: int = 3,
+                 espera_reposicion: float = 2.0, **kwargs_sesion):
+        """
+        Args:
+            clase_sesion (type): Clase de sesión a instanciar (NavegadorObs, ReaderObs o WriterObs).
+            tamano (int): Número de sesiones simultáneas del pool.
+            timeout (int): Timeout que se pasa a cada sesión.
+            headless (bool): Si es True, los navegadores se lanzan sin interfaz gráfica.
+            usos_maximos (int): Número de préstamos tras los cuales una sesión se recicla.
+            intentos_reposicion (int): Intentos para crear la sesión que reemplaza a una descartada.
+            espera_reposicion (float): Segundos de espera base entre esos intentos (se duplica en cada uno).
+            **kwargs_sesion: Argumentos adicionales para la clase de sesión (por ejemplo, `ruta_estado`).
+        """
+        self.clase_sesion = clase_sesion
+        self.tamano = tamano
+        self.timeout = timeout
+        self.headless = headless
+        self.usos_maximos = usos_maximos
+        self.intentos_reposicion = intentos_reposicion
+        self.espera_reposicion = espera_reposicion
+        self.kwargs_sesion = kwargs_sesion
+        self.capacidad = 0  # Sesiones vivas: disponibles más prestadas
+        self._disponibles: asyncio.Queue = asyncio.Queue()
+        self._usos: dict[int, int] = {}
+        self._sesiones: list[NavegadorObs] = []
+
+    async def __aenter__(self):
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.cerrar()
+
+    async def _crear_sesion(self):
+        """
+        Lanza un navegador nuevo e inicia sesión en él.
+        """
+        sesion = self.clase_sesion(timeout=self.timeout, headless=self.headless, **self.kwargs_sesion)
+        try:
+            await sesion.iniciar_navegador()
+            await sesion.login()
+        except Exception:
+            await sesion.cerrar_navegador()
+            raise
+        self._usos[id(sesion)] = 0
+        self._sesiones.append(sesion)
+        return sesion
+
+    async def _descartar_sesion(self, sesion):
+        """
+        Cierra una sesión y la retira del pool.
+        """
+        self._usos.pop(id(sesion), None)
+        if sesion in self._sesiones:
+            self._sesiones.remove(sesion)
+        try:
+            await sesion.cerrar_navegador()
+        except Exception as e:
+            logging.warning(f"No se pudo cerrar una sesión del pool: {e}")
+
+    async def _reponer(self, sesion):
+        """
+        Descarta una sesión y crea otra en su lugar, con reintentos.
+
+        Returns:
+            NavegadorObs | None: La sesión nueva, o None si no se pudo crear; en ese caso el
+            lugar se pierde y, si era el último, se despierta a las tareas en espera.
+        """
+        await self._descartar_sesion(sesion)
+        for intento in range(1, self.intentos_reposicion + 1):
+            try:
+                return await self._crear_sesion()
+            except Exception as e:
+                logging.error(f"No se pudo reemplazar una sesión del pool (intento {intento}): {e}")
+                if intento < self.intentos_reposicion:
+                    await asyncio.sleep(self.espera_reposicion * 2 ** (intento - 1))
+
+        self.capacidad -= 1
+        logging.error(f"Se perdió una sesión del pool; quedan {self.capacidad}")
+        if self.capacidad <= 0:
+            # Señal para las tareas bloqueadas en `prestar`
+            self._disponibles.put_nowait(None)
+        return None
+
+    async def _sesion_saludable(self, sesion) -> bool:
+        """
+        Verifica que la página de la sesión siga abierta y responda.
+        """
+        if sesion.page is None or sesion.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(sesion.page.evaluate("1"), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def iniciar(self):
+        """
+        Lanza e inicia sesión en todas las sesiones del pool de forma concurrente.
+        """
+        sesiones = await asyncio.gather(
+            *(self._crear_sesion() for _ in range(self.tamano)),
+            return_exceptions=True
+        )
+        for sesion in sesiones:
+            if isinstance(sesion, Exception):
+                logging.error(f"No se pudo iniciar una sesión del pool: {sesion}")
+            else:
+                self._disponibles.put_nowait(sesion)
+
+        self.capacidad = self._disponibles.qsize()
+        if self.capacidad == 0:
+            raise RuntimeError("No se pudo iniciar ninguna sesión del pool")
+        logging.info(f"Pool iniciado con {self.capacidad} sesiones")
+
+    async def _devolver(self, sesion, reciclar: bool):
+        """
+        Devuelve una sesión al pool, reciclándola si es necesario.
+        """
+        if reciclar:
+            sesion = await self._reponer(sesion)
+            if sesion is None:
+                return
+        self._disponibles.put_nowait(sesion)
+
+    async def _preparar(self, sesion):
+        """
+        Deja una sesión recién tomada en el panel de administrador. Solo navega si la tarea
+        anterior la dejó en otra página.
+
+        Returns:
+            NavegadorObs | None: La sesión lista (o su reemplazo), o None si se perdió su lugar.
+        """
+        if not await self._sesion_saludable(sesion):
+            logging.warning("Sesión del pool no saludable, reemplazando")
+            return await self._reponer(sesion)
+        if sesion.page.url.rstrip('/') != f"{sesion.url_base}/adm/tendencia":
+            try:
+                await sesion.volver_a_inicio()
+            except Exception as e:
+                logging.warning(f"La sesión no pudo volver al inicio, reemplazando: {e}")
+                return await self._reponer(sesion)
+        return sesion
+
+    @asynccontextmanager
+    async def prestar(self):
+        """
+        Presta una sesión autenticada durante el bloque `async with`.
+
+        Si la tarea lanza una excepción, la sesión se recicla antes de volver al pool.
+
+        Yields:
+            NavegadorObs: Sesión autenticada lista para usarse.
+        """
+        sesion = None
+        while sesion is None:
+            if self.capacidad <= 0:
+                raise RuntimeError("El pool no tiene sesiones activas")
+            sesion = await self._disponibles.get()
+            if sesion is None:
+                # Sin capacidad: pasar la señal a la siguiente tarea en espera
+                self._disponibles.put_nowait(None)
+                continue
+            sesion = await self._preparar(sesion)
+
+        self._usos[id(sesion)] += 1
+        fallo = False
+        try:
+            yield sesion
+        except Exception:
+            fallo = True
+            raise
+        finally:
+            reciclar = fallo or self._usos.get(id(sesion), 0) >= self.usos_maximos
+            await self._devolver(sesion, reciclar)
+
+    async def cerrar(self):
+        """
+        Cierra todas las sesiones del pool.
+        """
+        for sesion in list(self._sesiones):
+            await self._descartar_sesion(sesion)
+        self.capacidad = 0
+        self._disponibles = asyncio.Queue()
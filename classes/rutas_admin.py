@@ -0,0 +1,88 @@
+import os
+import json
+import logging
+from urllib.parse import urlsplit
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+ruta_rutas_admin = os.path.join(script_dir, "..", "datasets", "rutas_admin.json")
+
+
+def _solo_ruta(url: str) -> str:
+    """
+    Quita el esquema y el dominio de una URL para que el mapa no dependa del host.
+    """
+    partes = urlsplit(url)
+    ruta = partes.path or "/"
+    if partes.query:
+        ruta += f"?{partes.query}"
+    if partes.fragment:
+        ruta += f"#{partes.fragment}"
+    return ruta
+
+
+class RutasAdmin():
+    """
+    Mapa persistente de las rutas Angular del panel de administrador.
+
+    Guarda la ruta de la lista de cada subrubro y la ruta de cada ícono de edición
+    (texto, gráficos, referencias, etc.) de cada ficha, para poder abrirlas con
+    `page.goto` en lugar de navegar haciendo clic por rubro y subrubro.
+
+    Estructura del archivo:
+        {
+            "listas": {rubro: {subrubro: ruta}},
+            "fichas": {codigo: {orden: ruta}}
+        }
+    """
+
+    def __init__(self, ruta_archivo: str = ruta_rutas_admin):
+        self.ruta_archivo = ruta_archivo
+        self.listas: dict[str, dict[str, str]] = {}
+        self.fichas: dict[str, dict[str, str]] = {}
+        self._modificado = False
+        self.cargar()
+
+    def cargar(self):
+        """
+        Lee el mapa de rutas desde disco si existe.
+        """
+        if not os.path.exists(self.ruta_archivo):
+            return
+        try:
+            with open(self.ruta_archivo, "r", encoding="utf-8") as file:
+                datos = json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.warning(f"No se pudo leer el mapa de rutas {self.ruta_archivo}: {e}")
+            return
+        self.listas = datos.get("listas", {})
+        self.fichas = datos.get("fichas", {})
+
+    def guardar(self):
+        """
+        Escribe el mapa de rutas en disco si hubo cambios.
+        """
+        if not self._modificado:
+            return
+        ruta_temporal = f"{self.ruta_archivo}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as file:
+            json.dump({"listas": self.listas, "fichas": self.fichas}, file, indent=4, ensure_ascii=False)
+        os.replace(ruta_temporal, self.ruta_archivo)
+        self._modificado = False
+
+    def ruta_lista(self, rubro: str, subrubro: str | None) -> str | None:
+        return self.listas.get(rubro, {}).get(subrubro or "")
+
+    def ruta_ficha(self, codigo: str, orden: int) -> str | None:
+        return self.fichas.get(codigo, {}).get(str(orden))
+
+    def registrar_lista(self, rubro: str, subrubro: str | None, url: str):
+        ruta = _solo_ruta(url)
+        if self.ruta_lista(rubro, subrubro) != ruta:
+            self.listas.setdefault(rubro, {})[subrubro or ""] = ruta
+            self._modificado = True
+
+    def registrar_ficha(self, codigo: str, orden: int, url: str):
+        ruta = _solo_ruta(url)
+        if self.ruta_ficha(codigo, orden) != ruta:
+            self.fichas.setdefault(codigo, {})[str(orden)] = ruta
+            self._modificado = True
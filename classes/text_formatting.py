@@ -1,6 +1,21 @@
+import io
 import re
 from icecream import ic
 
+# Patrones compilados una sola vez para todas las instancias
+patron_a_limpiar = re.compile(r'\bAvailable:?\s*|(\.\s*)$', re.IGNORECASE)
+patron_a_extraer = re.compile(r'\[(\d+)\].*?(https?://[^\s\[\]]+)')
+patron_eliminar_figuras = re.compile(r'^(Nota?|Figura)(\s+\d+)?.*$')
+patron_tabla = re.compile(r'^Tabla(\s+\d+)?.*$', re.IGNORECASE)
+patron_nota = re.compile(r'^Nota(\s*)?.*$', re.IGNORECASE)
+patron_citas = re.compile(r'\[([\d,\s]+)\]')
+
+# Superíndices y subíndices a dígitos normales. str.translate revisa carácter por carácter,
+# así que solo se aplica cuando la búsqueda (en C) encuentra alguno
+patron_digitos = re.compile(r'[⁰¹²³⁴⁵⁶⁷⁸⁹₀₁₂₃₄₅₆₇₈₉]')
+tabla_digitos = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹₀₁₂₃₄₅₆₇₈₉', '01234567890123456789')
+
+
 class TextFormatting:
     """
     Clase para procesar texto y referencias, incluyendo limpieza, hipervínculos, y elementos eliminados.
@@ -21,6 +36,7 @@ class TextFormatting:
         self.refs_clean = ""
         self.items_eliminados = []
         self.items_clean = []
+        self._item_pendiente = None
 
     def _procesar_referencias(self):
         """
@@ -30,13 +46,11 @@ class TextFormatting:
             tuple: (texto limpio, diccionario con números de referencia y URLs).
         """
         lines = self.input_refs_raw.splitlines()
-        patron_a_limpiar = re.compile(r'\bAvailable:?\s*|(\.\s*)$', re.IGNORECASE)
-        patron_a_extraer = re.compile(r'\[(\d+)\].*?(https?://[^\s\[\]]+)')
 
         temp_list = []
 
         for line in lines:
-            referencia_limpia = re.sub(patron_a_limpiar, '', line).strip()
+            referencia_limpia = patron_a_limpiar.sub('', line).strip()
             temp_list.append(referencia_limpia)
 
             match = patron_a_extraer.search(referencia_limpia)
@@ -47,69 +61,13 @@ class TextFormatting:
 
         self.refs_clean = '\n'.join(temp_list)
 
-    def _procesar_parrafos(self):
-        """
-        Procesa los párrafos para filtrar elementos, normalizar texto y eliminar figuras/tablas.
-
-        Returns:
-            tuple: (texto procesado, elementos eliminados).
-        """
-        paragraphs = self.input_text_raw.split('\n')
-        patron_eliminar_figuras = re.compile(r'^(Nota?|Figura)(\s+\d+)?.*$')
-        patron_tabla = re.compile(r'^Tabla(\s+\d+)?.*$', re.IGNORECASE)
-        patron_nota = re.compile(r'^Nota(\s*)?.*$', re.IGNORECASE)
-
-        filtered_lines = []
-        eliminar = False
-        paragraph_index = -1
-
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-
-            if patron_tabla.match(paragraph):
-                self.items_eliminados.append((paragraph_index, paragraph))
-                eliminar = True
-                continue
-
-            if patron_nota.match(paragraph):
-                self.items_eliminados.append((paragraph_index, paragraph))
-                eliminar = False
-                continue
-
-            if eliminar:
-                continue
-
-            if paragraph and not paragraph.endswith('.'):
-                paragraph += '.'
-
-            if patron_eliminar_figuras.match(paragraph):
-                self.items_eliminados.append((paragraph_index, paragraph))
-            elif paragraph:
-                filtered_lines.append(paragraph)
-                paragraph_index += 1
-
-        text_clean = '\n'.join(filtered_lines)
-        if text_clean.endswith('.'):
-            text_clean = text_clean[:-1]
-
-        text_clean = re.sub(
-            r'[⁰¹²³⁴⁵⁶⁷⁸⁹₀₁₂₃₄₅₆₇₈₉]',
-            lambda m: {
-                '⁰': '0', '¹': '1', '²': '2', '³': '3', '⁴': '4', '⁵': '5',
-                '⁶': '6', '⁷': '7', '⁸': '8', '⁹': '9', '₀': '0', '₁': '1',
-                '₂': '2', '₃': '3', '₄': '4', '₅': '5', '₆': '6', '₇': '7',
-                '₈': '8', '₉': '9'
-            }[m.group(0)],
-            text_clean
-        )
-        self.text_clean = text_clean
-
-    def _crear_hipervinculos(self):
+    def _hipervincular(self, paragraph):
         """
-        Crea hipervínculos en el texto basado en las referencias internas
-        y actualiza el atributo `self.text_clean` con el resultado.
+        Normaliza los dígitos de un párrafo y crea los hipervínculos de sus citas
+        según las referencias internas.
         """
-        pattern = re.compile(r'\[([\d,\s]+)\]')
+        if patron_digitos.search(paragraph):
+            paragraph = paragraph.translate(tabla_digitos)
 
         def replacement(match):
             numbers = match.group(1).split(',')
@@ -122,33 +80,109 @@ class TextFormatting:
                     links.append(f'[{number}]')
             return ' '.join(links)
 
-        # Actualizar el atributo `self.text_clean` directamente
-        self.text_clean = re.sub(pattern, replacement, self.text_clean)
+        return patron_citas.sub(replacement, paragraph)
+
+    def _item_eliminado(self, orden, texto):
+        """
+        Registra una figura, tabla o nota eliminada. Una figura o tabla queda pendiente
+        hasta que llega su nota; en ese momento devuelve el item [orden, numeración, título, nota].
+        """
+        self.items_eliminados.append((orden, texto))
+        if texto.startswith("Figura") or texto.startswith("Tabla"):
+            # Extraer numeración y título
+            split_text = texto.split(". ", 1)
+            numeracion = split_text[0]  # Numeración como 'Figura 1' o 'Tabla 1'
+            if not numeracion.endswith("."):
+                numeracion += "."  # Asegurar que termina con un punto
+            titulo = split_text[1] if len(split_text) > 1 else ""
+            self._item_pendiente = {"orden": orden, "numeracion": numeracion, "titulo": titulo}
+        elif texto.startswith("Nota") and self._item_pendiente:
+            pendiente = self._item_pendiente
+            return [pendiente["orden"], pendiente["numeracion"], pendiente["titulo"], texto]
+        return None
+
+    def _iterar_parrafos(self, lineas):
+        """
+        Recorre los párrafos una sola vez: filtra figuras, tablas y notas, normaliza el texto
+        y crea los hipervínculos. Solo se retiene un párrafo a la vez (para quitar el punto
+        final del último).
 
+        Args:
+            lineas (iterable): Líneas del texto, por ejemplo un archivo abierto.
 
-    def _procesar_items_eliminados(self):
+        Yields:
+            tuple: ("parrafo", texto) por cada párrafo conservado, o ("item", [orden, numeración,
+            título, nota]) en cuanto se completa una figura o tabla con su nota.
         """
-        Procesa los elementos eliminados para generar una lista de listas con:
-        [orden, numeración, título, nota].
+        eliminar = False
+        paragraph_index = -1
+        anterior = None
+        self._item_pendiente = None
+
+        for paragraph in lineas:
+            paragraph = paragraph.strip()
 
+            if patron_tabla.match(paragraph):
+                item = self._item_eliminado(paragraph_index, paragraph)
+                eliminar = True
+            elif patron_nota.match(paragraph):
+                item = self._item_eliminado(paragraph_index, paragraph)
+                eliminar = False
+            elif eliminar:
+                continue
+            else:
+                if paragraph and not paragraph.endswith('.'):
+                    paragraph += '.'
+
+                if patron_eliminar_figuras.match(paragraph):
+                    item = self._item_eliminado(paragraph_index, paragraph)
+                else:
+                    if paragraph:
+                        if anterior is not None:
+                            yield "parrafo", self._hipervincular(anterior)
+                        anterior = paragraph
+                        paragraph_index += 1
+                    continue
+
+            if item:
+                yield "item", item
+
+        if anterior is not None:
+            if anterior.endswith('.'):
+                anterior = anterior[:-1]
+            yield "parrafo", self._hipervincular(anterior)
+
+    def procesar_en_flujo(self, escritor, al_encontrar_item=None, lineas=None):
         """
-        temp_dict = {}
-
-        for orden, texto in self.items_eliminados:
-            if texto.startswith("Figura") or texto.startswith("Tabla"):
-                # Extraer numeración y título
-                split_text = texto.split(". ", 1)
-                numeracion = split_text[0]  # Numeración como 'Figura 1' o 'Tabla 1'
-                if not numeracion.endswith("."):
-                    numeracion += "."  # Asegurar que termina con un punto
-                titulo = split_text[1] if len(split_text) > 1 else ""
-                temp_dict = {"orden": orden, "numeracion": numeracion, "titulo": titulo}
-            elif texto.startswith("Nota"):
-                # Añadir la nota al diccionario actual y guardar el elemento procesado
-                temp_dict["nota"] = texto
-                self.items_clean.append([temp_dict["orden"], temp_dict["numeracion"], temp_dict["titulo"], temp_dict["nota"]])
+        Procesa el contenido en una sola pasada y escribe el texto hipervinculado en `escritor`
+        a medida que se genera, sin armar el documento completo en memoria.
 
-        
+        Args:
+            escritor: Objeto con método `write` (archivo abierto, io.StringIO, etc.).
+            al_encontrar_item (callable, optional): Función que recibe cada item
+                [orden, numeración, título, nota] en cuanto se encuentra.
+            lineas (iterable, optional): Líneas del texto. Por defecto, las de `input_text_raw`.
+
+        Returns:
+            tuple: (refs_clean, items_clean)
+        """
+        self._procesar_referencias()
+        if lineas is None:
+            lineas = io.StringIO(self.input_text_raw)
+
+        primero = True
+        for tipo, valor in self._iterar_parrafos(lineas):
+            if tipo == "item":
+                self.items_clean.append(valor)
+                if al_encontrar_item:
+                    al_encontrar_item(valor)
+                continue
+            if not primero:
+                escritor.write('\n')
+            escritor.write(valor)
+            primero = False
+
+        return self.refs_clean, self.items_clean
 
     def procesar_contenido(self):
         """
@@ -160,13 +194,52 @@ class TextFormatting:
             refs_clean (str)
             items_clean (list of lists)
         """
-        self._procesar_parrafos()
-        self._procesar_referencias()
-        self._procesar_items_eliminados()
-        self._crear_hipervinculos()
+        salida = io.StringIO()
+        self.procesar_en_flujo(salida)
+        self.text_clean = salida.getvalue()
         
         # Devuelve el resultado final como tuple para mantener la estructura original si es necesario
         return self.text_clean, self.refs_clean, self.items_clean
+
+
+def procesar_archivo(ruta_entrada: str, ruta_salida: str, referencias: str = "", al_encontrar_item=None):
+    """
+    Procesa un documento grande (por ejemplo, un reporte consolidado de varias fichas)
+    leyendo y escribiendo línea por línea.
+
+    Returns:
+        tuple: (refs_clean, items_clean)
+    """
+    procesador = TextFormatting("", referencias)
+    with open(ruta_entrada, "r", encoding="utf-8") as entrada, open(ruta_salida, "w", encoding="utf-8") as salida:
+        return procesador.procesar_en_flujo(salida, al_encontrar_item=al_encontrar_item, lineas=entrada)
+
+
+def procesar_documento(doc):
+    """
+    Procesa un documento (texto, referencias) con TextFormatting.
+
+    Returns:
+        tuple: (text_clean, refs_clean, items_clean)
+    """
+    texto, referencias = doc
+    return TextFormatting(texto or "", referencias or "").procesar_contenido()
+
+
+def procesar_lote(docs):
+    """
+    Procesa varios documentos, por ejemplo el catálogo completo cuando cambian las reglas de estilo.
+
+    Se procesa en el proceso actual: con sumillas de pocos KB, repartirlas en un pool de
+    procesos resultó más lento que en serie, porque domina el costo de serializar cada documento.
+
+    Args:
+        docs (iterable): Pares (texto, referencias).
+
+    Returns:
+        list[tuple]: (text_clean, refs_clean, items_clean) por documento, en el mismo orden.
+    """
+    return [procesar_documento(doc) for doc in docs]
     
 
 
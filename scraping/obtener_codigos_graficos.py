@@ -1,51 +1,35 @@
 import re
 import json
 import os
-from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-from icecream import ic
-import pandas as pd
 import asyncio
-
-load_dotenv()
-
-EMAIL = os.getenv("EMAIL")
-PASS = os.getenv("PASS")
-ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
+from RPA_Ceplan.classes.bloqueo_recursos import BloqueoRecursos
+from RPA_Ceplan.classes.extractor_graficos import ExtractorGraficosHTTP, url_observatorio
+from RPA_Ceplan.classes.diario_checkpoint import DiarioCheckpoint
 
 # Construir la ruta relativa, ir "un paso atrás" y luego acceder a la carpeta 'datasets'
 base_dir = os.path.dirname(os.path.abspath(__file__))  # Obtener el directorio absoluto del script
 
 ruta_info_obs= os.path.join(base_dir, '..', 'datasets', 'info_obs.json')  
-with open(ruta_info_obs, 'r', encoding='utf-8') as file:
-    info_obs = json.load(file)
 
-ruta_figuras_parcial= os.path.join(base_dir, '..', 'datasets', 'figuras_parcial.json')  # Subir un paso y buscar 'datasets'
+# Diario para reanudar el crawl; borrarlo para empezar un crawl completo desde cero
+ruta_diario_figuras = os.path.join(base_dir, '..', 'datasets', 'figuras_diario.jsonl')
+ruta_figuras = os.path.join(base_dir, '..', 'datasets', 'figuras.json')  # Archivo consolidado final
 
-figuras = {}
 contador_fichas = 0
 
-# Función para guardar los datos correctamente
-async def guardar_datos(figuras_parcial):
-    # Comprobar si el archivo existe para no sobrescribir datos previos
-    if os.path.exists(ruta_figuras_parcial):
-        with open(ruta_figuras_parcial, 'r') as f:
-            # Cargar los datos actuales del archivo
-            figuras_actuales = json.load(f)
-    else:
-        # Si el archivo no existe, crear un diccionario vacío
-        figuras_actuales = {}
-
-    # Añadir las nuevas figuras al archivo
-    figuras_actuales.update(figuras_parcial)
-
-    # Escribir el archivo de nuevo con los datos completos
-    with open(ruta_figuras_parcial, 'w') as f:
-        json.dump(figuras_actuales, f, ensure_ascii=False, indent=4)
-    print(f'Checkpoint guardado con {contador_fichas} fichas')    
+
+def codigos_activos(ruta: str = ruta_info_obs) -> list[str]:
+    """
+    Códigos de las fichas activas según la metadata guardada (info_obs.json).
+    """
+    with open(ruta, 'r', encoding='utf-8') as file:
+        info_obs = json.load(file)
+    return [codigo for codigo, datos in info_obs.items() if datos.get("estado") == "Activo"]
 
 # Función para procesar una página y obtener los gráficos
-async def procesar_pagina(codigo, enlace, context):
+async def procesar_pagina(codigo, enlace, context, diario: DiarioCheckpoint):
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
     global contador_fichas
     page = await context.new_page()
     datos_figuras = []
@@ -53,75 +37,135 @@ async def procesar_pagina(codigo, enlace, context):
     try:
         await page.goto(enlace)
 
-        # Esperar a que los gráficos se carguen
-        await page.wait_for_selector("iframe[id*='datawrapper-chart']", timeout=20000)
+        try:
+            # Esperar a que los gráficos se carguen
+            await page.wait_for_selector("iframe[id*='datawrapper-chart']", timeout=20000)
+            con_graficos = True
+        except PlaywrightTimeoutError:
+            # La página cargó pero no tiene gráficos: se registra vacía para no volver a visitarla
+            con_graficos = False
 
-        # Dar tiempo adicional para que se complete la carga dinámica
-        await page.wait_for_timeout(500)
+        if con_graficos:
+            # Dar tiempo adicional para que se complete la carga dinámica
+            await page.wait_for_timeout(500)
 
-        # Obtener todos los iframes de Datawrapper de la página
-        iframes = await page.query_selector_all("iframe[id*='datawrapper-chart']")
+            # Obtener todos los iframes de Datawrapper de la página
+            iframes = await page.query_selector_all("iframe[id*='datawrapper-chart']")
 
-        for iframe in iframes:
-            iframe_id = await iframe.get_attribute('id')
-            if iframe_id:
-                match = re.search(r'datawrapper-chart-([a-zA-Z0-9]+)', iframe_id)
-                if match:
-                    datos_figuras.append(match.group(1))
+            for iframe in iframes:
+                iframe_id = await iframe.get_attribute('id')
+                if iframe_id:
+                    match = re.search(r'datawrapper-chart-([a-zA-Z0-9]+)', iframe_id)
+                    if match:
+                        datos_figuras.append(match.group(1))
 
-        # Guardar los datos en el diccionario de figuras
-        figuras[codigo] = {"figuras": datos_figuras}
+        # Anexar la ficha terminada al diario
+        diario.registrar(codigo, {"figuras": datos_figuras})
 
         # Incrementar el contador de fichas procesadas
         contador_fichas += 1
-        print(f"Fichas procesadas: {contador_fichas}")  # Aquí puedes usar 'ic' si prefieres
-
-    except Exception as e:
-        print(f'Hubo un error con el código {codigo}: {e}')
-
-    
+        print(f"Fichas procesadas: {contador_fichas}")
 
     except Exception as e:
-        # Si ocurre un error, capturarlo y mostrarlo
+        # Si ocurre un error, capturarlo y mostrarlo; la ficha queda pendiente para la próxima ejecución
         print(f'Hubo un error con el código {codigo}: {e}')
 
     finally:
-        # Almacenar los datos si son más de 50
-        if len(figuras) % 50 == 0:
-            await guardar_datos(figuras)
-
         # Cerrar la página
         await page.close()
     
     return codigo  # Devolver el código para poder hacer un seguimiento
 
-async def procesar_con_límite(sem, codigo, enlace, context):
+async def procesar_con_límite(sem, codigo, enlace, context, diario):
     async with sem:  # Limita el número de tareas concurrentes
-        return await procesar_pagina(codigo, enlace, context)
-
-async def obtener_codigo_gráficos(tareas = 5):
+        return await procesar_pagina(codigo, enlace, context, diario)
+
+async def obtener_codigo_gráficos(tareas = 5, codigos: list[str] | None = None, diario: DiarioCheckpoint | None = None,
+                                  url_base: str = url_observatorio):
+    """
+    Obtiene los códigos de los gráficos con el navegador.
+
+    Args:
+        tareas (int): Máximo de páginas abiertas a la vez.
+        codigos (list[str], optional): Fichas a procesar. Si es None, todas las fichas activas.
+        diario (DiarioCheckpoint, optional): Diario donde se anexa cada ficha terminada. Si es None,
+            se usa el diario por defecto y al final se consolida en figuras.json.
+        url_base (str): Raíz del sitio de las páginas públicas de las fichas.
+    """
     sem = asyncio.Semaphore(tareas)  # Máximo de tareas concurrentes
     tasks = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, slow_mo=60)
-        context = await browser.new_context(viewport={"width": 1920, "height": 1080})
+    if codigos is None:
+        codigos = codigos_activos()
 
-        for codigo, datos in info_obs.items():
-            if datos.get("estado") == "Activo":
-                enlace = f'https://observatorio.ceplan.gob.pe/ficha/{codigo}'
-                tasks.append(procesar_con_límite(sem, codigo, enlace, context))
+    propio = diario is None
+    if propio:
+        diario = DiarioCheckpoint(ruta_diario_figuras)
+    # Reanudar: saltar las fichas que ya están en el diario
+    codigos = diario.pendientes(codigos)
 
-        # Ejecutar las tareas con concurrencia limitada
-        await asyncio.gather(*tasks)
-        await browser.close()
+    from playwright.async_api import async_playwright
 
-# Ejecución de la función principal
-if __name__ == "__main__":
-    asyncio.run(obtener_codigo_gráficos(
-        tareas = 5)
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True, slow_mo=60)
+            context = await browser.new_context(viewport={"width": 1920, "height": 1080})
+            # Solo se leen los ids de los iframes: no descargar imágenes, estilos ni los propios gráficos
+            bloqueo = BloqueoRecursos("public-ids-only")
+            await bloqueo.instalar(context)
+
+            for codigo in codigos:
+                enlace = f'{url_base}/ficha/{codigo}'
+                tasks.append(procesar_con_límite(sem, codigo, enlace, context, diario))
+
+            # Ejecutar las tareas con concurrencia limitada
+            await asyncio.gather(*tasks)
+            print(bloqueo.reporte())
+            await browser.close()
+
+        if propio:
+            total = diario.consolidar(ruta_figuras)
+            print(f'Se consolidaron {total} fichas en {ruta_figuras}')
+            # Crawl terminado: la próxima ejecución empieza con un diario vacío
+            diario.rotar()
+    finally:
+        if propio:
+            diario.cerrar()
+
+async def obtener_codigo_gráficos_http(tareas_http = 20, tareas_navegador = 5, url_api: str | None = None,
+                                       url_base: str = url_observatorio):
+    """
+    Obtiene los códigos de los gráficos por HTTP y usa el navegador solo para las fichas
+    cuya página necesita JavaScript. Las fichas ya registradas en el diario se saltan.
+    """
+    diario = DiarioCheckpoint(ruta_diario_figuras)
+    activos = codigos_activos()
+    pendientes_previos = diario.pendientes(activos)
+    print(f"{len(activos) - len(pendientes_previos)} fichas ya estaban en el diario")
+
+    extractor = ExtractorGraficosHTTP(tareas=tareas_http, url_api=url_api, url_base=url_base)
+    try:
+        figuras_http, pendientes = await extractor.obtener_muchos(
+            pendientes_previos,
+            al_obtener=lambda codigo, ids: diario.registrar(codigo, {"figuras": ids})
         )
+    finally:
+        extractor.cerrar()
 
+    print(f"{len(figuras_http)} fichas obtenidas por HTTP, {len(pendientes)} requieren navegador")
 
+    try:
+        if pendientes:
+            await obtener_codigo_gráficos(tareas=tareas_navegador, codigos=pendientes, diario=diario, url_base=url_base)
+        total = diario.consolidar(ruta_figuras)
+        print(f'Se consolidaron {total} fichas en {ruta_figuras}')
+        # Crawl terminado: la próxima ejecución empieza con un diario vacío
+        diario.rotar()
+    finally:
+        diario.cerrar()
 
-
-
+# Ejecución de la función principal
+if __name__ == "__main__":
+    asyncio.run(obtener_codigo_gráficos_http(
+        tareas_http = 20,
+        tareas_navegador = 5)
+        )
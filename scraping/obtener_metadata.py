@@ -2,28 +2,22 @@ from datetime import datetime
 import os
 import json
 import asyncio
-from asyncio import Semaphore
-from RPA_Ceplan.classes.navegador_observatorio import ReaderObs
+from RPA_Ceplan.classes.navegador_observatorio import ReaderObs, ruta_estado_sesion, cargar_rubros_subrubros_admin
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+from RPA_Ceplan.classes.planificador_fichas import PlanificadorFichas
+from RPA_Ceplan.classes.navegador_compartido import NavegadorCompartido
+from RPA_Ceplan.classes.politica_reintentos import PoliticaReintentos, CircuitoInterruptor
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+from RPA_Ceplan.classes.almacen_resultados import AlmacenJSONL
+from RPA_Ceplan.classes.instrumentacion import registro_tiempos, directorio_logs, configurar_logging
 import logging
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-log_path = os.path.join(script_dir, "..", "logs", "obtener_metadata.log")
-ruta_dict = os.path.join(script_dir, "..", "datasets", "rubros_subrubros_admin.json")
-
-# Configuración básica del logging
-logging.basicConfig(
-    level=logging.ERROR,  # Nivel de registro (INFO, DEBUG, WARNING, ERROR, CRITICAL)
-    format='%(asctime)s - %(levelname)s - %(message)s',  
-    handlers=[
-    logging.FileHandler(log_path, mode='a', encoding='utf-8'),  # Archivo en UTF-8
-    logging.StreamHandler()  # También mostrar logs en la consola
-    ]
-)
-
-# Diccionario principal
-with open(ruta_dict, "r", encoding = 'utf-8') as file:
-    rubros_subrubros_admin = json.load(file)
+ruta_info_obs_prueba = os.path.join(script_dir, "..", "datasets", "info_obs_prueba.json")
+ruta_info_obs = os.path.join(script_dir, "..", "datasets", "info_obs.json")
 
+# Subconjunto de rubros a procesar al ejecutar el script. obtener_metadata_async recorre
+# todo rubros_subrubros_admin.json (leído al ejecutar, no al importar) si no se le pasa uno.
 
 # rubros_subrubros_admin = {
 #     "Eventos futuros": {
@@ -49,68 +43,91 @@ rubros_subrubros_admin = {
 # }
 
 
-async def obtener_metadata_ficha(rubro: str, subrubro: str, es_territorial: bool, timeout: int, headless: bool):
+def cargar_snapshot(ruta: str = ruta_info_obs) -> dict:
     """
-    Punto de entrada para scrapear metadata de las fichas
+    Carga la metadata guardada para la sincronización incremental.
     """
-    # Crear una nueva session para cada tarea
-    session = ReaderObs(timeout=timeout, headless=headless)
-    try:
-        await session.iniciar_navegador()
-        await session.login()
-        await session.scrapear_fichas(rubro, subrubro, territorial=es_territorial)
-        logging.info(f"Completado: rubro: {rubro}, subrubro: {subrubro}, territorial: {es_territorial}")
-
-    except Exception as e:
-        logging.error(f"Error general en la ejecución: {e}")
-    finally:
-        # Asegurarse de guardar cualquier dato pendiente al finalizar la sesión
-        if len(session.info_fichas) > 0:
-            await session.guardar_resultados()
-        await session.cerrar_navegador()
+    if not os.path.exists(ruta):
+        logging.warning(f"No existe {ruta}; se leerán todas las fichas")
+        return {}
+    with open(ruta, "r", encoding="utf-8") as file:
+        return json.load(file)
 
 
-async def obtener_metadata_async(timeout: int, headless: bool, semaphore: int = 4):
+async def obtener_metadata_async(timeout: int, headless: bool, semaphore: int = 4, incremental: bool = False,
+                                 pestanas: int | None = None, rubros_subrubros: dict | None = None):
     """
-    Procesa todos los rubros y subrubros con un límite de operaciones concurrentes
+    Procesa todos los rubros y subrubros repartiendo las fichas entre las sesiones del pool.
+    Las listas se leen primero y las fichas de todos los subrubros forman una sola cola, de la
+    que cada sesión toma la siguiente ficha disponible.
+
+    Con `incremental=True` se compara cada lista con info_obs.json y solo se abren las
+    fichas nuevas, con cambio de estado o con fecha de actualización más reciente.
+
+    Con `pestanas`, todas las sesiones son pestañas de un solo Chromium (NavegadorCompartido)
+    y ese número reemplaza a `semaphore` como límite de concurrencia.
+
+    `rubros_subrubros` limita el recorrido a esos rubros; por defecto, todos los de
+    rubros_subrubros_admin.json.
     """
-    semaforo = Semaphore(semaphore)
-    tasks = []
-    
-    # Función auxiliar para crear tareas con semáforo
-    async def ejecutar_con_semaforo(func):
-        async with semaforo:
-            await func
-    
-    for rubro, subrubros in rubros_subrubros_admin.items():
+    snapshot = cargar_snapshot() if incremental else None
+
+    listas = []
+    for rubro, subrubros in (rubros_subrubros or cargar_rubros_subrubros_admin()).items():
         if rubro in ["Megatendencias", "Fuerzas primarias"]:
-            logging.info(f"Ejecutando para rubro especial: {rubro}")
-            tarea = ejecutar_con_semaforo(
-                obtener_metadata_ficha(rubro, None, False, timeout, headless)
-            )
-            tasks.append(asyncio.create_task(tarea))
+            listas.append((rubro, None, False))
         else:
             # Caso normal: rubros con subrubros
             for subrubro in subrubros.keys():
-                es_territorial = "territorial" in subrubro.lower()
-                logging.info(f"Ejecutando para rubro: {rubro}, subrubro: {subrubro}, territorial: {es_territorial}")
-                
-                tarea = ejecutar_con_semaforo(
-                    obtener_metadata_ficha(rubro, subrubro, es_territorial, timeout, headless)
-                )
-                tasks.append(asyncio.create_task(tarea))
-    
-    # Esperar a que todas las tareas terminen
-    await asyncio.gather(*tasks)
+                listas.append((rubro, subrubro, "territorial" in subrubro.lower()))
+
+    # Un solo almacén compartido: cada ficha se anexa al leerse, sin reescribir el catálogo
+    almacen = AlmacenJSONL()
+
+    # Una sola política para todas las sesiones: si el sitio se degrada, todas se detienen
+    politica = PoliticaReintentos(interruptor=CircuitoInterruptor())
+
+    navegador = None
+    if pestanas:
+        navegador = NavegadorCompartido(headless=headless, limite_pestanas=pestanas)
+        await navegador.iniciar()
+        semaphore = pestanas
+
+    try:
+        async with PoolSesiones(ReaderObs, tamano=semaphore, timeout=timeout, headless=headless,
+                                ruta_estado=ruta_estado_sesion, rutas=RutasAdmin(),
+                                perfil_bloqueo="admin-minimal", almacen=almacen, navegador=navegador,
+                                politica=politica) as pool:
+            planificador = PlanificadorFichas(pool, snapshot=snapshot)
+            reporte = await planificador.ejecutar(listas)
+    finally:
+        if navegador is not None:
+            await navegador.cerrar()
+
+    print(f"{reporte['leidas']} fichas leídas, {len(reporte['fallidas'])} fallidas, "
+          f"{reporte['omitidas']} sin cambios en {reporte['duracion_s']} s")
+    print(f"Memoria de los navegadores (RSS): {reporte['rss_mb']} MB")
+    for numero, stats in reporte["trabajadores"].items():
+        print(f"  Sesión {numero}: {stats['fichas']} fichas, {stats['fallos']} fallos, "
+              f"{stats['fichas_por_minuto']} fichas/min, heap JS {stats['js_heap_mb']} MB")
+    print("Pasos con más tiempo total:")
+    registro_tiempos.imprimir_resumen()
+    registro_tiempos.exportar(os.path.join(directorio_logs, "tiempos_metadata.json"))
+
+    almacen.exportar(ruta_info_obs_prueba)
+    almacen.cerrar()
 
 
 # TODO: Si li.btn no está visible, actualizar la página
 # Ejemplo de ejecución
 if __name__ == "__main__":
+    configurar_logging(nivel=logging.ERROR)
     asyncio.run(obtener_metadata_async(
         timeout=12,
         headless=False,
-        semaphore = 4
+        semaphore = 4,
+        incremental = False,  # True: solo las fichas nuevas o modificadas respecto de info_obs.json
+        rubros_subrubros = rubros_subrubros_admin
         )
     )
 
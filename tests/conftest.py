@@ -0,0 +1,30 @@
+import os
+import json
+import pytest
+from RPA_Ceplan.benchmarks.servidor_observatorio import ServidorObservatorio, EstadoObservatorio, ruta_info_obs
+
+
+@pytest.fixture(scope="session")
+def info_obs() -> dict:
+    with open(ruta_info_obs, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def servidor(info_obs):
+    """
+    Observatorio simulado con pocas fichas por lista y sin latencia ni fallos.
+    """
+    with ServidorObservatorio(estado=EstadoObservatorio(info_obs, fichas_por_lista=3), semilla=0) as servidor:
+        yield servidor
+
+
+@pytest.fixture
+def cortar_final():
+    """
+    Recorta los últimos bytes de un archivo, como una escritura interrumpida a mitad de línea.
+    """
+    def cortar(ruta: str, bytes_a_cortar: int = 5):
+        with open(ruta, "rb+") as file:
+            file.truncate(os.path.getsize(ruta) - bytes_a_cortar)
+    return cortar
@@ -0,0 +1,64 @@
+import json
+import pytest
+from RPA_Ceplan.classes.almacen_resultados import AlmacenResultados, AlmacenJSONL, AlmacenSQLite
+
+
+def test_guardar_tras_una_linea_truncada(tmp_path, cortar_final):
+    ruta = str(tmp_path / "info_obs.jsonl")
+    almacen = AlmacenJSONL(ruta)
+    almacen.guardar("A", {"estado": "Activo"})
+    almacen.guardar("B", {"estado": "Activo"})
+    almacen.cerrar()
+    cortar_final(ruta)
+
+    almacen = AlmacenJSONL(ruta)
+    almacen.guardar("C", {"estado": "Inactivo"})
+    almacen.cerrar()
+
+    assert AlmacenJSONL(ruta).cargar() == {"A": {"estado": "Activo"}, "C": {"estado": "Inactivo"}}
+
+
+def test_compactar_deja_una_linea_por_codigo(tmp_path):
+    ruta = str(tmp_path / "info_obs.jsonl")
+    almacen = AlmacenJSONL(ruta, compactar_cada=3)
+    almacen.guardar("A", {"estado": "Activo"})
+    almacen.guardar("A", {"estado": "Inactivo"})
+    almacen.guardar("B", {"estado": "Activo"})
+    almacen.guardar("C", {"estado": "Activo"})
+    almacen.cerrar()
+
+    with open(ruta, encoding="utf-8") as file:
+        assert len(file.readlines()) == 3
+    assert AlmacenJSONL(ruta).cargar()["A"] == {"estado": "Inactivo"}
+
+
+def test_almacen_base_es_abstracto():
+    with pytest.raises(TypeError):
+        AlmacenResultados()
+
+
+def test_sqlite_reemplaza_por_codigo_y_persiste(tmp_path):
+    ruta = str(tmp_path / "info_obs.sqlite")
+    almacen = AlmacenSQLite(ruta)
+    almacen.guardar("A", {"estado": "Activo"})
+    almacen.guardar("B", {"estado": "Activo", "tags": "ñandú"})
+    almacen.guardar("A", {"estado": "Inactivo"})
+    almacen.cerrar()
+
+    almacen = AlmacenSQLite(ruta)
+    assert almacen.cargar() == {"A": {"estado": "Inactivo"}, "B": {"estado": "Activo", "tags": "ñandú"}}
+    almacen.cerrar()
+
+
+def test_exportar_combina_con_el_json_existente(tmp_path):
+    salida = tmp_path / "info_obs.json"
+    salida.write_text(json.dumps({"Z": {"codigo": "Z", "estado": "Activo"}}), encoding="utf-8")
+    almacen = AlmacenSQLite(str(tmp_path / "info_obs.sqlite"))
+    almacen.guardar("A", {"estado": "Activo"})
+
+    assert almacen.exportar(str(salida)) == 1
+    almacen.cerrar()
+    assert json.loads(salida.read_text(encoding="utf-8")) == {
+        "Z": {"codigo": "Z", "estado": "Activo"},
+        "A": {"codigo": "A", "estado": "Activo"},
+    }
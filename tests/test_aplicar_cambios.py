@@ -0,0 +1,82 @@
+import asyncio
+from RPA_Ceplan.classes.navegador_observatorio import WriterObs, secciones_ficha
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+
+
+class WriterSinPagina(WriterObs):
+    """
+    Registra las secciones que se escribirían; cada sección devuelve lo que indique `salidas`.
+    """
+
+    def __init__(self, rutas: RutasAdmin, salidas: dict | None = None):
+        super().__init__(timeout=0, headless=True, rutas=rutas, tiempos=None)
+        self.salidas = salidas or {}
+        self.escritas: list[str] = []
+
+    async def seleccionar_icono(self, codigo_ficha, orden):
+        pass
+
+    async def actualizar_texto(self, codigo_ficha, texto_con_hipervínculos, omitir_inicio=False):
+        self.escritas.append("texto")
+        return self.salidas.get("texto", True)
+
+    async def actualizar_gráficos(self, codigo_ficha, resultado, desactivar=True, omitir_inicio=False, reconstruir=False):
+        self.escritas.append("graficos")
+        return self.salidas.get("graficos", {"filas_previas": 0, "sin_cambios": 0, "editados": 0,
+                                             "agregados": len(resultado), "desactivados": 0, "fallidos": 0})
+
+    async def sincronizar_referencias(self, codigo_ficha, referencias_limpias, omitir_inicio=False):
+        self.escritas.append("referencias")
+        return self.salidas.get("referencias", {"sin_cambios": 0, "editadas": 0, "desactivadas": 0,
+                                                "agregadas": 1, "fallidas": 0})
+
+    async def actualizar_sumilla(self, codigo_ficha, texto_con_hipervínculos, timeout=50, omitir_inicio=False):
+        self.escritas.append("sumilla")
+
+
+def _rutas(tmp_path) -> RutasAdmin:
+    rutas = RutasAdmin(str(tmp_path / "rutas_admin.json"))
+    for _, orden in secciones_ficha:
+        rutas.registrar_ficha("t1", orden, f"https://observatorio.local/adm/ficha/t1/{orden}")
+    return rutas
+
+
+plan = ("Primer párrafo.\nSegundo párrafo", "[1] Referencia. https://a.org",
+        [[0, "Figura 1.", "Título", "Nota. Fuente"]])
+
+
+def test_escribe_todas_las_secciones_y_une_sus_reportes(tmp_path):
+    writer = WriterSinPagina(_rutas(tmp_path))
+    reporte = asyncio.run(writer.aplicar_cambios("t1", plan))
+    assert writer.escritas == ["texto", "graficos", "referencias", "sumilla"]
+    assert reporte["errores"] == {}
+    assert reporte["secciones"]["graficos"]["agregados"] == 1
+    assert reporte["secciones"]["referencias"]["agregadas"] == 1
+
+
+def test_no_escribe_la_sumilla_si_el_texto_no_se_guardo(tmp_path):
+    writer = WriterSinPagina(_rutas(tmp_path), salidas={"texto": False})
+    reporte = asyncio.run(writer.aplicar_cambios("t1", plan))
+    assert "sumilla" not in writer.escritas
+    assert "texto" in reporte["errores"]
+
+
+def test_no_escribe_la_sumilla_si_fallan_filas_de_referencias(tmp_path):
+    salidas = {"referencias": {"sin_cambios": 0, "editadas": 0, "desactivadas": 0, "agregadas": 0, "fallidas": 2}}
+    writer = WriterSinPagina(_rutas(tmp_path), salidas=salidas)
+    reporte = asyncio.run(writer.aplicar_cambios("t1", plan))
+    assert writer.escritas == ["texto", "graficos", "referencias"]
+    assert reporte["secciones"]["referencias"]["fallidas"] == 2
+    assert "referencias" in reporte["errores"]
+
+
+def test_secciones_vacias_no_se_tocan_salvo_que_se_pida(tmp_path):
+    sin_refs_ni_graficos = ("Primer párrafo.\nSegundo párrafo", "", [])
+
+    writer = WriterSinPagina(_rutas(tmp_path))
+    asyncio.run(writer.aplicar_cambios("t1", sin_refs_ni_graficos))
+    assert writer.escritas == ["texto", "sumilla"]
+
+    writer = WriterSinPagina(_rutas(tmp_path))
+    asyncio.run(writer.aplicar_cambios("t1", sin_refs_ni_graficos, vaciar=True))
+    assert writer.escritas == ["texto", "graficos", "referencias", "sumilla"]
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from RPA_Ceplan.benchmarks.benchmark_flujos import medir, comparar
+
+
+async def _chromium_disponible() -> str | None:
+    """
+    Lanza y cierra Chromium.
+
+    Returns:
+        str | None: El error si no se pudo lanzar; None si está disponible.
+    """
+    try:
+        from playwright.async_api import async_playwright
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            await browser.close()
+    except Exception as e:
+        return str(e).splitlines()[0]
+    return None
+
+
+def _verificar(resultado: dict):
+    assert resultado["fichas"] > 0
+    assert resultado["fallidas"] == 0
+    assert resultado["verificadas"] == resultado["fichas"]
+    assert resultado["fichas_por_minuto"] > 0
+    assert comparar([resultado], [], tolerancia=0.15) == []
+
+
+def test_flujo_graficos_por_http(info_obs):
+    # Sin páginas que necesiten JavaScript, el flujo completo no abre ningún navegador
+    resultado = medir("graficos", 2, info_obs, fichas_por_lista=3,
+                      opciones_servidor={"porcentaje_spa": 0, "semilla": 0})
+    assert resultado["por_navegador"] == 0
+    _verificar(resultado)
+
+
+@pytest.mark.parametrize("flujo", ["scraping", "referencias", "graficos"])
+def test_flujos_con_navegador(info_obs, flujo):
+    error = asyncio.run(_chromium_disponible())
+    if error:
+        pytest.skip(f"No se pudo lanzar Chromium: {error}")
+    resultado = medir(flujo, 2, info_obs, fichas_por_lista=2,
+                      opciones_servidor={"porcentaje_spa": 30, "semilla": 0})
+    _verificar(resultado)
+
+
+def test_comparar_marca_datos_incorrectos_y_caidas_de_rendimiento():
+    actual = {"flujo": "referencias", "concurrencia": 2, "fichas": 10, "verificadas": 9, "fichas_por_minuto": 50}
+    anterior = {"flujo": "referencias", "concurrencia": 2, "fichas": 10, "verificadas": 10, "fichas_por_minuto": 100}
+
+    regresiones = comparar([actual], [anterior], tolerancia=0.15)
+
+    assert len(regresiones) == 2
+    assert "datos incorrectos" in regresiones[0]
+    assert "antes 100" in regresiones[1]
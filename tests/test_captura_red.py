@@ -0,0 +1,102 @@
+import json
+import asyncio
+import requests
+from RPA_Ceplan.classes.captura_red import CapturaRed, normalizar_registro
+from RPA_Ceplan.classes.navegador_observatorio import mapeo_tematica
+
+
+class SolicitudGrabada():
+    def __init__(self, resource_type: str):
+        self.resource_type = resource_type
+
+
+class RespuestaGrabada():
+    """
+    Respuesta HTTP ya descargada con la interfaz de playwright.async_api.Response que usa CapturaRed.
+    """
+
+    def __init__(self, url: str, payload, tipo: str = "application/json", resource_type: str = "xhr"):
+        self.url = url
+        self.headers = {"content-type": tipo}
+        self.request = SolicitudGrabada(resource_type)
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+
+class PaginaGrabada():
+    def __init__(self):
+        self.manejadores = []
+
+    def on(self, evento, manejador):
+        self.manejadores.append(manejador)
+
+    def emitir(self, respuesta):
+        for manejador in self.manejadores:
+            manejador(respuesta)
+
+
+def _descargar(servidor, codigo) -> RespuestaGrabada:
+    url = f"{servidor.url}/api/ficha/{codigo}"
+    respuesta = requests.get(url, timeout=5)
+    respuesta.raise_for_status()
+    return RespuestaGrabada(url, respuesta.json(), respuesta.headers["Content-Type"])
+
+
+def _territorial(servidor) -> str:
+    return next(codigo for codigo, ficha in servidor.estado.fichas.items() if ficha["territorial"])
+
+
+def test_normalizar_registro_de_la_api(servidor):
+    codigo = _territorial(servidor)
+    detalle = requests.get(f"{servidor.url}/api/ficha/{codigo}", timeout=5).json()
+    registro = normalizar_registro(detalle, mapeo_tematica)
+    ficha = servidor.estado.fichas[codigo]
+
+    assert registro["codigo"] == codigo
+    assert registro["titulo_corto"] == ficha["shorttitle"]
+    assert registro["sumilla"] == ficha["summary"]
+    assert registro["estado"] == ("Activo" if ficha["status"] else "Inactivo")
+    assert registro["tematica"] == mapeo_tematica[ficha["idtematic"]]
+    assert registro["departamento"] == ficha["dpto"]
+
+
+def test_normalizar_registro_ignora_objetos_que_no_son_fichas():
+    assert normalizar_registro({"code": "t1"}, mapeo_tematica) is None
+    assert normalizar_registro({"ok": True, "filas": []}, mapeo_tematica) is None
+
+
+def test_captura_y_reproduccion_de_respuestas(servidor, tmp_path):
+    codigos = list(servidor.estado.fichas)[:5]
+    respuestas = [_descargar(servidor, codigo) for codigo in codigos]
+
+    async def capturar(lista):
+        captura = CapturaRed(mapeo_tematica)
+        pagina = PaginaGrabada()
+        captura.instalar(pagina)
+        # Lo que no es XHR/JSON de la API no se captura
+        pagina.emitir(RespuestaGrabada(f"{servidor.url}/ficha/{codigos[0]}", {}, "text/html"))
+        pagina.emitir(RespuestaGrabada(f"{servidor.url}/static/panel.js", {}, resource_type="script"))
+        for respuesta in lista:
+            pagina.emitir(respuesta)
+        assert await captura.esperar_registro(codigos[0], timeout=1) is not None
+        return captura, await captura.registros()
+
+    captura, registros = asyncio.run(capturar(respuestas))
+    assert sorted(registros) == sorted(codigos)
+    assert all(captura.completo(codigo) for codigo in codigos)
+    assert len(captura.respuestas) == len(codigos)
+
+    # Guardar y reproducir las respuestas da los mismos registros
+    ruta = str(tmp_path / "respuestas.jsonl")
+    captura.guardar_respuestas(ruta)
+    with open(ruta, "r", encoding="utf-8") as file:
+        grabadas = [RespuestaGrabada(linea["url"], linea["payload"]) for linea in map(json.loads, file)]
+    _, reproducidos = asyncio.run(capturar(grabadas))
+    assert reproducidos == registros
+
+
+def test_esperar_registro_sin_respuesta():
+    captura = CapturaRed(mapeo_tematica)
+    assert asyncio.run(captura.esperar_registro("t999", timeout=0.1)) is None
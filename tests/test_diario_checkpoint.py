@@ -0,0 +1,46 @@
+from RPA_Ceplan.classes.diario_checkpoint import DiarioCheckpoint
+
+
+def test_reanuda_tras_una_linea_truncada(tmp_path, cortar_final):
+    ruta = str(tmp_path / "diario.jsonl")
+    diario = DiarioCheckpoint(ruta)
+    diario.registrar("A", {"figuras": ["a1"]})
+    diario.registrar("B", {"figuras": ["b1"]})
+    diario.cerrar()
+    cortar_final(ruta)
+
+    diario = DiarioCheckpoint(ruta)
+    assert list(diario.completados) == ["A"]
+    diario.registrar("C", {"figuras": ["c1"]})
+    diario.cerrar()
+
+    diario = DiarioCheckpoint(ruta)
+    assert diario.completados == {"A": {"figuras": ["a1"]}, "C": {"figuras": ["c1"]}}
+    assert diario.pendientes(["A", "B", "C"]) == ["B"]
+    diario.cerrar()
+
+
+def test_consolidar(tmp_path):
+    diario = DiarioCheckpoint(str(tmp_path / "diario.jsonl"))
+    diario.registrar("A", {"figuras": []})
+    assert diario.consolidar(str(tmp_path / "figuras.json")) == 1
+    diario.cerrar()
+
+
+def test_rotar_tras_consolidar_empieza_un_diario_vacio(tmp_path):
+    ruta = str(tmp_path / "diario.jsonl")
+    diario = DiarioCheckpoint(ruta)
+    diario.registrar("A", {"figuras": ["a1"]})
+    diario.registrar("B", {"figuras": []})
+    diario.consolidar(str(tmp_path / "figuras.json"))
+    ruta_anterior = diario.rotar()
+    diario.registrar("C", {"figuras": ["c1"]})
+    diario.cerrar()
+
+    diario = DiarioCheckpoint(ruta)
+    assert diario.completados == {"C": {"figuras": ["c1"]}}
+    assert diario.pendientes(["A", "B", "C"]) == ["A", "B"]
+    diario.cerrar()
+    anterior = DiarioCheckpoint(ruta_anterior)
+    assert anterior.completados == {"A": {"figuras": ["a1"]}, "B": {"figuras": []}}
+    anterior.cerrar()
@@ -0,0 +1,64 @@
+import asyncio
+import requests
+from RPA_Ceplan.classes.extractor_graficos import ExtractorGraficosHTTP, extraer_ids, patron_shell_spa
+
+
+def _paginas_spa(servidor) -> set[str]:
+    """
+    Fichas cuya página pública es solo la raíz de la aplicación Angular.
+    """
+    return {codigo for codigo in servidor.estado.fichas
+            if patron_shell_spa.search(requests.get(f"{servidor.url}/ficha/{codigo}", timeout=5).text)}
+
+
+def test_extraer_ids_sin_duplicados_y_en_orden():
+    html = ('<iframe id="datawrapper-chart-b2"></iframe>'
+            '<iframe id="datawrapper-chart-a1" src="https://datawrapper.dwcdn.net/a1/"></iframe>'
+            '"https://datawrapper.dwcdn.net/c3/"')
+    assert extraer_ids(html) == ["b2", "a1", "c3"]
+
+
+def test_paginas_con_javascript_quedan_para_el_navegador(servidor):
+    servidor.porcentaje_spa = 30
+    spa = _paginas_spa(servidor)
+    assert spa and len(spa) < len(servidor.estado.fichas)
+
+    extractor = ExtractorGraficosHTTP(tareas=8, url_base=servidor.url)
+    obtenidos = []
+    try:
+        figuras, pendientes = asyncio.run(extractor.obtener_muchos(
+            list(servidor.estado.fichas), al_obtener=lambda codigo, ids: obtenidos.append(codigo)
+        ))
+    finally:
+        extractor.cerrar()
+
+    assert set(pendientes) == spa
+    assert set(figuras) == set(servidor.estado.fichas) - spa
+    assert sorted(obtenidos) == sorted(figuras)
+    for codigo, datos in figuras.items():
+        assert datos["figuras"] == servidor.estado.fichas[codigo]["figuras"]
+
+
+def test_api_evita_el_navegador(servidor):
+    servidor.porcentaje_spa = 100
+    extractor = ExtractorGraficosHTTP(tareas=8, url_api=f"{servidor.url}/api/ficha/{{codigo}}", url_base=servidor.url)
+    try:
+        figuras, pendientes = asyncio.run(extractor.obtener_muchos(list(servidor.estado.fichas)))
+    finally:
+        extractor.cerrar()
+
+    assert pendientes == []
+    assert {codigo: datos["figuras"] for codigo, datos in figuras.items()} == {
+        codigo: ficha["figuras"] for codigo, ficha in servidor.estado.fichas.items()
+    }
+
+
+def test_ficha_inexistente_queda_pendiente(servidor):
+    extractor = ExtractorGraficosHTTP(url_base=servidor.url)
+    try:
+        figuras, pendientes = asyncio.run(extractor.obtener_muchos(["no_existe"]))
+    finally:
+        extractor.cerrar()
+
+    assert figuras == {}
+    assert pendientes == ["no_existe"]
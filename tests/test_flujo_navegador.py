@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+
+pytest.importorskip("playwright.async_api")
+
+from RPA_Ceplan.classes.navegador_observatorio import ReaderObs
+from RPA_Ceplan.classes.almacen_resultados import AlmacenJSONL
+from RPA_Ceplan.classes.instrumentacion import RegistroTiempos
+
+
+async def _leer_una_ficha(servidor, directorio) -> tuple[str, dict]:
+    """
+    Login, lista y lectura de una ficha con ReaderObs contra el servidor simulado.
+    """
+    # Una lista de un rubro que no es el primero del menú
+    (rubro, subrubro), codigos = [(lista, codigos) for lista, codigos in servidor.estado.listas.items() if codigos][-1]
+    almacen = AlmacenJSONL(str(directorio / "fichas.jsonl"))
+    sesion = ReaderObs(timeout=150, headless=True, url_base=servidor.url, almacen=almacen, perfil_bloqueo="admin-minimal",
+                       email="prueba@observatorio.local", password="prueba",
+                       ruta_estado=str(directorio / "estado_sesion.json"), tiempos=RegistroTiempos())
+    try:
+        try:
+            await sesion.iniciar_navegador()
+        except Exception as e:
+            pytest.skip(f"No se pudo lanzar Chromium: {str(e).splitlines()[0]}")
+        await sesion.login()
+        url_lista, fichas = await sesion.listar_fichas(rubro, subrubro)
+        assert [ficha["codigo"] for ficha in fichas] == codigos
+        await sesion.leer_ficha(fichas[0], url_lista, "territorial" in subrubro.lower())
+    finally:
+        await sesion.cerrar_navegador()
+        almacen.cerrar()
+    return fichas[0]["codigo"], AlmacenJSONL(str(directorio / "fichas.jsonl")).cargar()
+
+
+def test_login_lista_y_lectura_de_una_ficha(servidor, tmp_path):
+    codigo, registros = asyncio.run(_leer_una_ficha(servidor, tmp_path))
+
+    ficha = servidor.estado.fichas[codigo]
+    assert registros[codigo]["titulo_corto"] == ficha["shorttitle"]
+    assert registros[codigo]["sumilla"] == ficha["summary"]
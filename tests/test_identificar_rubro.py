@@ -0,0 +1,42 @@
+import asyncio
+from RPA_Ceplan.classes.navegador_observatorio import NavegadorObs
+from RPA_Ceplan.classes.rutas_admin import RutasAdmin
+
+
+class NavegadorSinPagina(NavegadorObs):
+    """
+    Registra las rutas a las que navegaría en lugar de abrirlas.
+    """
+
+    def __init__(self, rutas: RutasAdmin):
+        super().__init__(timeout=0, headless=True, rutas=rutas, tiempos=None)
+        self.visitadas: list[str] = []
+
+    async def ir_a_ruta(self, ruta):
+        self.visitadas.append(ruta)
+
+
+def _rutas(tmp_path) -> RutasAdmin:
+    rutas = RutasAdmin(str(tmp_path / "rutas_admin.json"))
+    rutas.registrar_lista("Tendencias", "Tendencia nacional", "https://observatorio.local/adm/lista/0/0")
+    # Lo que deja listar_fichas: solo el ícono de metadata
+    rutas.registrar_ficha("t1", 5, "https://observatorio.local/adm/ficha/t1/5")
+    return rutas
+
+
+def test_abre_la_lista_si_falta_la_ruta_del_icono(tmp_path):
+    navegador = NavegadorSinPagina(_rutas(tmp_path))
+    asyncio.run(navegador.identificar_rubro("t1", orden=3))
+    assert navegador.visitadas == ["/adm/lista/0/0"]
+
+
+def test_no_abre_la_lista_si_conoce_la_ruta_del_icono(tmp_path):
+    navegador = NavegadorSinPagina(_rutas(tmp_path))
+    asyncio.run(navegador.identificar_rubro("t1", orden=5))
+    assert navegador.visitadas == []
+
+
+def test_sin_orden_siempre_abre_la_lista(tmp_path):
+    navegador = NavegadorSinPagina(_rutas(tmp_path))
+    asyncio.run(navegador.identificar_rubro("t1"))
+    assert navegador.visitadas == ["/adm/lista/0/0"]
@@ -0,0 +1,88 @@
+import asyncio
+from RPA_Ceplan.classes.navegador_compartido import NavegadorCompartido
+from RPA_Ceplan.classes.navegador_observatorio import NavegadorObs
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+
+url_base = "http://observatorio.local"
+selector_panel = 'li.btn-org[routerlinkactive="active"]'
+
+
+class ContextoFalso():
+    async def storage_state(self):
+        return {"cookies": [{"name": "sesion", "value": "1", "expires": -1}], "origins": []}
+
+
+class PaginaFalsa():
+    """
+    Pestaña sin Chromium: parte en about:blank, como una pestaña nueva, y registra cada acción.
+    """
+
+    def __init__(self):
+        self.url = "about:blank"
+        self.context = ContextoFalso()
+        self.acciones: list[tuple] = []
+
+    def is_closed(self):
+        return False
+
+    async def goto(self, url):
+        self.acciones.append(("goto", url))
+        self.url = url
+
+    async def click(self, selector):
+        self.acciones.append(("click", selector))
+
+    async def fill(self, selector, valor):
+        self.acciones.append(("fill", selector))
+
+    async def wait_for_selector(self, selector, **kwargs):
+        # El panel solo existe una vez abierto /adm/tendencia o enviado el login
+        if selector == selector_panel and self.url == "about:blank":
+            raise TimeoutError(f"{selector} no aparece en una pestaña en blanco")
+        self.acciones.append(("esperar", selector))
+
+    async def evaluate(self, expresion, *args):
+        return 1
+
+
+class CompartidoFalso(NavegadorCompartido):
+    """
+    NavegadorCompartido sin Chromium: cada pestaña es una PaginaFalsa.
+    """
+
+    def __init__(self):
+        super().__init__(limite_pestanas=8)
+        self.paginas: list[PaginaFalsa] = []
+
+    async def abrir_pagina(self, estado=None):
+        page = PaginaFalsa()
+        self.paginas.append(page)
+        self.pestanas_abiertas += 1
+        return page
+
+    async def cerrar_pagina(self, page):
+        self.pestanas_abiertas -= 1
+
+
+def test_todas_las_pestanas_compartidas_quedan_en_el_panel():
+    async def escenario():
+        navegador = CompartidoFalso()
+        async with PoolSesiones(NavegadorObs, tamano=3, navegador=navegador, url_base=url_base,
+                                email="usuario@ceplan.gob.pe", password="clave", tiempos=None) as pool:
+            for _ in range(3):
+                async with pool.prestar():
+                    pass
+            return navegador
+
+    navegador = asyncio.run(escenario())
+
+    assert len(navegador.paginas) == 3
+    # Un solo formulario de login; las otras pestañas abren el panel con las cookies compartidas
+    logins = [page for page in navegador.paginas if ("fill", 'input[name="email"]') in page.acciones]
+    assert len(logins) == 1
+    for page in navegador.paginas:
+        if page is not logins[0]:
+            assert page.acciones[:2] == [("goto", f"{url_base}/adm/tendencia"), ("esperar", selector_panel)]
+    # Ninguna pestaña necesitó volver al inicio desde el menú al prestarse
+    assert not any(("click", 'i.icon-header.fa.fa-user.fa-3') in page.acciones
+                   for page in navegador.paginas if page is not logins[0])
@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import asynccontextmanager
+from RPA_Ceplan.classes.planificador_fichas import PlanificadorFichas
+from RPA_Ceplan.classes.politica_reintentos import PoliticaReintentos
+
+
+class SesionFalsa():
+    def __init__(self, fallos: dict[str, int] | None = None):
+        self.politica = PoliticaReintentos(base=0)
+        self.fallos = dict(fallos or {})
+        self.leidas: list[str] = []
+
+    async def listar_fichas(self, rubro, subrubro):
+        fichas = [{"codigo": f"{rubro}{i}"} for i in range(2)]
+        return f"/adm/lista/{rubro}", fichas
+
+    async def leer_capturadas(self, fichas, territorial, nombre):
+        return fichas
+
+    async def leer_ficha(self, ficha, url_lista, territorial):
+        await asyncio.sleep(0)
+        if self.fallos.get(ficha["codigo"], 0) > 0:
+            self.fallos[ficha["codigo"]] -= 1
+            raise ConnectionError("conexión reiniciada")
+        self.leidas.append(ficha["codigo"])
+
+    async def memoria(self):
+        return {"js_heap_mb": None}
+
+
+class PoolFalso():
+    def __init__(self, sesion: SesionFalsa, tamano: int = 1):
+        self.sesion = sesion
+        self.tamano = tamano
+        self._semaforo = asyncio.Semaphore(tamano)
+
+    @asynccontextmanager
+    async def prestar(self):
+        async with self._semaforo:
+            yield self.sesion
+
+
+def test_mas_trabajadores_que_sesiones_no_se_bloquean():
+    # Con un trabajador esperando la cola mientras tiene la sesión prestada, el otro
+    # (con una ficha en mano) no conseguiría sesión y la cola nunca terminaría
+    sesion = SesionFalsa(fallos={"a1": 1})
+    planificador = PlanificadorFichas(PoolFalso(sesion, tamano=1), trabajadores=3)
+
+    reporte = asyncio.run(asyncio.wait_for(planificador.ejecutar([("a", None, False), ("b", None, False)]), 5))
+
+    assert sorted(sesion.leidas) == ["a0", "a1", "b0", "b1"]
+    assert reporte["leidas"] == 4
+    assert reporte["fallidas"] == []
+
+
+def test_ficha_descartada_tras_los_intentos():
+    sesion = SesionFalsa(fallos={"a0": 5})
+    planificador = PlanificadorFichas(PoolFalso(sesion, tamano=2), intentos_maximos=2)
+
+    reporte = asyncio.run(asyncio.wait_for(planificador.ejecutar([("a", None, False)]), 5))
+
+    assert reporte["fallidas"] == ["a0"]
+    assert sesion.leidas == ["a1"]
@@ -0,0 +1,45 @@
+from RPA_Ceplan.classes.navegador_observatorio import planificar_graficos, fila_grafico
+
+
+def _fila(orden, order, numeracion, titulo, activo=True):
+    # Columnas de la tabla de gráficos: orden, numeración, título y estado
+    estado = "ACTIVO" if activo else "INACTIVO"
+    return fila_grafico({"orden": orden, "activo": activo, "lapiz_visible": True, "estado": estado,
+                         "celdas": [order, numeracion, titulo, estado]})
+
+
+def test_fila_grafico_no_lee_la_nota():
+    fila = _fila(0, "1", "Figura 1.", "Evolución del indicador")
+    assert (fila["order"], fila["numeration"], fila["title"]) == ("1", "Figura 1.", "Evolución del indicador")
+    assert fila["note"] is None
+
+
+def test_cambio_solo_en_la_nota_se_escribe():
+    existentes = [_fila(0, "1", "Figura 1.", "Evolución del indicador")]
+    items = [[1, "Figura 1.", "Evolución del indicador", "Nota. Fuente corregida"]]
+
+    operaciones = planificar_graficos(existentes, items)
+
+    assert operaciones == [{"accion": "editar", "orden": 0, "campos": {"note": "Nota. Fuente corregida"},
+                            "activar": False}]
+
+
+def test_campos_visibles_iguales_no_se_reescriben():
+    existentes = [_fila(0, "1", "Figura 1", "Evolución del indicador"),
+                  _fila(1, "2", "Figura 2.", "Título anterior")]
+    items = [[1, "Figura 1.", "Evolución del indicador", "Nota. A"],
+             [2, "Figura 2.", "Título nuevo", "Nota. B"]]
+
+    operaciones = planificar_graficos(existentes, items)
+
+    assert [op["campos"] for op in operaciones] == [{"note": "Nota. A"},
+                                                    {"title": "Título nuevo", "note": "Nota. B"}]
+
+
+def test_filas_sobrantes_se_desactivan_y_faltantes_se_agregan():
+    existentes = [_fila(0, "1", "Figura 1.", "Uno"), _fila(1, "2", "Figura 2.", "Dos")]
+    items = [[1, "Figura 1.", "Uno", "Nota. A"], [3, "Figura 3.", "Tres", "Nota. C"]]
+
+    acciones = [(op["accion"], op["orden"]) for op in planificar_graficos(existentes, items)]
+
+    assert acciones == [("editar", 0), ("desactivar", 1), ("agregar", None)]
@@ -0,0 +1,47 @@
+from RPA_Ceplan.classes.navegador_observatorio import planificar_referencias, dividir_referencias
+
+
+def _fila(orden, content, urlsource, activo):
+    return {"orden": orden, "content": content, "urlsource": urlsource, "activo": activo}
+
+
+def test_referencias_sin_cambios_no_generan_operaciones():
+    texto = "[1] Documento uno. https://a.pe/uno\n[2] Documento dos. https://a.pe/dos"
+    deseadas = dividir_referencias(texto)
+    existentes = [_fila(i, d["content"], d["urlsource"], True) for i, d in enumerate(deseadas)]
+
+    assert planificar_referencias(existentes, deseadas) == []
+
+
+def test_copias_inactivas_no_ganan_a_las_activas():
+    # Tabla con copias inactivas de ejecuciones anteriores (desactivar todo y volver a
+    # agregar) seguidas de las copias activas de las mismas referencias
+    texto = "[1] Documento uno. https://a.pe/uno\n[2] Documento dos. https://a.pe/dos"
+    deseadas = dividir_referencias(texto)
+    inactivas = [_fila(i, d["content"], d["urlsource"], False) for i, d in enumerate(deseadas)]
+    activas = [_fila(i + len(deseadas), d["content"], d["urlsource"], True) for i, d in enumerate(deseadas)]
+
+    assert planificar_referencias(inactivas + activas, deseadas) == []
+
+
+def test_referencia_modificada_edita_la_fila_activa_del_mismo_numero():
+    deseadas = dividir_referencias("[1] Documento uno. https://a.pe/uno\n[2] Informe dos. https://a.pe/dos")
+    existentes = [
+        _fila(0, "[2] Documento dos. https://a.pe/dos", "https://a.pe/dos", False),
+        _fila(1, "[1] Documento uno. https://a.pe/uno", "https://a.pe/uno", True),
+        _fila(2, "[2] Documento dos. https://a.pe/dos", "https://a.pe/dos", True),
+    ]
+
+    operaciones = planificar_referencias(existentes, deseadas)
+
+    assert operaciones == [{"accion": "editar", "orden": 2, "content": deseadas[1]["content"],
+                            "urlsource": "https://a.pe/dos", "activar": False}]
+
+
+def test_inactiva_unica_se_activa():
+    deseadas = dividir_referencias("[1] Documento uno. https://a.pe/uno")
+    existentes = [_fila(0, deseadas[0]["content"], deseadas[0]["urlsource"], False)]
+
+    assert planificar_referencias(existentes, deseadas) == [
+        {"accion": "editar", "orden": 0, "content": None, "urlsource": None, "activar": True}
+    ]
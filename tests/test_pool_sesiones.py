@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from RPA_Ceplan.classes.pool_sesiones import PoolSesiones
+
+url_base = "http://observatorio.local"
+
+
+class PaginaFalsa():
+    def __init__(self):
+        self.url = f"{url_base}/"
+
+    def is_closed(self):
+        return False
+
+    async def evaluate(self, expresion):
+        return 1
+
+
+class SesionFalsa():
+    """
+    Sesión sin navegador. `creadas` cuenta las sesiones creadas y a partir de `fallar_desde`
+    la creación lanza un error, como un login que deja de funcionar a mitad del crawl.
+    """
+    creadas = 0
+    fallar_desde: int | None = None
+    vueltas_a_inicio = 0
+
+    def __init__(self, timeout, headless, **kwargs):
+        self.url_base = url_base
+        self.page = None
+
+    async def iniciar_navegador(self):
+        if SesionFalsa.fallar_desde is not None and SesionFalsa.creadas >= SesionFalsa.fallar_desde:
+            raise ConnectionError("login rechazado")
+        SesionFalsa.creadas += 1
+        self.page = PaginaFalsa()
+
+    async def login(self):
+        self.page.url = f"{url_base}/adm/tendencia"
+
+    async def volver_a_inicio(self):
+        SesionFalsa.vueltas_a_inicio += 1
+        self.page.url = f"{url_base}/adm/tendencia"
+
+    async def cerrar_navegador(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def reiniciar_contadores():
+    SesionFalsa.creadas = 0
+    SesionFalsa.fallar_desde = None
+    SesionFalsa.vueltas_a_inicio = 0
+
+
+def test_sin_capacidad_las_tareas_en_espera_reciben_un_error():
+    async def escenario():
+        # Cada préstamo recicla la sesión y, tras el arranque, ninguna sesión nueva se puede crear
+        pool = PoolSesiones(SesionFalsa, tamano=2, usos_maximos=1, intentos_reposicion=2, espera_reposicion=0)
+        await pool.iniciar()
+        SesionFalsa.fallar_desde = SesionFalsa.creadas
+
+        async def tarea():
+            async with pool.prestar():
+                await asyncio.sleep(0.01)
+
+        resultados = await asyncio.gather(*(tarea() for _ in range(5)), return_exceptions=True)
+        await pool.cerrar()
+        return pool, resultados
+
+    pool, resultados = asyncio.run(asyncio.wait_for(escenario(), 5))
+
+    assert sum(resultado is None for resultado in resultados) == 2
+    assert all(isinstance(resultado, RuntimeError) for resultado in resultados if resultado is not None)
+    assert pool.capacidad == 0
+
+
+def test_una_reposicion_fallida_reduce_la_capacidad_sin_bloquear():
+    async def escenario():
+        pool = PoolSesiones(SesionFalsa, tamano=2, intentos_reposicion=1, espera_reposicion=0)
+        await pool.iniciar()
+        SesionFalsa.fallar_desde = SesionFalsa.creadas
+        with pytest.raises(ValueError):
+            async with pool.prestar():
+                raise ValueError("fallo de la tarea")
+        # Queda una sesión y sigue atendiendo préstamos
+        for _ in range(3):
+            async with pool.prestar():
+                pass
+        capacidad = pool.capacidad
+        await pool.cerrar()
+        return capacidad
+
+    assert asyncio.run(asyncio.wait_for(escenario(), 5)) == 1
+
+
+def test_solo_navega_al_inicio_si_la_sesion_quedo_en_otra_pagina():
+    async def escenario():
+        pool = PoolSesiones(SesionFalsa, tamano=1)
+        await pool.iniciar()
+        async with pool.prestar():
+            pass
+        async with pool.prestar() as sesion:
+            sesion.page.url = f"{url_base}/adm/ficha/t1/5"
+        async with pool.prestar():
+            pass
+        await pool.cerrar()
+
+    asyncio.run(asyncio.wait_for(escenario(), 5))
+    assert SesionFalsa.vueltas_a_inicio == 1